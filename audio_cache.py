@@ -0,0 +1,354 @@
+"""audio_cache.py
+Sünteesitud kõne hoidmine kettal (PCM WAV), et korduvaid lauseid ei peaks
+iga kõne ajal uuesti TTS-ist tellima.
+
+AudioDiskCache - võti (tekst, hääl, prosoodia, diskreetimissagedus) -> WAV fail
+GreetingCache  - väike komplekt tervitusi, mis laaditakse prewarm ajal mällu ja
+                 mängitakse sessiooni alguses kohe; vahemälu puudumisel
+                 salvestatakse esitatud sünteesi kaadrid järgmiste kõnede jaoks.
+PhraseCache    - piiratud suurusega (LRU) kettavahemälu lausete jaoks
+CachedTTS      - TTS ümbris: AgentSession jagab vastuse lauseteks ja iga lause
+                 tuleb vahemälust või sünteesitakse ja salvestatakse.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import wave
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Optional, Sequence
+
+from livekit import rtc
+from livekit.agents import DEFAULT_API_CONNECT_OPTIONS, APIConnectOptions, utils
+from livekit.agents import tts as agents_tts
+
+from weather_cache import cache_dir
+
+logger = logging.getLogger("audio-cache")
+
+FRAME_MS = 20
+
+
+@dataclass(frozen=True)
+class CachedAudio:
+    pcm: bytes  # 16-bit little-endian
+    sample_rate: int
+    num_channels: int
+
+    def frames(self, frame_ms: int = FRAME_MS) -> "list[rtc.AudioFrame]":
+        samples = self.sample_rate * frame_ms // 1000
+        step = samples * self.num_channels * 2
+        out = []
+        for i in range(0, len(self.pcm), step):
+            chunk = self.pcm[i:i + step]
+            out.append(rtc.AudioFrame(
+                data=chunk,
+                sample_rate=self.sample_rate,
+                num_channels=self.num_channels,
+                samples_per_channel=len(chunk) // (2 * self.num_channels),
+            ))
+        return out
+
+
+def audio_key(text: str, voice: str, prosody: object, sample_rate: int) -> str:
+    raw = json.dumps([text, voice, repr(prosody), sample_rate], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+class AudioDiskCache:
+    def __init__(self, directory: Optional[Path] = None) -> None:
+        self.directory = directory or cache_dir() / "audio"
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}.wav"
+
+    def load(self, key: str) -> Optional[CachedAudio]:
+        try:
+            with wave.open(str(self.path(key)), "rb") as wav:
+                return CachedAudio(
+                    pcm=wav.readframes(wav.getnframes()),
+                    sample_rate=wav.getframerate(),
+                    num_channels=wav.getnchannels(),
+                )
+        except FileNotFoundError:
+            return None
+        except (OSError, wave.Error, EOFError) as e:
+            logger.warning("heli vahemälu lugemine ebaõnnestus (%s): %s", key, e)
+            return None
+
+    def store(self, key: str, audio: CachedAudio) -> None:
+        path = self.path(key)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with wave.open(str(tmp), "wb") as wav:
+                wav.setnchannels(audio.num_channels)
+                wav.setsampwidth(2)
+                wav.setframerate(audio.sample_rate)
+                wav.writeframes(audio.pcm)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning("heli vahemälu salvestamine ebaõnnestus (%s): %s", key, e)
+
+
+async def _aiter_frames(audio: CachedAudio) -> AsyncIterator[rtc.AudioFrame]:
+    for frame in audio.frames():
+        yield frame
+
+
+class GreetingCache:
+    def __init__(
+        self,
+        texts: Sequence[str],
+        *,
+        voice: str,
+        prosody: object,
+        sample_rate: int,
+        store: Optional[AudioDiskCache] = None,
+    ) -> None:
+        self.texts = list(texts)
+        self.voice = voice
+        self.prosody = prosody
+        self.sample_rate = sample_rate
+        self.store = store or AudioDiskCache()
+        self._memory: Dict[str, CachedAudio] = {}
+        self._fill_tasks: "set[asyncio.Task[None]]" = set()
+
+    def key(self, text: str) -> str:
+        return audio_key(text, self.voice, self.prosody, self.sample_rate)
+
+    def preload(self) -> int:
+        """Loeb olemasolevad tervitused kettalt mällu (sünkroonne, prewarm jaoks)."""
+        for text in self.texts:
+            audio = self.store.load(self.key(text))
+            if audio is not None:
+                self._memory[text] = audio
+        return len(self._memory)
+
+    async def _synthesize(self, tts: agents_tts.TTS, text: str, out: list) -> AsyncIterator[rtc.AudioFrame]:
+        """Esitab TTS-i kaadrid ja kogub need `out` loendisse; lõpus lisatakse None (süntees jõudis lõpuni)."""
+        async with tts.synthesize(text) as stream:
+            async for ev in stream:
+                out.append(ev.frame)
+                yield ev.frame
+        out.append(None)
+
+    async def _remember(self, text: str, frames: list) -> None:
+        # Järgmised kõned saavad selle tervituse juba vahemälust
+        first = frames[0]
+        audio = CachedAudio(
+            pcm=b"".join(bytes(frame.data) for frame in frames),
+            sample_rate=first.sample_rate,
+            num_channels=first.num_channels,
+        )
+        self._memory[text] = audio
+        await asyncio.to_thread(self.store.store, self.key(text), audio)
+
+    async def play(self, session, tts: agents_tts.TTS, fallback_instructions: str) -> None:
+        """Mängib tervituse: vahemälust kohe, muidu TTS-iga; LLM ainult viimase abinõuna.
+
+        Vahemälu puudumisel salvestatakse just sünteesitud kaadrid (teist
+        TTS-i päringut ei tehta). Kui süntees ebaõnnestub, genereerib
+        tervituse LLM; katkestuse korral ei tehta midagi.
+        """
+        text = random.choice(self.texts)
+        audio = self._memory.get(text)
+        frames: list = []
+        try:
+            if audio is not None:
+                handle = session.say(text, audio=_aiter_frames(audio))
+            else:
+                handle = session.say(text, audio=self._synthesize(tts, text, frames))
+            await handle
+        except Exception as e:
+            logger.warning("tervituse esitamine ebaõnnestus, kasutan LLM-i: %s", e)
+            await session.generate_reply(instructions=fallback_instructions)
+            return
+        # AgentSession logib heliallika vea ise; pooliku sünteesi tunneb ära lõpumärgi puudumisest.
+        # Katkestus (helistaja rääkis peale) ei ole viga: helistaja voor jätkub ja LLM vastab sellele.
+        synthesized = bool(frames) and frames[-1] is None
+        if audio is None and not synthesized and not handle.interrupted:
+            logger.warning("tervituse süntees ebaõnnestus, kasutan LLM-i")
+            await session.generate_reply(instructions=fallback_instructions)
+        if audio is None and synthesized and len(frames) > 1:
+            task = asyncio.create_task(self._remember(text, frames[:-1]))
+            self._fill_tasks.add(task)
+            task.add_done_callback(self._fill_tasks.discard)
+
+
+class PhraseCache(AudioDiskCache):
+    """Kettal LRU (faili mtime järgi) + väike mälus hoitav LRU kuumade lausete jaoks."""
+
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        *,
+        max_bytes: int = 200 * 1024 * 1024,
+        memory_entries: int = 128,
+    ) -> None:
+        super().__init__(directory or cache_dir() / "tts")
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, CachedAudio]" = OrderedDict()
+        self._index: "Optional[OrderedDict[str, int]]" = None  # võti -> baite, vanim ees
+        self._total_bytes = 0
+        # get/put jooksevad asyncio.to_thread lõimedes
+        self._lock = threading.Lock()
+
+    def _ensure_index(self) -> "OrderedDict[str, int]":
+        if self._index is None:
+            files = []
+            if self.directory.exists():
+                for p in self.directory.glob("*.wav"):
+                    try:
+                        st = p.stat()
+                    except OSError:
+                        continue
+                    files.append((st.st_mtime, p.stem, st.st_size))
+            files.sort()
+            self._index = OrderedDict((key, size) for _, key, size in files)
+            self._total_bytes = sum(self._index.values())
+        return self._index
+
+    def _remember(self, key: str, audio: CachedAudio) -> None:
+        self._memory[key] = audio
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[CachedAudio]:
+        """Sünkroonne (ketta lugemine); sündmustsüklist kutsu asyncio.to_thread kaudu."""
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is None:
+                audio = self.load(key)
+                if audio is not None:
+                    self._remember(key, audio)
+                    try:
+                        os.utime(self.path(key))
+                    except OSError:
+                        pass
+            else:
+                self._memory.move_to_end(key)
+            if audio is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            index = self._ensure_index()
+            if key in index:
+                index.move_to_end(key)
+            return audio
+
+    def put(self, key: str, audio: CachedAudio) -> None:
+        with self._lock:
+            self._remember(key, audio)
+            self.store(key, audio)
+            index = self._ensure_index()
+            size = len(audio.pcm) + 44  # + WAV päis
+            self._total_bytes += size - index.get(key, 0)
+            index[key] = size
+            index.move_to_end(key)
+            while self._total_bytes > self.max_bytes and len(index) > 1:
+                old_key, old_size = index.popitem(last=False)
+                self._total_bytes -= old_size
+                self._memory.pop(old_key, None)
+                try:
+                    self.path(old_key).unlink()
+                except OSError:
+                    pass
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._index) if self._index is not None else 0,
+            "bytes": self._total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class CachedTTS(agents_tts.TTS):
+    def __init__(
+        self,
+        inner: agents_tts.TTS,
+        *,
+        voice: str,
+        prosody: object,
+        cache: Optional[PhraseCache] = None,
+    ) -> None:
+        super().__init__(
+            capabilities=agents_tts.TTSCapabilities(streaming=False),
+            sample_rate=inner.sample_rate,
+            num_channels=inner.num_channels,
+        )
+        self.inner = inner
+        self.voice = voice
+        self.prosody = prosody
+        self.cache = cache or PhraseCache()
+
+    @property
+    def model(self) -> str:
+        return self.inner.model
+
+    @property
+    def provider(self) -> str:
+        return self.inner.provider
+
+    def key(self, text: str) -> str:
+        return audio_key(text.strip(), self.voice, self.prosody, self.sample_rate)
+
+    def synthesize(
+        self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS
+    ) -> "CachedChunkedStream":
+        return CachedChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+    def prewarm(self) -> None:
+        self.inner.prewarm()
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+class CachedChunkedStream(agents_tts.ChunkedStream):
+    def __init__(self, *, tts: CachedTTS, input_text: str, conn_options: APIConnectOptions) -> None:
+        super().__init__(tts=tts, input_text=input_text, conn_options=conn_options)
+        self._cached_tts = tts
+
+    async def _run(self, output_emitter: agents_tts.AudioEmitter) -> None:
+        tts = self._cached_tts
+        key = tts.key(self.input_text)
+        output_emitter.initialize(
+            request_id=utils.shortuuid(),
+            sample_rate=tts.sample_rate,
+            num_channels=tts.num_channels,
+            mime_type="audio/pcm",
+        )
+
+        audio = await asyncio.to_thread(tts.cache.get, key)
+        if audio is not None:
+            output_emitter.push(audio.pcm)
+            return
+
+        # Kordused teeb välimine ChunkedStream, sisemine proovib ühe korra
+        inner_options = dataclasses.replace(self._conn_options, max_retry=0)
+        chunks = []
+        async with tts.inner.synthesize(self.input_text, conn_options=inner_options) as stream:
+            async for ev in stream:
+                data = bytes(ev.frame.data)
+                chunks.append(data)
+                output_emitter.push(data)
+        audio = CachedAudio(pcm=b"".join(chunks), sample_rate=tts.sample_rate, num_channels=tts.num_channels)
+        if audio.pcm:
+            await asyncio.to_thread(tts.cache.put, key, audio)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""bench_forecast_agg.py
+Võrdleb forecast_agg koondamist varasema Pythoni tsükliga. Alla
+forecast_agg.VECTORIZE_MIN_ENTRIES kirje koondab forecast_agg Pythonis, suuremad
+veergudena (numpy).
+
+Genereerib sünteetilised /forecast vastused (3h kirjed, osa väärtusi puudu),
+kontrollib, et mõlemad annavad samad päevade kokkuvõtted, ja mõõdab aega.
+
+Kasutus:
+  python benchmarks/bench_forecast_agg.py
+  python benchmarks/bench_forecast_agg.py --sizes 40 2920 14600 --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from forecast_agg import summarize_forecast  # noqa: E402
+
+DESCRIPTIONS = ["selge taevas", "vähene pilvisus", "pilves", "kerge vihm", "vihm", "lumi", "udu"]
+
+
+def synthetic_payload(n_entries: int, seed: int = 1) -> dict:
+    rng = random.Random(seed)
+    start = 1700000000
+
+    def maybe(v):
+        return None if rng.random() < 0.02 else v
+
+    entries = []
+    for i in range(n_entries):
+        t = 5 + 10 * math.sin(i / 1460 * 2 * math.pi) + rng.uniform(-3, 3)
+        item = {
+            "dt": start + i * 10800,
+            "main": {
+                "temp": maybe(round(t, 2)),
+                "temp_min": maybe(round(t - rng.uniform(0, 1), 2)),
+                "temp_max": maybe(round(t + rng.uniform(0, 1), 2)),
+                "feels_like": maybe(round(t - 2, 2)),
+                "humidity": maybe(rng.randint(40, 100)),
+                "pressure": maybe(rng.randint(980, 1040)),
+            },
+            "wind": {"speed": maybe(round(rng.uniform(0, 15), 2))},
+        }
+        if rng.random() > 0.01:
+            item["weather"] = [{"description": rng.choice(DESCRIPTIONS)}]
+        entries.append(item)
+    return {"city": {"timezone": 7200}, "list": entries}
+
+
+def legacy_summarize(f_data: dict) -> list:
+    """get_weather_forecast päevatsükkel enne forecast_agg moodulit."""
+    entries = f_data.get("list", [])
+    tz_offset = f_data.get("city", {}).get("timezone", 0)
+    grouped = defaultdict(list)
+    for item in entries:
+        dt_utc = datetime.utcfromtimestamp(item.get("dt"))
+        local_dt = dt_utc + timedelta(seconds=tz_offset)
+        grouped[local_dt.date()].append(item)
+    result = []
+    for date_key in sorted(grouped.keys()):
+        items = grouped[date_key]
+        temps, temps_min, temps_max, feels, winds, hums, presses, desc_list = [], [], [], [], [], [], [], []
+        for it in items:
+            main = it.get("main", {})
+            temps.append(main.get("temp"))
+            temps_min.append(main.get("temp_min"))
+            temps_max.append(main.get("temp_max"))
+            feels.append(main.get("feels_like"))
+            winds.append(it.get("wind", {}).get("speed"))
+            hums.append(main.get("humidity"))
+            presses.append(main.get("pressure"))
+            w_arr = it.get("weather", [])
+            if w_arr:
+                desc_list.append(w_arr[0].get("description", ""))
+
+        def clean(vals):
+            return [v for v in vals if v is not None]
+        temps_c, temps_min_c, temps_max_c = clean(temps), clean(temps_min), clean(temps_max)
+        feels_c, winds_c, hums_c, presses_c = clean(feels), clean(winds), clean(hums), clean(presses)
+        if not temps_c:
+            continue
+        avg_temp = sum(temps_c) / len(temps_c)
+        result.append((
+            date_key,
+            avg_temp,
+            sum(feels_c) / len(feels_c) if feels_c else avg_temp,
+            min(temps_min_c or temps_c),
+            max(temps_max_c or temps_c),
+            sum(winds_c) / len(winds_c) if winds_c else 0.0,
+            int(round(sum(hums_c) / len(hums_c))) if hums_c else 0,
+            int(round(sum(presses_c) / len(presses_c))) if presses_c else 0,
+            Counter(desc_list).most_common(1)[0][0] if desc_list else "",
+        ))
+    return result
+
+
+def check_equal(payload: dict) -> None:
+    legacy = legacy_summarize(payload)
+    new = summarize_forecast(payload).days
+    assert len(legacy) == len(new), (len(legacy), len(new))
+    for old, day in zip(legacy, new):
+        got = (day.date, day.avg_temp, day.avg_feels, day.min_temp, day.max_temp,
+               day.avg_wind, day.avg_hum, day.avg_press, day.description)
+        for a, b in zip(old, got):
+            if isinstance(a, float):
+                assert math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9), (old, got)
+            else:
+                assert a == b, (old, got)
+
+
+def best_time(fn, payload, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(payload)
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prognoosi koondamise mikrovõrdlus")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[40, 2920, 14600, 58400],
+                        help="Kirjete arvud (40 = üks tavaline vastus, 2920 = üks aasta)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'kirjeid':>9} {'päevi':>6} {'tsükkel ms':>11} {'uus ms':>10} {'kiirendus':>10}")
+    for n in args.sizes:
+        payload = synthetic_payload(n)
+        check_equal(payload)
+        t_old = best_time(legacy_summarize, payload, args.repeat)
+        t_new = best_time(summarize_forecast, payload, args.repeat)
+        days = len(summarize_forecast(payload).days)
+        print(f"{n:>9} {days:>6} {t_old * 1000:>11.2f} {t_new * 1000:>10.2f} {t_old / t_new:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""bench_multi_city.py
+Võrdleb mitme linna ilma küsimist järjest (get_weather linna kaupa, nagu LLM
+seni tegi) ühe get_weather_multi / get_weather_forecast_multi kutsega.
+
+Käivitab kohaliku OpenWeather asendusserveri etteantud viivitusega. Iga mõõtmine
+kasutab eri linnu (Testlinn0001...), et vahemälud oleksid külmad. LLM-i ring
+linnade vahel pole siin sees: järjestikune variant on selle võrra veel aeglasem.
+
+Kasutus:
+  python benchmarks/bench_multi_city.py
+  python benchmarks/bench_multi_city.py --cities 5 --delay 0.3 --lang en
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_openweather import FakeOpenWeather  # noqa: E402
+
+
+async def main_async(args) -> int:
+    server = FakeOpenWeather(latency_ms=args.delay * 1000)
+    os.environ["OPENWEATHER_BASE_URL"] = await server.start()
+    os.environ.setdefault("OPENWEATHER_API_KEY", "test")
+    os.environ["WEATHER_CACHE_DIR"] = tempfile.mkdtemp(prefix="weather-multi-")
+    # Ainult samaaegsus, mitte kiiruspiirang
+    os.environ.setdefault("OPENWEATHER_RATE_PER_MIN", "100000")
+
+    from weather_client import get_client
+    from weather_tools import tools_for
+
+    get_weather, get_weather_forecast, get_weather_multi, get_weather_forecast_multi = tools_for(args.lang)[:4]
+    batches = iter(range(0, 10000, args.cities))
+
+    def cities() -> list:
+        start = next(batches)
+        return [f"Testlinn{i:04d}" for i in range(start + 1, start + args.cities + 1)]
+
+    async def sequential_current():
+        return [await get_weather(city) for city in cities()]
+
+    async def sequential_forecast():
+        return [await get_weather_forecast(city, days=3) for city in cities()]
+
+    runs = [
+        ("get_weather järjest", sequential_current),
+        ("get_weather_multi", lambda: get_weather_multi(cities())),
+        ("get_weather_forecast järjest", sequential_forecast),
+        ("get_weather_forecast_multi", lambda: get_weather_forecast_multi(cities(), days=3)),
+    ]
+    print(f"{args.cities} linna, viivitus {args.delay * 1000:.0f} ms päringu kohta")
+    for name, run in runs:
+        server.requests.clear()
+        t0 = time.perf_counter()
+        await run()
+        elapsed = time.perf_counter() - t0
+        print(f"  {name:30s} {elapsed * 1000:7.0f} ms  päringuid: {sum(server.requests.values())}")
+
+    if args.show:
+        print(await get_weather_multi(["Tallinn", "Tartu", "Pärnu"]))
+
+    await get_client().aclose()
+    await server.stop()
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mitme linna tööriistade võrdlus järjestikuste kutsetega")
+    parser.add_argument("--cities", type=int, default=3, help="Linnade arv ühes küsimuses")
+    parser.add_argument("--delay", type=float, default=0.2, help="Asendusserveri viivitus päringu kohta (s)")
+    parser.add_argument("--lang", default="et", help="Tööriistade keel (locales.py)")
+    parser.add_argument("--show", action="store_true", help="Näita koondteksti näidet (Tallinn, Tartu, Pärnu)")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
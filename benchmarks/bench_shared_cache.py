@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""bench_shared_cache.py
+Mõõdab ühise SQLite vahemälu (shared_cache.py) päringu hinda, kui seda
+kasutab samaaegselt mitu protsessi (nagu LiveKit tööprotsessid ühel masinal).
+
+Iga protsess teeb --ops operatsiooni juhuslike võtmetega: enamik lugemisi,
+--write-ratio osa kirjutusi. Raporteeritakse lugemise ja kirjutuse p50/p99
+ning koguläbilaskevõime protsesside arvu kaupa. Võrdluseks on protsessi mälus
+oleva sõnastiku lugemine.
+
+Kasutus:
+  python benchmarks/bench_shared_cache.py
+  python benchmarks/bench_shared_cache.py --processes 1 4 16 --ops 5000 --payload forecast
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing as mp
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_openweather import forecast_payload, weather_payload  # noqa: E402
+from shared_cache import SharedCache  # noqa: E402
+
+RETENTION = 3600.0
+
+
+def make_payload(kind: str, i: int) -> dict:
+    lat, lon = 55 + (i % 97) * 0.07, 20 + (i % 89) * 0.11
+    return forecast_payload(lat, lon) if kind == "forecast" else weather_payload(lat, lon)
+
+
+def key_of(i: int) -> str:
+    return json.dumps([round(55 + (i % 97) * 0.07, 2), round(20 + i * 0.001, 3), "et"])
+
+
+def worker(path: str, args: dict, seed: int, barrier, out) -> None:
+    cache = SharedCache(Path(path))
+    rng = random.Random(seed)
+    payloads = [make_payload(args["payload"], i) for i in range(16)]
+    reads, writes = [], []
+    cache.get("weather", key_of(0))  # ühenduse avamine ei lähe mõõtmisse
+    barrier.wait()
+    t_start = time.perf_counter()
+    for _ in range(args["ops"]):
+        i = rng.randrange(args["keys"])
+        if rng.random() < args["write_ratio"]:
+            t0 = time.perf_counter_ns()
+            cache.put("weather", key_of(i), payloads[i % len(payloads)], RETENTION)
+            writes.append(time.perf_counter_ns() - t0)
+        else:
+            t0 = time.perf_counter_ns()
+            cache.get("weather", key_of(i))
+            reads.append(time.perf_counter_ns() - t0)
+    out.put((reads, writes, time.perf_counter() - t_start))
+
+
+def run_level(path: str, processes: int, args: argparse.Namespace) -> dict:
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(processes)
+    out = ctx.Queue()
+    params = {"ops": args.ops, "keys": args.keys, "write_ratio": args.write_ratio, "payload": args.payload}
+    procs = [ctx.Process(target=worker, args=(path, params, args.seed + p, barrier, out)) for p in range(processes)]
+    for p in procs:
+        p.start()
+    results = [out.get() for _ in procs]
+    for p in procs:
+        p.join()
+    reads = np.concatenate([np.asarray(r[0], dtype=np.float64) for r in results]) / 1000
+    writes = np.concatenate([np.asarray(r[1], dtype=np.float64) for r in results]) / 1000
+    wall = max(r[2] for r in results)
+
+    def pct(a: np.ndarray, q: float) -> float:
+        return float(np.percentile(a, q)) if len(a) else 0.0
+
+    return {
+        "processes": processes,
+        "ops_per_s": processes * args.ops / wall,
+        "get_p50_us": pct(reads, 50),
+        "get_p99_us": pct(reads, 99),
+        "put_p50_us": pct(writes, 50),
+        "put_p99_us": pct(writes, 99),
+    }
+
+
+def memory_baseline(args: argparse.Namespace) -> float:
+    """Protsessi mälus oleva sõnastiku lugemine (L1), mikrosekundites."""
+    table = {key_of(i): make_payload(args.payload, i) for i in range(args.keys)}
+    rng = random.Random(args.seed)
+    keys = [key_of(rng.randrange(args.keys)) for _ in range(args.ops)]
+    t0 = time.perf_counter_ns()
+    for k in keys:
+        table.get(k)
+    return (time.perf_counter_ns() - t0) / len(keys) / 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ühise SQLite vahemälu mitmeprotsessiline mõõtmine")
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--ops", type=int, default=20000, help="Operatsioone protsessi kohta")
+    parser.add_argument("--keys", type=int, default=500, help="Erinevate võtmete arv")
+    parser.add_argument("--write-ratio", type=float, default=0.05)
+    parser.add_argument("--payload", choices=["weather", "forecast"], default="weather",
+                        help="weather ~0,3 kB, forecast (40 kirjet) ~8 kB")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="shared-cache-bench-") as tmp:
+        path = str(Path(tmp) / "shared.sqlite3")
+        cache = SharedCache(Path(path), max_entries=args.keys * 2)
+        for i in range(args.keys):
+            cache.put("weather", key_of(i), make_payload(args.payload, i), RETENTION)
+        size = len(json.dumps(make_payload(args.payload, 0)))
+        print(f"Võtmeid {args.keys}, väärtus ~{size / 1000:.1f} kB, kirjutusi {args.write_ratio:.0%}")
+        print(f"Protsessi mälu (dict) lugemine: {memory_baseline(args):.2f} µs\n")
+        print(f"{'protsesse':>9} {'op/s':>10} {'get p50 µs':>11} {'get p99 µs':>11} {'put p50 µs':>11} {'put p99 µs':>11}")
+        for n in args.processes:
+            r = run_level(path, n, args)
+            print(f"{r['processes']:>9} {r['ops_per_s']:>10.0f} {r['get_p50_us']:>11.1f} {r['get_p99_us']:>11.1f} "
+                  f"{r['put_p50_us']:>11.1f} {r['put_p99_us']:>11.1f}")
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""fake_openweather.py
+Kohalik OpenWeather asendusserver koormus- ja reageerivustestide jaoks.
+
+Teenindab /geo/1.0/direct, /data/2.5/weather ja /data/2.5/forecast vastuseid
+fikstuuridest (sama kuju nagu päris API), lisab soovi korral viivituse ja
+juhuslikke HTTP vigu ning loendab päringuid endpointi kaupa.
+
+Kasutus (eraldi protsessina):
+  python benchmarks/fake_openweather.py --port 8081 --latency-ms 150 --error-rate 0.05
+  OPENWEATHER_BASE_URL=http://127.0.0.1:8081 python debug_weather.py
+
+Teegina:
+  server = FakeOpenWeather(latency_ms=100)
+  base_url = await server.start()
+  ...
+  await server.stop()
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import math
+import random
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+GEO_PATH = "/geo/1.0/direct"
+WEATHER_PATH = "/data/2.5/weather"
+FORECAST_PATH = "/data/2.5/forecast"
+
+# nimi -> (lat, lon, riik, ajavööndi nihe sekundites)
+CITIES: Dict[str, tuple] = {
+    "Tallinn": (59.437, 24.7536, "EE", 10800),
+    "Tartu": (58.378, 26.729, "EE", 10800),
+    "Pärnu": (58.3859, 24.4971, "EE", 10800),
+    "Narva": (59.3797, 28.1791, "EE", 10800),
+    "Paide": (58.8856, 25.5572, "EE", 10800),
+    "Kuressaare": (58.2529, 22.4853, "EE", 10800),
+    "Viljandi": (58.3639, 25.59, "EE", 10800),
+    "Rakvere": (59.3464, 26.3558, "EE", 10800),
+    "Riga": (56.9496, 24.1052, "LV", 10800),
+    "Helsinki": (60.1699, 24.9384, "FI", 10800),
+    "Stockholm": (59.3293, 18.0686, "SE", 7200),
+    "Berlin": (52.52, 13.405, "DE", 7200),
+    "London": (51.5072, -0.1276, "GB", 3600),
+    "Paris": (48.8566, 2.3522, "FR", 7200),
+    "New York": (40.7128, -74.006, "US", -14400),
+}
+
+DESCRIPTIONS = ["selge taevas", "vähene pilvisus", "pilves", "kerge vihm", "vihm", "lumi", "udu"]
+FORECAST_STEP = 10800
+
+
+def forecast_start(now: Optional[float] = None) -> int:
+    """Prognoosi esimese kirje aeg: praegune 3h UTC vahemik, nagu päris API-l.
+
+    Tööriistad valivad päevad linna kohaliku kuupäeva järgi, seega peab
+    prognoos algama praegusest hetkest, mitte fikseeritud kuupäevast.
+    """
+    now = time.time() if now is None else now
+    return int(now) // FORECAST_STEP * FORECAST_STEP
+
+
+def synthetic_city(index: int) -> str:
+    """Lisalinnad koormustestideks, et vahemälu ei kataks kõiki päringuid."""
+    return f"Testlinn{index:04d}"
+
+
+def _lookup(query: str) -> Optional[Dict[str, Any]]:
+    name = query.split(",")[0].strip()
+    for city, (lat, lon, country, _tz) in CITIES.items():
+        if city.casefold() == name.casefold():
+            return {"name": city, "lat": lat, "lon": lon, "country": country}
+    if name.casefold().startswith("testlinn") and name[8:].isdigit():
+        i = int(name[8:])
+        return {"name": synthetic_city(i), "lat": round(55 + (i % 97) * 0.07, 4),
+                "lon": round(20 + (i % 89) * 0.11, 4), "country": "EE"}
+    return None
+
+
+def _timezone(lat: float, lon: float) -> int:
+    for c_lat, c_lon, _country, tz in CITIES.values():
+        if math.isclose(c_lat, lat, abs_tol=1e-3) and math.isclose(c_lon, lon, abs_tol=1e-3):
+            return tz
+    return 10800
+
+
+def weather_payload(lat: float, lon: float) -> Dict[str, Any]:
+    base = 15 - (lat - 40) * 0.8 + math.sin(lon) * 2
+    return {
+        "coord": {"lat": lat, "lon": lon},
+        "weather": [{"description": DESCRIPTIONS[int(abs(lat * 10 + lon)) % len(DESCRIPTIONS)]}],
+        "main": {
+            "temp": round(base, 2),
+            "feels_like": round(base - 2.5, 2),
+            "humidity": 60 + int(abs(lon * 7)) % 40,
+            "pressure": 995 + int(abs(lat * 3)) % 30,
+        },
+        "wind": {"speed": round(2 + abs(math.cos(lat)) * 6, 2)},
+    }
+
+
+def forecast_payload(lat: float, lon: float, entries: int = 40, start: Optional[int] = None) -> Dict[str, Any]:
+    base = weather_payload(lat, lon)["main"]["temp"]
+    start = forecast_start() if start is None else start
+    items = []
+    for i in range(entries):
+        t = base + 4 * math.sin(i / 8 * 2 * math.pi)
+        items.append({
+            "dt": start + i * FORECAST_STEP,
+            "main": {"temp": round(t, 2), "temp_min": round(t - 0.8, 2), "temp_max": round(t + 0.8, 2),
+                     "feels_like": round(t - 2, 2), "humidity": 70 + i % 20, "pressure": 1005 + i % 10},
+            "wind": {"speed": round(3 + (i % 5) * 0.7, 2)},
+            "weather": [{"description": DESCRIPTIONS[(i // 4) % len(DESCRIPTIONS)]}],
+        })
+    return {"city": {"timezone": _timezone(lat, lon)}, "list": items}
+
+
+class FakeOpenWeather:
+    def __init__(
+        self,
+        *,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        seed: int = 1,
+    ) -> None:
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.requests: Counter = Counter()
+        self.errors: Counter = Counter()
+        self._rng = random.Random(seed)
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url = ""
+
+    def reset_counters(self) -> None:
+        self.requests.clear()
+        self.errors.clear()
+
+    async def _delay_or_fail(self, endpoint: str) -> Optional[web.Response]:
+        self.requests[endpoint] += 1
+        delay = self.latency_ms + (self._rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if self.error_rate and self._rng.random() < self.error_rate:
+            self.errors[endpoint] += 1
+            return web.json_response({"cod": self.error_status, "message": "injected error"}, status=self.error_status)
+        return None
+
+    async def _geo(self, request: web.Request) -> web.Response:
+        failed = await self._delay_or_fail("geo")
+        if failed is not None:
+            return failed
+        place = _lookup(request.query.get("q", ""))
+        return web.json_response([place] if place else [])
+
+    async def _weather(self, request: web.Request) -> web.Response:
+        failed = await self._delay_or_fail("weather")
+        if failed is not None:
+            return failed
+        lat, lon = float(request.query["lat"]), float(request.query["lon"])
+        return web.json_response(weather_payload(lat, lon))
+
+    async def _forecast(self, request: web.Request) -> web.Response:
+        failed = await self._delay_or_fail("forecast")
+        if failed is not None:
+            return failed
+        lat, lon = float(request.query["lat"]), float(request.query["lon"])
+        return web.json_response(forecast_payload(lat, lon))
+
+    async def _root(self, request: web.Request) -> web.Response:
+        # weather_client.warmup() teeb HEAD päringu juuraadressile
+        return web.Response(text="fake-openweather")
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get(GEO_PATH, self._geo)
+        app.router.add_get(WEATHER_PATH, self._weather)
+        app.router.add_get(FORECAST_PATH, self._forecast)
+        app.router.add_get("/", self._root)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._runner = web.AppRunner(self.build_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+        self.base_url = f"http://{host}:{bound_port}"
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+def known_cities() -> List[str]:
+    return list(CITIES)
+
+
+async def serve_forever(args) -> None:
+    server = FakeOpenWeather(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed,
+    )
+    base_url = await server.start(args.host, args.port)
+    print(f"Asendusserver: {base_url} (OPENWEATHER_BASE_URL={base_url})")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        print(f"Päringuid: {dict(server.requests)}, vigu: {dict(server.errors)}")
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kohalik OpenWeather asendusserver")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Viivitus päringu kohta")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Viivituse juhuslik kõikumine +/-")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Vigaste vastuste osakaal 0..1")
+    parser.add_argument("--error-status", type=int, default=500, help="Vigase vastuse HTTP kood (nt 429, 500)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve_forever(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""load_test.py
+Ilmatööriistade koormustest kohaliku OpenWeather asendusserveri vastu.
+
+N samaaegset "helistajat" kutsuvad get_weather ja get_weather_forecast
+tööriistu (segu --forecast-share järgi). Iga samaaegsuse taseme kohta
+raporteeritakse p50/p95/p99 latentsus, läbilaskevõime, vead ja ülesvoolu
+päringute arv. Tulemuse saab salvestada JSON-ina (--json) ja võrrelda
+varasema commit'i tulemusega (--compare); regressiooni korral väljumiskood 1.
+
+Kasutus:
+  python benchmarks/load_test.py
+  python benchmarks/load_test.py --concurrency 1 8 32 --requests 400 --latency-ms 120 --json base.json
+  python benchmarks/load_test.py --cache cold --error-rate 0.05 --compare base.json --tolerance 15
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_openweather import FakeOpenWeather, known_cities, synthetic_city  # noqa: E402
+
+from locales import LOCALES  # noqa: E402
+from weather_tools import tools_for  # noqa: E402
+
+COMPARED = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Lineaarse interpolatsiooniga protsentiil sorteeritud loendist."""
+    if not sorted_values:
+        return 0.0
+    pos = (len(sorted_values) - 1) * pct / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def git_revision() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+
+def reset_caches(client, mode: str, level: int) -> None:
+    """Iga tase algab tühja vahemäluga, et tasemed oleksid omavahel võrreldavad."""
+    from shared_cache import SharedCache
+    from weather_cache import GeocodeCache, PayloadMemo, WeatherCache, cache_dir
+    from weather_client import STALE_MAX_AGE
+
+    client.shared_cache = SharedCache(cache_dir() / f"shared-{level}.sqlite3")
+    client.geocode_cache = GeocodeCache(client.shared_cache)
+    client.weather_cache = WeatherCache(shared=client.shared_cache, retention=STALE_MAX_AGE)
+    client.forecast_memo = PayloadMemo(client.weather_cache.max_entries)
+    if mode == "cold":
+        # Iga kutse läheb ülesvoolu; samaaegsed samad päringud jagavad siiski üht
+        client.geocode_cache.ttl = 0
+        client.weather_cache.ttls = {endpoint: 0.0 for endpoint in client.weather_cache.ttls}
+
+
+async def run_level(lang: str, server: FakeOpenWeather, cities: List[str], concurrency: int, args) -> Dict[str, Any]:
+    rng = random.Random(args.seed + concurrency)
+    plan = [
+        ("forecast" if rng.random() < args.forecast_share else "weather", rng.choice(cities))
+        for _ in range(args.requests)
+    ]
+    latencies: Dict[str, List[float]] = {"weather": [], "forecast": []}
+    # Tööriistad tagastavad vea korral teksti; veateated ja "andmed puuduvad" loetakse ebaõnnestunud kutseks
+    pack = LOCALES[lang]
+    get_weather, get_weather_forecast = tools_for(lang)[:2]
+    errors = 0
+    next_index = 0
+
+    async def caller() -> None:
+        nonlocal next_index, errors
+        while next_index < len(plan):
+            tool, city = plan[next_index]
+            next_index += 1
+            t0 = time.perf_counter()
+            if tool == "forecast":
+                result = await get_weather_forecast(city, days=3)
+            else:
+                result = await get_weather(city)
+            latencies[tool].append(time.perf_counter() - t0)
+            if pack.is_failure(result):
+                errors += 1
+
+    server.reset_counters()
+    t0 = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(concurrency)))
+    wall = time.perf_counter() - t0
+
+    all_ms = sorted(v * 1000 for values in latencies.values() for v in values)
+    result: Dict[str, Any] = {
+        "concurrency": concurrency,
+        "calls": len(all_ms),
+        "errors": errors,
+        "wall_s": round(wall, 4),
+        "throughput_rps": round(len(all_ms) / wall, 2) if wall else 0.0,
+        "p50_ms": round(percentile(all_ms, 50), 3),
+        "p95_ms": round(percentile(all_ms, 95), 3),
+        "p99_ms": round(percentile(all_ms, 99), 3),
+        "max_ms": round(all_ms[-1], 3) if all_ms else 0.0,
+        "upstream_requests": dict(server.requests),
+    }
+    for tool, values in latencies.items():
+        ms = sorted(v * 1000 for v in values)
+        result[tool] = {"calls": len(ms), "p50_ms": round(percentile(ms, 50), 3), "p99_ms": round(percentile(ms, 99), 3)}
+    return result
+
+
+def print_report(results: List[Dict[str, Any]]) -> None:
+    print(f"{'N':>4} {'kutseid':>8} {'vigu':>5} {'kutset/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}  ülesvool")
+    for r in results:
+        print(f"{r['concurrency']:>4} {r['calls']:>8} {r['errors']:>5} {r['throughput_rps']:>9.1f} "
+              f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['max_ms']:>9.2f}  {r['upstream_requests']}")
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str, tolerance: float, min_delta_ms: float) -> bool:
+    baseline = json.loads(Path(baseline_path).read_text(encoding="utf-8"))
+    by_level = {r["concurrency"]: r for r in baseline["results"]}
+    print(f"\nVõrdlus: {baseline['meta'].get('revision', '?')} -> praegune (lubatud halvenemine {tolerance:g}%)")
+    ok = True
+    for r in results:
+        base = by_level.get(r["concurrency"])
+        if base is None:
+            continue
+        cells = []
+        for metric in COMPARED + ("throughput_rps",):
+            old, new = base[metric], r[metric]
+            delta = (new - old) / old * 100 if old else 0.0
+            # Latentsuse puhul on kasv halb, läbilaskevõime puhul langus
+            worse = delta if metric in COMPARED else -delta
+            # Alla millisekundi latentsused (vahemälu tabamused) kõiguvad suhteliselt palju
+            noise = metric in COMPARED and abs(new - old) < min_delta_ms
+            flag = ""
+            if worse > tolerance and not noise:
+                flag = " !"
+                ok = False
+            cells.append(f"{metric} {old:.1f}->{new:.1f} ({delta:+.1f}%){flag}")
+        print(f"  N={r['concurrency']}: " + ", ".join(cells))
+    return ok
+
+
+async def main_async(args) -> int:
+    server = FakeOpenWeather(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                             error_rate=args.error_rate, error_status=args.error_status, seed=args.seed)
+    base_url = await server.start()
+    os.environ["OPENWEATHER_BASE_URL"] = base_url
+    os.environ.setdefault("OPENWEATHER_API_KEY", "test")
+    # Geokodeerimise kettavahemälu ajutisse kataloogi, et test ei mõjutaks .cache/ sisu
+    os.environ["WEATHER_CACHE_DIR"] = tempfile.mkdtemp(prefix="weather-load-")
+    os.environ["OPENWEATHER_RATE_PER_MIN"] = str(args.rate_per_min)
+
+    from weather_client import get_client
+    client = get_client()
+
+    cities = known_cities() + [synthetic_city(i) for i in range(max(0, args.cities - len(known_cities())))]
+    cities = cities[:args.cities]
+
+    results = []
+    try:
+        for concurrency in args.concurrency:
+            reset_caches(client, args.cache, concurrency)
+            results.append(await run_level(args.lang, server, cities, concurrency, args))
+    finally:
+        await client.aclose()
+        await server.stop()
+
+    print_report(results)
+    if args.json:
+        meta = {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "args": {k: v for k, v in vars(args).items() if k not in ("json", "compare")},
+        }
+        Path(args.json).write_text(json.dumps({"meta": meta, "results": results}, indent=2), encoding="utf-8")
+        print(f"\nTulemused salvestatud: {args.json}")
+    if args.compare and not compare(results, args.compare, args.tolerance, args.min_delta_ms):
+        print("[VIGA] Latentsus või läbilaskevõime halvenes üle lubatud piiri")
+        return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ilmatööriistade koormustest kohaliku asendusserveriga")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32], help="Samaaegsete helistajate arvud")
+    parser.add_argument("--requests", type=int, default=200, help="Tööriistakutseid taseme kohta")
+    parser.add_argument("--forecast-share", type=float, default=0.5, help="get_weather_forecast kutsete osakaal")
+    parser.add_argument("--cities", type=int, default=15, help="Erinevate linnade arv (üle 15 lisatakse sünteetilised)")
+    parser.add_argument("--cache", choices=["warm", "cold"], default="warm",
+                        help="warm = tavaline vahemälu, cold = iga kutse läheb ülesvoolu")
+    parser.add_argument("--lang", choices=sorted(LOCALES), default="et")
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="Asendusserveri viivitus")
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--rate-per-min", type=float, default=1_000_000,
+                        help="Kliendi päringulimiit (vaikimisi sisuliselt piiramata; 60 = tasuta pakett)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="Salvesta tulemused JSON faili")
+    parser.add_argument("--compare", help="Varasem JSON tulemus, millega võrrelda")
+    parser.add_argument("--tolerance", type=float, default=10.0, help="Lubatud halvenemine protsentides")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0,
+                        help="Latentsuse muutus alla selle ei loe regressiooniks")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""replay.py
+Salvestatud kõnede taasesitus kogu AgentSession torust läbi (jõudluse regressioonitest).
+
+Salvestis (session_recorder.py, SESSION_RECORD_DIR) sisaldab helistaja heli ja
+sündmusi. Taasesitusel läheb heli päris silero.VAD-i ja agendi koodi (Assistant,
+kiirtee, ennetus, tööriistad) kaudu; STT, LLM, TTS ja OpenWeather on
+deterministlikud kohalikud asendused (replay_standins.py, fake_openweather.py),
+seega ei vaja test võrku ega API võtmeid. Iga vooru kohta raporteeritakse
+latentsus (kõne lõpust esimese helini, TurnTracer), LLM-ile saadetud
+sisendtokenid (context_budget.py) ja protsessi CPU aeg.
+
+Salvestisi saab ka sünteesida (häälelaadne signaal + transkriptsioonid), et
+testikomplekt oleks olemas ka ilma päris kõnedeta.
+
+Kasutus:
+  python benchmarks/replay.py synth --lang et --out recordings/et-basic.lkrec
+  python benchmarks/replay.py synth --lang en --out recordings/en-basic.lkrec
+  python benchmarks/replay.py synth --lang et --repeat 4 --out recordings/et-long.lkrec
+  python benchmarks/replay.py run recordings/ --json base.json
+  # pärast muudatust: väljumiskood 1, kui latentsus või CPU halvenes üle --tolerance protsendi
+  python benchmarks/replay.py run recordings/ --compare base.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_openweather import FakeOpenWeather  # noqa: E402
+from load_test import git_revision, percentile  # noqa: E402
+
+from session_recorder import AUDIO, EVENT, SessionRecorder, read_recording  # noqa: E402
+
+from livekit import rtc  # noqa: E402
+
+COMPARED = ("ttfa_p50_ms", "ttfa_p95_ms", "cpu_per_audio_s", "prompt_tokens_max")
+
+SCRIPTS = {
+    "et": [
+        "Mis ilm on Tartus?",
+        "Aga homme Pärnus?",
+        "Kuidas on ilm Tallinnas, Tartus ja Narvas?",
+        "Räägi mulle midagi toredat.",
+        "Aitäh, head aega!",
+    ],
+    "en": [
+        "What's the weather in London?",
+        "And the forecast for Paris tomorrow?",
+        "Compare the weather in Berlin, Riga and Helsinki.",
+        "Tell me something nice.",
+        "Thanks, goodbye!",
+    ],
+}
+
+
+# ---------------------------------------------------------------- süntees
+
+def voiced(seconds: float, rate: int, f0: float = 140.0, seed: int = 0) -> np.ndarray:
+    """Häälelaadne signaal (põhitoon + formandid, silbid ~4 Hz), mida VAD tunneb kõnena."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * rate)) / rate
+    phase = 2 * np.pi * np.cumsum(f0 * (1 + 0.08 * np.sin(2 * np.pi * 0.7 * t))) / rate
+    vowels = [(700, 1200), (400, 2000), (300, 800), (500, 1700)]
+    syllable = (t * 4).astype(int) % len(vowels)
+    signal = np.zeros(len(t))
+    for k in range(1, 30):
+        amp = np.zeros(len(t))
+        for i, (f1, f2) in enumerate(vowels):
+            a = np.exp(-((k * f0 - f1) / 150) ** 2) + 0.6 * np.exp(-((k * f0 - f2) / 200) ** 2) + 0.05
+            amp += np.where(syllable == i, a, 0.0)
+        signal += amp * np.sin(k * phase)
+    signal += 0.02 * rng.standard_normal(len(t))
+    return (signal / np.max(np.abs(signal)) * 0.5 * 32767).astype(np.int16)
+
+
+def synthesize(lang: str, out: Path, rate: int, gap_s: float, chars_per_s: float, repeat: int = 1) -> None:
+    recorder = SessionRecorder(out, {"locale": lang, "room": out.stem, "synthetic": True})
+    frame_len = int(rate * 0.02)
+    audio = [np.zeros(int(rate * 4.0), dtype=np.int16)]  # tervitus
+    t = 4.0
+    script = SCRIPTS[lang][:-1] * repeat + SCRIPTS[lang][-1:]  # hüvastijätt ainult lõpus
+    for i, text in enumerate(script):
+        speech = voiced(max(len(text) / chars_per_s, 1.0), rate, f0=120 + 15 * (i % 3), seed=i)
+        audio.append(speech)
+        t += len(speech) / rate
+        recorder.event("transcript", at=t + 0.3, text=text, final=True, language=lang)
+        audio.append(np.zeros(int(rate * gap_s), dtype=np.int16))
+        t += gap_s
+    pcm = np.concatenate(audio)
+    for n, start in enumerate(range(0, len(pcm) - frame_len + 1, frame_len)):
+        chunk = pcm[start:start + frame_len]
+        recorder.audio(rtc.AudioFrame(chunk.tobytes(), rate, 1, frame_len), at=n * 0.02)
+    recorder._close()
+    print(f"{out}: {len(pcm) / rate:.1f} s, {len(script)} lauset, {out.stat().st_size / 1024:.0f} kB")
+
+
+# ---------------------------------------------------------------- taasesitus
+
+def recordings(paths: List[str]) -> List[Path]:
+    found: List[Path] = []
+    for p in map(Path, paths):
+        found.extend(sorted(p.glob("*.lkrec")) if p.is_dir() else [p])
+    return found
+
+
+async def replay_one(path: Path, vad, args) -> Dict[str, Any]:
+    from livekit.agents import AgentSession
+
+    from agent import Assistant
+    from locales import get_locale
+    from prefetch import Prefetcher
+    from replay_standins import ReplayAudioInput, ReplayAudioOutput, ReplayLLM, ReplaySTT, ReplayTTS
+    from telemetry import TurnTracer
+
+    frames, transcripts, meta = [], [], {}
+    for record in read_recording(path):
+        if record.kind == AUDIO:
+            frames.append((record.t, record.frame))
+        elif record.kind == EVENT:
+            ev = record.event
+            if ev["type"] == "meta":
+                meta = ev
+            elif ev["type"] == "transcript" and ev.get("final") and ev.get("text"):
+                transcripts.append((record.t, ev["text"]))
+    pack = get_locale(args.lang or meta.get("locale", "et"))
+
+    audio_in = ReplayAudioInput(frames)
+    session = AgentSession(
+        vad=vad,
+        stt=ReplaySTT(transcripts, audio_in, pack.code, delay_s=args.stt_ms / 1000, slack_s=args.stt_slack_s),
+        llm=ReplayLLM(pack.code, ttft_s=args.llm_ms / 1000),
+        tts=ReplayTTS(ttfb_s=args.tts_ms / 1000),
+    )
+    session.input.audio = audio_in
+    session.output.audio = ReplayAudioOutput()
+
+    turns: List[Dict[str, Any]] = []
+    cpu_start = last_cpu = time.process_time()
+
+    def on_turn(record: Dict[str, Any]) -> None:
+        nonlocal last_cpu
+        now = time.process_time()
+        record["cpu_ms"] = round((now - last_cpu) * 1000, 1)
+        last_cpu = now
+        turns.append(record)
+
+    # Sama järjestus nagu agent.entrypoint
+    tracer = TurnTracer(on_turn=on_turn)
+    tracer.activate()
+    tracer.attach(session)
+    prefetcher = Prefetcher(pack)
+    prefetcher.activate()
+    prefetcher.attach(session)
+
+    wall_start = time.perf_counter()
+    await session.start(agent=Assistant(pack))
+    session.say(pack.greetings[0])
+    await audio_in.done.wait()
+    await session.aclose()
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    ttfa = sorted((t["first_audio"] - t["end_of_speech"]) * 1000 for t in turns if t.get("first_audio"))
+    prompt = [t["prompt_tokens"] for t in turns if t["llm_calls"]]
+    return {
+        "recording": path.name,
+        "locale": pack.code,
+        "audio_s": round(audio_in.duration, 1),
+        "turns": len(turns),
+        "fast_turns": sum(1 for t in turns if t["path"] == "fast"),
+        "transcripts": len(transcripts),
+        "ttfa_p50_ms": round(percentile(ttfa, 50), 1),
+        "ttfa_p95_ms": round(percentile(ttfa, 95), 1),
+        "ttfa_max_ms": round(max(ttfa), 1) if ttfa else 0.0,
+        "prompt_tokens_mean": round(sum(prompt) / len(prompt)) if prompt else 0,
+        "prompt_tokens_max": max(prompt, default=0),
+        "cpu_s": round(cpu, 2),
+        "wall_s": round(wall, 1),
+        "cpu_per_audio_s": round(cpu / audio_in.duration, 4) if audio_in.duration else 0.0,
+        "prefetch": prefetcher.stats(),
+        "per_turn": [
+            {
+                "turn": t["turn"],
+                "path": t["path"],
+                "transcript": t["transcript"],
+                "ttfa_ms": round((t["first_audio"] - t["end_of_speech"]) * 1000, 1) if t.get("first_audio") else None,
+                "tools": [s["stage"] for s in t["tools"]],
+                "prompt_tokens": t["prompt_tokens"],
+                "compacted": t["context_compacted"],
+                "cpu_ms": t["cpu_ms"],
+            }
+            for t in turns
+        ],
+    }
+
+
+def print_report(results: List[Dict[str, Any]]) -> None:
+    for r in results:
+        print(f"\n{r['recording']} ({r['locale']}, {r['audio_s']} s heli)")
+        for t in r["per_turn"]:
+            ttfa = f"{t['ttfa_ms']:7.0f}" if t["ttfa_ms"] is not None else "      -"
+            print(f"  {t['turn']:>3} {t['path']:>4} {ttfa} ms  cpu {t['cpu_ms']:7.1f} ms  "
+                  f"tok {t['prompt_tokens']:>6}  {t['transcript'][:50]!r}")
+    print(f"\n{'salvestis':30s} {'voore':>6} {'kiir':>5} {'p50 ms':>8} {'p95 ms':>8} {'tok kesk':>9} {'tok max':>8} "
+          f"{'CPU s':>7} {'CPU/heli s':>11}")
+    for r in results:
+        print(f"{r['recording'][:30]:30s} {r['turns']:>6} {r['fast_turns']:>5} {r['ttfa_p50_ms']:>8.0f} "
+              f"{r['ttfa_p95_ms']:>8.0f} {r['prompt_tokens_mean']:>9} {r['prompt_tokens_max']:>8} "
+              f"{r['cpu_s']:>7.2f} {r['cpu_per_audio_s']:>11.4f}")
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str, tolerance: float, min_delta_ms: float) -> bool:
+    baseline = json.loads(Path(baseline_path).read_text(encoding="utf-8"))
+    by_name = {r["recording"]: r for r in baseline["results"]}
+    print(f"\nVõrdlus: {baseline['meta'].get('revision', '?')} -> praegune (lubatud halvenemine {tolerance:g}%)")
+    ok = True
+    for r in results:
+        base = by_name.get(r["recording"])
+        if base is None:
+            continue
+        cells = []
+        for metric in COMPARED:
+            if metric not in base:
+                continue
+            old, new = base[metric], r[metric]
+            delta = (new - old) / old * 100 if old else 0.0
+            noise = metric.endswith("_ms") and abs(new - old) < min_delta_ms
+            flag = ""
+            if delta > tolerance and not noise:
+                flag = " !"
+                ok = False
+            cells.append(f"{metric} {old:g}->{new:g} ({delta:+.1f}%){flag}")
+        print(f"  {r['recording']}: " + ", ".join(cells))
+    return ok
+
+
+async def run_async(args) -> int:
+    server = FakeOpenWeather(latency_ms=args.latency_ms, seed=args.seed)
+    os.environ["OPENWEATHER_BASE_URL"] = await server.start()
+    os.environ.setdefault("OPENWEATHER_API_KEY", "test")
+    os.environ["WEATHER_CACHE_DIR"] = tempfile.mkdtemp(prefix="weather-replay-")
+    os.environ["OPENWEATHER_RATE_PER_MIN"] = "1000000"
+
+    from livekit.plugins import silero
+
+    from weather_client import get_client
+
+    vad = silero.VAD.load()
+    results = []
+    try:
+        for path in recordings(args.recordings):
+            results.append(await replay_one(path, vad, args))
+    finally:
+        await get_client().aclose()
+        await server.stop()
+
+    print_report(results)
+    if args.json:
+        meta = {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "args": {k: v for k, v in vars(args).items() if k not in ("json", "compare", "func")},
+        }
+        Path(args.json).write_text(json.dumps({"meta": meta, "results": results}, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\nTulemused salvestatud: {args.json}")
+    if args.compare and not compare(results, args.compare, args.tolerance, args.min_delta_ms):
+        print("[VIGA] Latentsus või CPU halvenes üle lubatud piiri")
+        return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kõnede salvestamine ja taasesitus jõudlustestideks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    synth = sub.add_parser("synth", help="Sünteesi salvestis skriptitud lausetest")
+    synth.add_argument("--lang", choices=sorted(SCRIPTS), default="et")
+    synth.add_argument("--out", required=True, help="Väljundfail (.lkrec)")
+    synth.add_argument("--rate", type=int, default=16000, help="Helisagedus")
+    synth.add_argument("--gap-s", type=float, default=9.0, help="Vaikus pärast iga lauset (agendi vastus)")
+    synth.add_argument("--chars-per-s", type=float, default=14.0, help="Kõnetempo (lause pikkus)")
+    synth.add_argument("--repeat", type=int, default=1, help="Korda skripti (pikk kõne)")
+
+    run = sub.add_parser("run", help="Taasesita salvestised ja raporteeri latentsus ja CPU")
+    run.add_argument("recordings", nargs="+", help="Salvestised või kataloogid (*.lkrec)")
+    run.add_argument("--lang", help="Keel (vaikimisi salvestise metaandmetest)")
+    run.add_argument("--stt-ms", type=float, default=150.0, help="Asendus-STT viivitus")
+    run.add_argument("--stt-slack-s", type=float, default=1.5, help="Transkriptsiooni aja lubatud ette jõudmine")
+    run.add_argument("--llm-ms", type=float, default=350.0, help="Asendus-LLM-i esimese tokeni viivitus")
+    run.add_argument("--tts-ms", type=float, default=150.0, help="Asendus-TTS-i esimese baidi viivitus")
+    run.add_argument("--latency-ms", type=float, default=100.0, help="OpenWeather asendusserveri viivitus")
+    run.add_argument("--seed", type=int, default=1)
+    run.add_argument("--json", help="Salvesta tulemused JSON faili")
+    run.add_argument("--compare", help="Varasem JSON tulemus, millega võrrelda")
+    run.add_argument("--tolerance", type=float, default=15.0, help="Lubatud halvenemine protsentides")
+    run.add_argument("--min-delta-ms", type=float, default=20.0, help="Latentsuse muutus alla selle ei loe regressiooniks")
+    run.add_argument("-v", "--verbose", action="store_true", help="Näita agendi logi")
+
+    args = parser.parse_args()
+    if args.command == "synth":
+        out = Path(args.out)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        synthesize(args.lang, out, args.rate, args.gap_s, args.chars_per_s, args.repeat)
+        return
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    sys.exit(asyncio.run(run_async(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""replay_standins.py
+Deterministlikud kohalikud asendused salvestiste taasesitamiseks (replay.py).
+
+ReplayAudioInput   - salvestise helikaadrid salvestatud ajastusega (reaalajas),
+                     lõpus vaikus, kuni viimane voor on lõppenud
+ReplaySTT          - mitte-voogedastav STT (sessioon lisab VAD-i adapteri):
+                     tagastab salvestatud lõplikud transkriptsioonid, mille aeg
+                     on taasesituse asukohast kuni --stt-slack-s ees
+ReplayLLM          - reeglipõhine "mudel": linnad (gazetteer.py) ja
+                     prognoosisõnad (intent.py) -> tööriistakutse, tööriista
+                     tulemus -> selle algus vastuseks; fikseeritud viivitus;
+                     sisendtokenid (usage) context_budget.py hinnanguga
+ReplayTTS          - vaikus, mille pikkus sõltub teksti pikkusest; fikseeritud viivitus
+ReplayAudioOutput  - "mängib" heli reaalajas (taimeriga), ilma seadmeta
+"""
+
+from __future__ import annotations
+
+import asyncio
+import collections
+import json
+import time
+from typing import Deque, List, Optional, Tuple
+
+from livekit import rtc
+from livekit.agents import DEFAULT_API_CONNECT_OPTIONS, APIConnectOptions, llm, stt, tts, utils
+from livekit.agents.types import NOT_GIVEN, NotGivenOr
+from livekit.agents.voice import io
+
+from context_budget import context_tokens, estimate_tokens
+from gazetteer import find_cities, words
+from intent import wants_forecast
+
+NO_CITY_REPLY = {
+    "et": "Millise linna ilma soovid teada?",
+    "en": "Which city would you like the weather for?",
+}
+REPLY_CHARS = 240
+FRAME_S = 0.02
+
+
+class ReplayAudioInput(io.AudioInput):
+    def __init__(self, frames: List[Tuple[float, rtc.AudioFrame]], tail_s: float = 6.0) -> None:
+        super().__init__(label="replay")
+        self._frames = frames
+        self._tail_s = tail_s
+        self._i = 0
+        self._t0: Optional[float] = None
+        self.position = 0.0
+        self.duration = frames[-1][0] if frames else 0.0
+        self.done = asyncio.Event()
+        first = frames[0][1] if frames else None
+        self._rate = first.sample_rate if first else 16000
+        self._silence = rtc.AudioFrame(bytes(int(self._rate * FRAME_S) * 2), self._rate, 1, int(self._rate * FRAME_S))
+
+    async def __anext__(self) -> rtc.AudioFrame:
+        if self._t0 is None:
+            self._t0 = time.perf_counter()
+        if self._i < len(self._frames):
+            t, frame = self._frames[self._i]
+            self._i += 1
+        else:
+            # Vaikus pärast salvestise lõppu, et viimane vastus jõuaks lõpuni
+            t, frame = self.position + FRAME_S, self._silence
+            if t >= self.duration + self._tail_s:
+                self.done.set()
+        delay = self._t0 + t - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self.position = t
+        return frame
+
+
+class ReplaySTT(stt.STT):
+    def __init__(self, transcripts: List[Tuple[float, str]], audio: ReplayAudioInput, language: str,
+                 delay_s: float = 0.15, slack_s: float = 1.5) -> None:
+        super().__init__(capabilities=stt.STTCapabilities(streaming=False, interim_results=False))
+        self._pending: Deque[Tuple[float, str]] = collections.deque(sorted(transcripts))
+        self._audio = audio
+        self._language = language
+        self._delay_s = delay_s
+        self._slack_s = slack_s
+
+    async def _recognize_impl(self, buffer, *, language: NotGivenOr[str] = NOT_GIVEN,
+                              conn_options: APIConnectOptions) -> stt.SpeechEvent:
+        await asyncio.sleep(self._delay_s)
+        texts = []
+        # Salvestatud lõplik transkriptsioon tuli veidi pärast kõne lõppu; VAD võib lause ka tükeldada
+        while self._pending and self._pending[0][0] <= self._audio.position + self._slack_s:
+            texts.append(self._pending.popleft()[1])
+        return stt.SpeechEvent(
+            type=stt.SpeechEventType.FINAL_TRANSCRIPT,
+            alternatives=[stt.SpeechData(language=self._language, text=" ".join(texts))],
+        )
+
+
+def _decide(chat_ctx: llm.ChatContext, tool_names: List[str], lang: str) -> Tuple[str, List[llm.FunctionToolCall]]:
+    items = chat_ctx.items
+    outputs = []
+    for item in reversed(items):
+        if item.type != "function_call_output":
+            break
+        outputs.insert(0, item.output)
+    if outputs:
+        text = " ".join(outputs).replace("\n", " ")
+        return text[:REPLY_CHARS].rsplit(" ", 1)[0] + ".", []
+
+    user = next((i for i in reversed(items) if i.type == "message" and i.role == "user"), None)
+    text = (user.text_content or "") if user is not None else ""
+    cities = find_cities(text, lang)
+    if not cities:
+        return NO_CITY_REPLY.get(lang, NO_CITY_REPLY["en"]), []
+    forecast = wants_forecast(words(text), lang)
+    if len(cities) > 1:
+        name, args = ("get_weather_forecast_multi", {"cities": cities, "days": 3}) if forecast else ("get_weather_multi", {"cities": cities})
+    else:
+        name, args = ("get_weather_forecast", {"city": cities[0], "days": 3}) if forecast else ("get_weather", {"city": cities[0]})
+    if name not in tool_names:
+        return NO_CITY_REPLY.get(lang, NO_CITY_REPLY["en"]), []
+    call = llm.FunctionToolCall(name=name, arguments=json.dumps(args, ensure_ascii=False), call_id=utils.shortuuid("call_"))
+    return "", [call]
+
+
+class ReplayLLMStream(llm.LLMStream):
+    async def _run(self) -> None:
+        await asyncio.sleep(self._llm.ttft_s)
+        tool_names = [t.id for t in self._tools]
+        text, calls = _decide(self._chat_ctx, tool_names, self._llm.lang)
+        prompt = context_tokens(self._chat_ctx)
+        completion = estimate_tokens(text + "".join(c.arguments for c in calls))
+        self._event_ch.send_nowait(llm.ChatChunk(
+            id=utils.shortuuid(),
+            delta=llm.ChoiceDelta(role="assistant", content=text or None, tool_calls=calls),
+            usage=llm.CompletionUsage(completion_tokens=completion, prompt_tokens=prompt,
+                                      total_tokens=prompt + completion),
+        ))
+
+
+class ReplayLLM(llm.LLM):
+    def __init__(self, lang: str, ttft_s: float = 0.35) -> None:
+        super().__init__()
+        self.lang = lang
+        self.ttft_s = ttft_s
+
+    def chat(self, *, chat_ctx: llm.ChatContext, tools=None,
+             conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS, **kwargs) -> ReplayLLMStream:
+        return ReplayLLMStream(self, chat_ctx=chat_ctx, tools=tools or [], conn_options=conn_options)
+
+
+class ReplayChunkedStream(tts.ChunkedStream):
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        owner: ReplayTTS = self._tts
+        await asyncio.sleep(owner.ttfb_s)
+        output_emitter.initialize(request_id=utils.shortuuid(), sample_rate=owner.sample_rate,
+                                  num_channels=1, mime_type="audio/pcm")
+        samples = int(len(self._input_text) / owner.chars_per_s * owner.sample_rate)
+        output_emitter.push(bytes(samples * 2))
+        output_emitter.flush()
+
+
+class ReplayTTS(tts.TTS):
+    def __init__(self, ttfb_s: float = 0.15, chars_per_s: float = 15.0, sample_rate: int = 24000) -> None:
+        super().__init__(capabilities=tts.TTSCapabilities(streaming=False), sample_rate=sample_rate, num_channels=1)
+        self.ttfb_s = ttfb_s
+        self.chars_per_s = chars_per_s
+
+    def synthesize(self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS) -> ReplayChunkedStream:
+        return ReplayChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+
+class ReplayAudioOutput(io.AudioOutput):
+    def __init__(self) -> None:
+        super().__init__(label="replay", capabilities=io.AudioOutputCapabilities(pause=False))
+        self._end = 0.0
+        self._seg_start = 0.0
+        self._seg_open = False
+        # (taimer, algus, lõpp) iga lõpetatud, aga veel "mängiva" lõigu kohta
+        self._pending: Deque[Tuple[asyncio.TimerHandle, float, float]] = collections.deque()
+
+    async def capture_frame(self, frame: rtc.AudioFrame) -> None:
+        await super().capture_frame(frame)
+        if not self._seg_open:
+            now = time.time()
+            self._seg_open = True
+            self._end = self._seg_start = max(self._end, now)
+            self.on_playback_started(created_at=now)
+        self._end += frame.duration
+
+    def flush(self) -> None:
+        super().flush()
+        if not self._seg_open:
+            return
+        self._seg_open = False
+        start, end = self._seg_start, self._end
+        handle = asyncio.get_running_loop().call_later(max(end - time.time(), 0.0), self._finish)
+        self._pending.append((handle, start, end))
+
+    def _finish(self) -> None:
+        _handle, start, end = self._pending.popleft()
+        self.on_playback_finished(playback_position=end - start, interrupted=False)
+
+    def clear_buffer(self) -> None:
+        now = time.time()
+        while self._pending:
+            handle, start, end = self._pending.popleft()
+            handle.cancel()
+            self.on_playback_finished(playback_position=max(min(now, end) - start, 0.0), interrupted=True)
+        if self._seg_open:
+            self._seg_open = False
+            self.on_playback_finished(playback_position=max(now - self._seg_start, 0.0), interrupted=True)
+        self._end = now
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""stress_admission.py
+Koormuspõhise vastuvõtu (worker_load.py) stressitest: kas kõnede kvaliteet
+püsib, kui workerile pakutakse üha rohkem kõnesid.
+
+Iga kõne on eraldi protsess (nagu LiveKiti tööprotsess), mis töötleb 20 ms
+helikaadreid: iga kaader võtab --work-ms CPU-d (müra summutus vms) ja
+sündmustsüklis jookseb worker_load.LagMonitor. Kvaliteedi mõõt on kaadrite
+hilinemine (p95) ja üle 40 ms hilinenud kaadrite osakaal ("katkev heli").
+
+Kõned saabuvad --arrival-s vahega. Režiim "default" võtab vastu kõik pakutud
+kõned; "load-aware" küsib enne iga kõnet worker_load.WorkerLoad-ilt koormust
+ja lükkab kõne tagasi (dispatcher saadaks selle teisele workerile), kui
+koormus on LOAD_THRESHOLD või üle selle.
+
+Kasutus:
+  python benchmarks/stress_admission.py
+  python benchmarks/stress_admission.py --offered 2 4 8 16 --work-ms 6 --duration 6
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+FRAME_S = 0.02
+LATE_S = 0.04
+
+
+def _busy(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+async def _call(directory: str, duration: float, work_s: float) -> dict:
+    from worker_load import LagMonitor
+
+    monitor = LagMonitor(Path(directory))
+    monitor.start()
+    lateness = []
+    start = time.perf_counter()
+    deadline = start
+    while deadline - start < duration:
+        _busy(work_s)
+        deadline += FRAME_S
+        delay = deadline - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        lateness.append(max(time.perf_counter() - deadline, 0.0))
+    await monitor.aclose()
+    return {"frames": len(lateness), "lateness": lateness}
+
+
+def call_process(directory: str, duration: float, work_s: float, results) -> None:
+    results.put(asyncio.run(_call(directory, duration, work_s)))
+
+
+def run_step(offered: int, mode: str, args) -> dict:
+    from worker_load import LoadLimits, WorkerLoad
+
+    directory = tempfile.mkdtemp(prefix="worker-load-")
+    limits = LoadLimits(max_lag_ms=args.max_lag_ms, max_sessions=args.max_sessions, max_cpu=args.max_cpu)
+    load = WorkerLoad(limits, Path(directory))
+    # fork: kõne algab kohe (spawn imporditaks livekit igas protsessis sekundeid)
+    ctx = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn")
+    results = ctx.Queue()
+    running = []
+    rejected = 0
+    loads = []
+
+    load(SimpleNamespace(active_jobs=[]))  # käivitab CPU proovid
+    time.sleep(1.0)
+    for _ in range(offered):
+        running = [p for p in running if p.is_alive()]
+        current = load(SimpleNamespace(active_jobs=running))
+        loads.append(current)
+        if mode == "load-aware" and current >= load.threshold:
+            rejected += 1
+        else:
+            proc = ctx.Process(target=call_process, args=(directory, args.duration, args.work_ms / 1000, results))
+            proc.start()
+            running.append(proc)
+        time.sleep(args.arrival_s)
+
+    admitted = offered - rejected
+    lateness = []
+    for _ in range(admitted):
+        lateness.extend(results.get()["lateness"])
+    for proc in running:
+        proc.join()
+
+    lateness.sort()
+    p95 = lateness[int(0.95 * (len(lateness) - 1))] if lateness else 0.0
+    return {
+        "offered": offered,
+        "mode": mode,
+        "admitted": admitted,
+        "rejected": rejected,
+        "p50_ms": round(statistics.median(lateness) * 1000, 1) if lateness else 0.0,
+        "p95_ms": round(p95 * 1000, 1),
+        "late_pct": round(100 * sum(1 for x in lateness if x > LATE_S) / len(lateness), 2) if lateness else 0.0,
+        "max_load": round(max(loads), 2) if loads else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Koormuspõhise vastuvõtu stressitest")
+    parser.add_argument("--offered", type=int, nargs="+", default=[1, 2, 4, 6, 8], help="Pakutud kõnede arvud")
+    parser.add_argument("--modes", nargs="+", default=["default", "load-aware"], choices=["default", "load-aware"])
+    parser.add_argument("--work-ms", type=float, default=6.0, help="CPU aeg 20 ms kaadri kohta (ms)")
+    parser.add_argument("--duration", type=float, default=5.0, help="Kõne kestus (s)")
+    parser.add_argument("--arrival-s", type=float, default=0.5, help="Kõnede saabumise vahe (s)")
+    parser.add_argument("--max-lag-ms", type=float, default=150.0)
+    parser.add_argument("--max-sessions", type=int, default=20)
+    parser.add_argument("--max-cpu", type=float, default=0.8)
+    parser.add_argument("--json", help="Kirjuta tulemused sellesse faili")
+    args = parser.parse_args()
+
+    print(f"CPU-sid: {os.cpu_count()}, töö {args.work_ms:g} ms / {FRAME_S * 1000:.0f} ms kaader")
+    print(f"{'pakutud':>8} {'režiim':>11} {'vastu':>6} {'tagasi':>7} {'p50 ms':>7} {'p95 ms':>7} {'hilja %':>8} {'koormus':>8}")
+    rows = []
+    for offered in args.offered:
+        for mode in args.modes:
+            row = run_step(offered, mode, args)
+            rows.append(row)
+            print(f"{row['offered']:>8} {row['mode']:>11} {row['admitted']:>6} {row['rejected']:>7} "
+                  f"{row['p50_ms']:>7} {row['p95_ms']:>7} {row['late_pct']:>8} {row['max_load']:>8}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(rows, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""context_budget.py
+Vestluse konteksti tokenieelarve LLM-i päringutele.
+
+Iga tööriista tulemus (prognoos kuni viie päeva kohta) jääb vestlusesse kõne
+lõpuni, nii et pikas kõnes kasvab iga LLM-i päring voor-voorult. Enne iga
+päringut (Assistant.llm_node) tehakse päringu koopiast kompaktne versioon;
+agendi enda vestluse ajalugu jääb muutmata.
+
+  1. Viimased KEEP_TURNS kasutaja vooru jäävad täies mahus.
+  2. Vanemad tööriistatulemused asendatakse lühikokkuvõttega (weather_tools
+     jätab iga tulemuse kokkuvõtte remember_summary kaudu meelde) või, kui
+     kokkuvõtet pole, märkusega, et tulemus on eemaldatud.
+  3. Kui päring on ikka üle eelarve, jäetakse vanimad voorud tervikuna välja
+     (tööriistakutse ja selle tulemus koos); juhised jäävad alati.
+
+Tokenid on hinnang (UTF-8 baidid / 4), mitte mudeli tokeniseerija; tegelik
+sisendi suurus tuleb LLM-i mõõdikutest (telemetry.py, prompt_tokens).
+
+Keskkond:
+  CONTEXT_BUDGET      - 0 lülitab kompaktimise välja (vaikimisi sees)
+  CONTEXT_MAX_TOKENS  - päringu eelarve tokenites (vaikimisi 2500)
+  CONTEXT_KEEP_TURNS  - mitu viimast kasutaja vooru jääb täies mahus (vaikimisi 2)
+"""
+
+from __future__ import annotations
+
+import collections
+import logging
+import os
+from dataclasses import dataclass
+from typing import List, Optional
+
+from livekit.agents.llm import ChatContext
+
+logger = logging.getLogger("context-budget")
+
+MAX_TOKENS = 2500
+KEEP_TURNS = 2
+# Lühemaid tulemusi (veateated jms) ei asendata
+SMALL_OUTPUT_TOKENS = 40
+ITEM_OVERHEAD_TOKENS = 4
+MAX_SUMMARIES = 512
+
+_summaries: "collections.OrderedDict[str, str]" = collections.OrderedDict()
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text.encode("utf-8")) + 3) // 4
+
+
+def item_tokens(item) -> int:
+    if item.type == "message":
+        return estimate_tokens(item.text_content or "") + ITEM_OVERHEAD_TOKENS
+    if item.type == "function_call":
+        return estimate_tokens(item.name + item.arguments) + ITEM_OVERHEAD_TOKENS
+    if item.type == "function_call_output":
+        return estimate_tokens(item.output) + ITEM_OVERHEAD_TOKENS
+    return 0
+
+
+def context_tokens(chat_ctx: ChatContext) -> int:
+    return sum(item_tokens(item) for item in chat_ctx.items)
+
+
+def remember_summary(output: str, summary: str) -> str:
+    """Jätab tööriista tulemuse kokkuvõtte meelde (protsessi kohta, LRU); tagastab tulemuse."""
+    _summaries[output] = summary
+    _summaries.move_to_end(output)
+    while len(_summaries) > MAX_SUMMARIES:
+        _summaries.popitem(last=False)
+    return output
+
+
+def summary_of(output: str) -> Optional[str]:
+    return _summaries.get(output)
+
+
+@dataclass
+class CompactionReport:
+    tokens_before: int
+    tokens: int
+    compacted: int = 0
+    dropped: int = 0
+
+
+def _turn_starts(items: list) -> List[int]:
+    return [i for i, item in enumerate(items) if item.type == "message" and item.role == "user"]
+
+
+def _pinned(item) -> bool:
+    return item.type == "message" and item.role in ("system", "developer")
+
+
+class ContextBudget:
+    def __init__(self, removed_note: str, max_tokens: int = MAX_TOKENS, keep_turns: int = KEEP_TURNS) -> None:
+        self.removed_note = removed_note
+        self.max_tokens = max_tokens
+        self.keep_turns = keep_turns
+
+    @classmethod
+    def from_env(cls, removed_note: str) -> Optional["ContextBudget"]:
+        if os.getenv("CONTEXT_BUDGET", "1") == "0":
+            return None
+        return cls(
+            removed_note,
+            max_tokens=int(os.getenv("CONTEXT_MAX_TOKENS", str(MAX_TOKENS))),
+            keep_turns=int(os.getenv("CONTEXT_KEEP_TURNS", str(KEEP_TURNS))),
+        )
+
+    def compact(self, chat_ctx: ChatContext) -> CompactionReport:
+        """Kompaktib päringu konteksti kohapeal; kirjeid ei muudeta, vaid asendatakse koopiatega."""
+        items = chat_ctx.items
+        before = context_tokens(chat_ctx)
+        report = CompactionReport(tokens_before=before, tokens=before)
+        starts = _turn_starts(items)
+        if len(starts) <= self.keep_turns:
+            return report
+        boundary = starts[-self.keep_turns] if self.keep_turns > 0 else len(items)
+
+        for i in range(boundary):
+            item = items[i]
+            if item.type != "function_call_output" or estimate_tokens(item.output) <= SMALL_OUTPUT_TOKENS:
+                continue
+            items[i] = item.model_copy(update={"output": summary_of(item.output) or self.removed_note})
+            report.compacted += 1
+        tokens = context_tokens(chat_ctx)
+
+        # Ikka üle eelarve: vanimad voorud (kasutaja sõnumist järgmiseni) välja, juhised jäävad
+        stale = [s for s in starts if s < boundary] + [boundary]
+        cut = None
+        for start, end in zip(stale, stale[1:]):
+            if tokens <= self.max_tokens:
+                break
+            tokens -= sum(item_tokens(item) for item in items[start:end] if not _pinned(item))
+            cut = end
+        if cut is not None:
+            # Ka esimese kasutaja sõnumi eelsed kirjed (tervitus), välja arvatud juhised
+            dropped = [item for item in items[:cut] if not _pinned(item)]
+            items[:cut] = [item for item in items[:cut] if _pinned(item)]
+            report.dropped = len(dropped)
+            tokens = context_tokens(chat_ctx)
+
+        report.tokens = tokens
+        if report.compacted or report.dropped:
+            logger.debug("kontekst %d -> %d tokenit (%d tulemust kokku võetud, %d kirjet välja)",
+                         before, tokens, report.compacted, report.dropped)
+        return report
@@ -8,18 +8,28 @@ Kasutusnäited:
   python debug_weather.py Tallinn Tartu Pärnu --forecast 2
   python debug_weather.py Tallinn --no-current --forecast 4
   python debug_weather.py --cities failiga_linnad.txt --forecast 3
+  python debug_weather.py London --locale en
+
+Partiirežiim (mitu linna korraga, masinloetav väljund koos ajakuluga):
+  python debug_weather.py --cities-file linnad.txt --forecast 3 --concurrency 16 --format jsonl
+  python debug_weather.py --cities-file linnad.txt --format csv --output tulemused.csv
+  python debug_weather.py --cities-file linnad.txt --warm   # täidab geokodeerimise vahemälu
 
 Keskkond:
   Vajalik on .env või keskkonnamuutuja OPENWEATHER_API_KEY
+  WEATHER_CACHE_DIR peab --warm korral osutama workeri vahemälu kataloogile
 """
 
 from __future__ import annotations
 import argparse
 import asyncio
+import csv
+import json
 import os
 import sys
+import time
 from pathlib import Path
-from typing import List
+from typing import Any, Dict, List, Optional, TextIO
 from dotenv import load_dotenv
 
 MAX_FORECAST_DAYS = 5  # OpenWeather 2.5 /forecast annab kuni ~5 päeva
@@ -29,9 +39,13 @@ load_dotenv()
 
 # Impordi funktsioonid
 try:
-    from agent import get_weather, get_weather_forecast  # type: ignore
+    from locales import LOCALES, LocalePack, default_locale
+    from rate_limit import LOW
+    from telemetry import collect_spans
+    from weather_client import OpenWeatherError, get_client
+    from weather_tools import tools_for
 except ImportError as e:
-    print("[VIGA] Ei suutnud importida agent.py funktsioone:", e, file=sys.stderr)
+    print("[VIGA] Ei suutnud importida ilmatööriistu:", e, file=sys.stderr)
     sys.exit(1)
 
 
@@ -57,23 +71,135 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument('--no-current', action='store_true', help='Ära kuva praegust ilma, ainult prognoos')
     parser.add_argument('--only-current', action='store_true', help='Ainult praegune ilm, ignoreeri prognoosi')
     parser.add_argument('--raw', action='store_true', help='Ära lisa vormindavaid eraldajaid (sobib logimiseks)')
+    parser.add_argument('--concurrency', type=int, default=1, help='Mitu linna töödeldakse korraga (vaikimisi 1)')
+    parser.add_argument('--format', choices=['text', 'jsonl', 'csv'], default='text',
+                        help='Väljundi vorming; jsonl ja csv sisaldavad ajakulu etappide kaupa')
+    parser.add_argument('--output', help='Kirjuta väljund faili (vaikimisi stdout)')
+    parser.add_argument('--locale', choices=sorted(LOCALES), default=default_locale(),
+                        help='Tööriistade keel (vaikimisi AGENT_LOCALE või et)')
+    parser.add_argument('--warm', action='store_true',
+                        help='Ainult geokodeeri linnad ja salvesta tulemused vahemällu (workeri eelsoojendus)')
     return parser
 
 
-async def process_city(city: str, show_current: bool, forecast_days: int | None, raw: bool):
-    header = f"===== {city} =====" if not raw else ''
-    if header:
-        print(header)
-    if show_current:
-        current = await get_weather(city)
-        print(current)
+CSV_FIELDS = [
+    'city', 'ok', 'total_ms',
+    'current_geocode_ms', 'current_weather_ms', 'current_ms',
+    'forecast_geocode_ms', 'forecast_weather_ms', 'forecast_ms',
+    'error', 'name', 'country', 'current', 'forecast',
+]
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 1)
+
+
+async def _timed_tool(record: Dict[str, Any], name: str, call, pack: LocalePack) -> None:
+    spans = collect_spans()
+    t0 = time.perf_counter()
+    text = await call
+    record[f'{name}_ms'] = _ms(time.perf_counter() - t0)
+    record[f'{name}_geocode_ms'] = _ms(spans.total('geocode'))
+    record[f'{name}_weather_ms'] = _ms(spans.total('weather'))
+    record[name] = text
+    # Tööriistad tagastavad vea (ka puuduvate andmete) korral teksti, mitte erindit
+    if pack.is_failure(text):
+        record['ok'] = False
+        record['error'] = record['error'] or text.splitlines()[0]
+
+
+async def collect_city(city: str, show_current: bool, forecast_days: Optional[int], locale: str) -> Dict[str, Any]:
+    """Ühe linna tulemused ja ajakulu (geokodeerimine / ilmapäring) tööriista kaupa."""
+    record: Dict[str, Any] = {'city': city, 'ok': True, 'error': ''}
+    get_weather, get_weather_forecast = tools_for(locale)[:2]
+    pack = LOCALES[locale]
+    t0 = time.perf_counter()
+    try:
+        if show_current:
+            await _timed_tool(record, 'current', get_weather(city), pack)
+        if forecast_days is not None and forecast_days > 0:
+            await _timed_tool(record, 'forecast', get_weather_forecast(city, days=forecast_days), pack)
+    except Exception as e:  # pragma: no cover
+        record['ok'] = False
+        record['error'] = f"ootamatu erind: {e}"
+    record['total_ms'] = _ms(time.perf_counter() - t0)
+    return record
+
+
+async def warm_city(city: str) -> Dict[str, Any]:
+    """Geokodeerib linna; tulemus salvestub kettale ja on workeri prewarm ajal kohe olemas."""
+    record: Dict[str, Any] = {'city': city, 'ok': True, 'error': ''}
+    t0 = time.perf_counter()
+    try:
+        places = await get_client().geocode(city, priority=LOW)
+        if places:
+            record['name'] = places[0]['name']
+            record['country'] = places[0]['country']
+        else:
+            record['ok'] = False
+            record['error'] = 'linna ei leitud'
+    except OpenWeatherError as e:
+        record['ok'] = False
+        record['error'] = str(e)
+    record['total_ms'] = _ms(time.perf_counter() - t0)
+    return record
+
+
+def print_text(record: Dict[str, Any], raw: bool, out: TextIO) -> None:
+    if not raw:
+        print(f"===== {record['city']} =====", file=out)
+    if 'current' in record:
+        print(record['current'], file=out)
         if not raw:
-            print()
-    if forecast_days is not None and forecast_days > 0:
-        forecast = await get_weather_forecast(city, days=forecast_days)
-        print(forecast)
+            print(file=out)
+    if 'forecast' in record:
+        print(record['forecast'], file=out)
+    if 'name' in record:
+        print(f"{record['name']}, {record['country']}", file=out)
+    if record['error'] and 'current' not in record and 'forecast' not in record:
+        print(f"[VIGA] {record['error']}", file=out)
     if not raw:
-        print()
+        print(file=out)
+
+
+class RecordWriter:
+    def __init__(self, fmt: str, raw: bool, out: TextIO) -> None:
+        self.fmt = fmt
+        self.raw = raw
+        self.out = out
+        self._csv = None
+        if fmt == 'csv':
+            self._csv = csv.DictWriter(out, fieldnames=CSV_FIELDS, extrasaction='ignore')
+            self._csv.writeheader()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        if self.fmt == 'jsonl':
+            print(json.dumps(record, ensure_ascii=False), file=self.out)
+        elif self._csv is not None:
+            self._csv.writerow(record)
+        else:
+            print_text(record, self.raw, self.out)
+        self.out.flush()
+
+
+async def run_batch(cities: List[str], worker, concurrency: int, writer: RecordWriter) -> List[Dict[str, Any]]:
+    """Töötleb linnad piiratud samaaegsusega; väljund tuleb sisendi järjekorras."""
+    sem = asyncio.Semaphore(max(1, concurrency))
+    done: Dict[int, Dict[str, Any]] = {}
+    next_index = 0
+
+    async def run_one(i: int, city: str) -> Dict[str, Any]:
+        nonlocal next_index
+        async with sem:
+            record = await worker(city)
+        done[i] = record
+        # Kirjuta kõik järjestikku valmis saanud kirjed
+        while next_index in done:
+            writer.write(done.pop(next_index))
+            next_index += 1
+        return record
+
+    return await asyncio.gather(*(run_one(i, c) for i, c in enumerate(cities)))
 
 
 async def main_async(args):
@@ -114,13 +240,32 @@ async def main_async(args):
     if args.only_current:
         show_current = True
 
-    for city in cities_unique:
-        try:
-            await process_city(city, show_current=show_current, forecast_days=forecast_days, raw=args.raw)
-        except Exception as e:  # pragma: no cover
-            print(f"[VIGA] Linnaga '{city}' tekkis ootamatu erind: {e}")
+    if args.warm:
+        async def worker(city):
+            return await warm_city(city)
+    else:
+        async def worker(city):
+            return await collect_city(city, show_current=show_current, forecast_days=forecast_days,
+                                      locale=args.locale)
+
+    out = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    t0 = time.perf_counter()
+    try:
+        records = await run_batch(cities_unique, worker, args.concurrency, RecordWriter(args.format, args.raw, out))
+    finally:
+        if args.output:
+            out.close()
+        await get_client().aclose()
+    elapsed = time.perf_counter() - t0
 
-    return 0
+    failed = sum(1 for r in records if not r['ok'])
+    if args.format != 'text' or len(records) > 1:
+        # Kokkuvõte stderr-i, et masinloetav väljund jääks puhtaks
+        print(f"[INFO] {len(records)} linna, {failed} viga, {elapsed:.2f} s (samaaegsus {args.concurrency})",
+              file=sys.stderr)
+        if args.warm:
+            print(f"[INFO] Geokodeerimise vahemälu: {get_client().geocode_cache.stats()}", file=sys.stderr)
+    return 4 if args.warm and failed else 0
 
 
 def main():
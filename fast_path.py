@@ -0,0 +1,65 @@
+"""fast_path.py
+LLM-ita kiirtee lihtsatele ilmaküsimustele ("Mis ilm on Tartus?").
+
+Lõplikust transkriptsioonist otsitakse ilma- või prognoosisõna, linn
+(gazetteer.py) ja päevade arv (intent.py). Ainult kindla vaste korral (täpselt üks linn,
+selge kavatsus, lühike lause, pole kellaaja- ega minevikuküsimust) kutsutakse
+tööriista andmekiht otse ja vastus tuleb keelepaketi kõnemallist; kõik muu
+läheb tavapäraselt LLM-ile. Ka tööriista viga (linna ei leitud jne) suunab
+vooru LLM-ile, mis oskab kasutajalt täpsustust küsida.
+
+Keskkond:
+  FAST_PATH - 0 lülitab kiirtee välja (vaikimisi sees)
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from typing import Optional
+
+from intent import Intent, extract
+from locales import LocalePack, render_template
+from telemetry import mark_fast_path, span
+from weather_tools import current_fields, forecast_fields
+
+logger = logging.getLogger("fast-path")
+
+
+def _spoken(note: str) -> str:
+    # Vahemälu märkus on tööriista tekstis eraldi real, kõnes lihtsalt järgmine lause
+    return " " + note.strip() if note else ""
+
+
+async def answer(pack: LocalePack, intent: Intent) -> Optional[str]:
+    """Kõnevalmis vastus kõnemallist; None, kui tööriist ei andnud andmeid."""
+    try:
+        if intent.kind == "weather":
+            fields = await current_fields(pack, intent.city)
+            return render_template(pack.spoken_current, fields).strip() + _spoken(fields["stale"])
+        # Päevad kohaliku kuupäeva järgi (homme = tänane kuupäev + 1), mitte vastuse järjekorras
+        header, rows = await forecast_fields(pack, intent.city, intent.days - intent.first_day, intent.first_day)
+    except Exception as e:
+        logger.info("kiirtee loobus (%s): %s", intent, e)
+        return None
+    parts = [pack.spoken_forecast_header.format(**header)]
+    parts.extend(pack.spoken_forecast_day.format(**row).strip() for row in rows)
+    return " ".join(parts) + _spoken(header["stale"])
+
+
+def enabled() -> bool:
+    return os.getenv("FAST_PATH", "1") != "0"
+
+
+async def try_fast_path(pack: LocalePack, text: str) -> Optional[str]:
+    """Vooru kiirtee: vastus või None (siis vastab LLM)."""
+    if not enabled():
+        return None
+    intent = extract(text, pack.code)
+    if intent is None:
+        return None
+    with span("fast_path"):
+        reply = await answer(pack, intent)
+    if reply is not None:
+        mark_fast_path()
+    return reply
@@ -0,0 +1,316 @@
+"""forecast_agg.py
+/data/2.5/forecast vastuse (3h kirjed) koondamine päevade kaupa.
+
+Päevade näitajad: min/maks temperatuur, keskmine temperatuur, tuntav
+temperatuur, tuule kiirus, niiskus, rõhk ja kõige sagedasem ilma kirjeldus.
+Päev = kohalik kuupäev (UTC + city.timezone). Tavaline vastus (40 kirjet)
+koondatakse otse kirjetest Pythoni tsükliga; suured loendid teisendatakse
+veergudeks (numpy massiivid) ja koondatakse ühe grupeeritud läbimisega.
+
+at_time / over_range annavad samadest veergudest näitajad kellaajal või
+ajavahemikus (päevaosa): väärtused interpoleeritakse lineaarselt 3h kirjete
+vahel, kirjeldus tuleb lähimast kirjest.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date
+from functools import cached_property
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+SECONDS_PER_DAY = 86400
+# Kirjete samm; esimesest kirjest kuni nii palju varasem aeg saab esimese kirje väärtused
+STEP_SECONDS = 3 * 3600
+# Alates sellest kirjete arvust koondab numpy. 40 kirje juures on numpy koos veergude
+# loomisega ~2x aeglasem kui Pythoni tsükkel, kasu tuleb alles mõnesaja kirje juures
+# (python benchmarks/bench_forecast_agg.py --sizes 40 120 240 2920)
+VECTORIZE_MIN_ENTRIES = 200
+
+
+class DaySummary(NamedTuple):
+    date: date
+    avg_temp: float
+    avg_feels: float
+    min_temp: float
+    max_temp: float
+    avg_wind: float
+    avg_hum: int
+    avg_press: int
+    description: str
+
+
+class PointForecast(NamedTuple):
+    temp: float
+    feels: float
+    wind: float
+    hum: float
+    press: float
+    description: str
+
+
+class RangeForecast(NamedTuple):
+    min_temp: float
+    max_temp: float
+    avg_wind: float
+    description: str
+
+
+@dataclass(frozen=True)
+class ForecastColumns:
+    """3h kirjed veergudena, sorteeritud aja järgi. Puuduv väärtus = NaN."""
+
+    dt: np.ndarray         # int64, UTC sekundid
+    day: np.ndarray        # int64, kohalik päev alates 1970-01-01
+    temp: np.ndarray
+    temp_min: np.ndarray
+    temp_max: np.ndarray
+    feels: np.ndarray
+    wind: np.ndarray
+    hum: np.ndarray
+    press: np.ndarray
+    desc_code: np.ndarray  # int64, indeks descriptions loendis; -1 = kirjeldus puudub
+    descriptions: List[str]
+
+    def __len__(self) -> int:
+        return len(self.dt)
+
+
+@dataclass(frozen=True)
+class ForecastSummary:
+    tz_offset: int  # sekundites
+    days: List[DaySummary]
+    entries: List[Dict[str, Any]] = field(repr=False)
+
+    @cached_property
+    def columns(self) -> ForecastColumns:
+        """Veerud at_time/over_range jaoks; luuakse alles esimese kellaaja küsimuse korral."""
+        return to_columns(self.entries, self.tz_offset)
+
+
+def to_columns(entries: List[Dict[str, Any]], tz_offset: int) -> ForecastColumns:
+    # Üks veerg = üks loendikõne; see on kiirem kui kirje kaupa append
+    items = [it for it in entries if it.get("dt") is not None]
+    mains = [it.get("main", {}) for it in items]
+    desc_index: Dict[str, int] = {}
+    codes = [
+        desc_index.setdefault(w[0].get("description", ""), len(desc_index)) if w else -1
+        for w in (it.get("weather") for it in items)
+    ]
+    dts = [it["dt"] for it in items]
+    temps = [m.get("temp") for m in mains]
+    temps_min = [m.get("temp_min") for m in mains]
+    temps_max = [m.get("temp_max") for m in mains]
+    feels = [m.get("feels_like") for m in mains]
+    winds = [it.get("wind", {}).get("speed") for it in items]
+    hums = [m.get("humidity") for m in mains]
+    presses = [m.get("pressure") for m in mains]
+
+    dt_arr = np.asarray(dts, dtype=np.int64)
+    order = np.argsort(dt_arr, kind="stable")
+
+    def col(values: list) -> np.ndarray:
+        # None -> NaN
+        return np.asarray(values, dtype=np.float64)[order]
+
+    dt_arr = dt_arr[order]
+    return ForecastColumns(
+        dt=dt_arr,
+        day=(dt_arr + tz_offset) // SECONDS_PER_DAY,
+        temp=col(temps),
+        temp_min=col(temps_min),
+        temp_max=col(temps_max),
+        feels=col(feels),
+        wind=col(winds),
+        hum=col(hums),
+        press=col(presses),
+        desc_code=np.asarray(codes, dtype=np.int64)[order],
+        descriptions=list(desc_index),
+    )
+
+
+def aggregate_days(cols: ForecastColumns) -> List[DaySummary]:
+    n = len(cols)
+    if n == 0:
+        return []
+    # Grupi algused: kirjed on aja järgi sorteeritud, seega päevad on järjestikused
+    boundary = np.r_[True, cols.day[1:] != cols.day[:-1]]
+    starts = np.flatnonzero(boundary)
+    group = np.cumsum(boundary) - 1
+    n_groups = len(starts)
+
+    def count(x: np.ndarray) -> np.ndarray:
+        return np.add.reduceat((~np.isnan(x)).astype(np.int64), starts)
+
+    def mean(x: np.ndarray, cnt: np.ndarray) -> np.ndarray:
+        total = np.add.reduceat(np.where(np.isnan(x), 0.0, x), starts)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return total / cnt
+
+    temp_n = count(cols.temp)
+    feels_n = count(cols.feels)
+    wind_n = count(cols.wind)
+    hum_n = count(cols.hum)
+    press_n = count(cols.press)
+    avg_temp = mean(cols.temp, temp_n)
+    avg_feels = mean(cols.feels, feels_n)
+    avg_wind = mean(cols.wind, wind_n)
+    avg_hum = mean(cols.hum, hum_n)
+    avg_press = mean(cols.press, press_n)
+    # fmin/fmax ignoreerivad NaN väärtusi; kui temp_min puudub, kasuta temp
+    min_temp = np.where(count(cols.temp_min) > 0, np.fmin.reduceat(cols.temp_min, starts),
+                        np.fmin.reduceat(cols.temp, starts))
+    max_temp = np.where(count(cols.temp_max) > 0, np.fmax.reduceat(cols.temp_max, starts),
+                        np.fmax.reduceat(cols.temp, starts))
+
+    # Mood: loendid (päev x kirjeldus) tabelis; viigi korral võidab päeva varaseim kirjeldus
+    n_desc = len(cols.descriptions)
+    best = np.full(n_groups, -1, dtype=np.int64)
+    if n_desc:
+        valid = cols.desc_code >= 0
+        flat = group[valid] * n_desc + cols.desc_code[valid]
+        counts = np.bincount(flat, minlength=n_groups * n_desc)
+        first = np.full(n_groups * n_desc, n, dtype=np.int64)
+        uniq, first_idx = np.unique(flat, return_index=True)
+        first[uniq] = np.flatnonzero(valid)[first_idx]
+        score = counts * (n + 1) - first
+        mode = score.reshape(n_groups, n_desc).argmax(axis=1)
+        has_desc = counts.reshape(n_groups, n_desc).sum(axis=1) > 0
+        best = np.where(has_desc, mode, -1)
+
+    # Tuletatud väärtused arvutatakse veergudena; Pythoni tasemel jääb vaid objektide loomine
+    keep = temp_n > 0
+    avg_temp = avg_temp[keep]
+    rows = zip(
+        cols.day[starts[keep]].tolist(),
+        avg_temp.tolist(),
+        np.where(feels_n[keep] > 0, avg_feels[keep], avg_temp).tolist(),
+        min_temp[keep].tolist(),
+        max_temp[keep].tolist(),
+        np.where(wind_n[keep] > 0, avg_wind[keep], 0.0).tolist(),
+        np.where(hum_n[keep] > 0, np.round(avg_hum[keep]), 0).astype(np.int64).tolist(),
+        np.where(press_n[keep] > 0, np.round(avg_press[keep]), 0).astype(np.int64).tolist(),
+        best[keep].tolist(),
+    )
+    descriptions = cols.descriptions
+    days = [
+        DaySummary(date.fromordinal(EPOCH_ORDINAL + d), t, fl, lo, hi, w, h, p, descriptions[b] if b >= 0 else "")
+        for d, t, fl, lo, hi, w, h, p, b in rows
+    ]
+    return days
+
+
+def _known(values) -> list:
+    return [v for v in values if v is not None]
+
+
+def _aggregate_entries(entries: List[Dict[str, Any]], tz_offset: int) -> List[DaySummary]:
+    """aggregate_days väikeste vastuste jaoks: sama tulemus otse kirjetest, ilma veergudeta."""
+    grouped: Dict[int, list] = {}
+    for it in sorted((it for it in entries if it.get("dt") is not None), key=lambda it: it["dt"]):
+        grouped.setdefault((it["dt"] + tz_offset) // SECONDS_PER_DAY, []).append(it)
+    days = []
+    for day, items in grouped.items():
+        mains = [it.get("main", {}) for it in items]
+        temps = _known(m.get("temp") for m in mains)
+        if not temps:
+            continue
+        feels = _known(m.get("feels_like") for m in mains)
+        winds = _known(it.get("wind", {}).get("speed") for it in items)
+        hums = _known(m.get("humidity") for m in mains)
+        presses = _known(m.get("pressure") for m in mains)
+        # Mood; viigi korral võidab päeva varaseim kirjeldus (dict säilitab järjekorra)
+        counts: Dict[str, int] = {}
+        for w in (it.get("weather") for it in items):
+            if w:
+                desc = w[0].get("description", "")
+                counts[desc] = counts.get(desc, 0) + 1
+        avg_temp = sum(temps) / len(temps)
+        days.append(DaySummary(
+            date.fromordinal(EPOCH_ORDINAL + day),
+            avg_temp,
+            sum(feels) / len(feels) if feels else avg_temp,
+            min(_known(m.get("temp_min") for m in mains) or temps),
+            max(_known(m.get("temp_max") for m in mains) or temps),
+            sum(winds) / len(winds) if winds else 0.0,
+            int(round(sum(hums) / len(hums))) if hums else 0,
+            int(round(sum(presses) / len(presses))) if presses else 0,
+            max(counts, key=counts.__getitem__) if counts else "",
+        ))
+    return days
+
+
+def summarize_forecast(f_data: Dict[str, Any]) -> ForecastSummary:
+    tz_offset = f_data.get("city", {}).get("timezone", 0)
+    entries = f_data.get("list", [])
+    if len(entries) < VECTORIZE_MIN_ENTRIES:
+        return ForecastSummary(tz_offset=tz_offset, days=_aggregate_entries(entries, tz_offset), entries=entries)
+    cols = to_columns(entries, tz_offset)
+    summary = ForecastSummary(tz_offset=tz_offset, days=aggregate_days(cols), entries=entries)
+    summary.__dict__["columns"] = cols  # cached_property: veerud on juba olemas
+    return summary
+
+
+def _interp(t: np.ndarray, dt: np.ndarray, x: np.ndarray) -> np.ndarray:
+    known = ~np.isnan(x)
+    if not known.any():
+        return np.full(np.shape(t), np.nan)
+    return np.interp(t, dt[known], x[known])
+
+
+def _in_range(cols: ForecastColumns, t: np.ndarray) -> np.ndarray:
+    return (t >= cols.dt[0] - STEP_SECONDS) & (t <= cols.dt[-1])
+
+
+def _description(cols: ForecastColumns, t: np.ndarray) -> str:
+    """Lähimate kirjete kõige sagedasem kirjeldus (viigi korral varaseim)."""
+    nearest = np.abs(cols.dt[None, :] - t[:, None]).argmin(axis=1)
+    codes = cols.desc_code[nearest]
+    codes = codes[codes >= 0]
+    if not len(codes):
+        return ""
+    values, first, counts = np.unique(codes, return_index=True, return_counts=True)
+    return cols.descriptions[values[np.lexsort((first, -counts))[0]]]
+
+
+def at_time(cols: ForecastColumns, t: int) -> Optional[PointForecast]:
+    """Näitajad ajahetkel t (UTC sekundid); None, kui aeg jääb prognoosist välja."""
+    if len(cols) == 0:
+        return None
+    point = np.array([t], dtype=np.int64)
+    if not _in_range(cols, point)[0]:
+        return None
+    temp = _interp(point, cols.dt, cols.temp)[0]
+    if np.isnan(temp):
+        return None
+    feels = _interp(point, cols.dt, cols.feels)[0]
+    return PointForecast(
+        temp=float(temp),
+        feels=float(temp if np.isnan(feels) else feels),
+        wind=float(np.nan_to_num(_interp(point, cols.dt, cols.wind)[0])),
+        hum=float(np.nan_to_num(_interp(point, cols.dt, cols.hum)[0])),
+        press=float(np.nan_to_num(_interp(point, cols.dt, cols.press)[0])),
+        description=_description(cols, point),
+    )
+
+
+def over_range(cols: ForecastColumns, start: int, end: int, step: int = 3600) -> Optional[RangeForecast]:
+    """Vahemiku [start, end) (UTC sekundid) tunniste interpoleeritud väärtuste kokkuvõte."""
+    if len(cols) == 0:
+        return None
+    t = np.arange(start, end, step, dtype=np.int64)
+    t = t[_in_range(cols, t)]
+    if not len(t):
+        return None
+    temps = _interp(t, cols.dt, cols.temp)
+    if np.isnan(temps).all():
+        return None
+    return RangeForecast(
+        min_temp=float(np.nanmin(temps)),
+        max_temp=float(np.nanmax(temps)),
+        avg_wind=float(np.nan_to_num(np.mean(_interp(t, cols.dt, cols.wind)))),
+        description=_description(cols, t),
+    )
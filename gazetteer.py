@@ -0,0 +1,311 @@
+"""gazetteer.py
+Võrguühenduseta kohanimede tabel: Eesti ja Euroopa suuremad kohad koos
+koordinaatidega, maakondade ja riikide aliased ning eesti käändelõppude
+eemaldamine.
+
+Tööriistad lahendavad nime kõigepealt siin (resolve) ja kutsuvad OpenWeather
+geokodeerimist ainult tundmatu nime korral; kiirtee ja ennetav päring leiavad
+lausest linnad (find_cities) ilma ühegi päringuta.
+
+Eesti keeles on nimi lauses tavaliselt käändes ("Tartus", "Tallinnast",
+"Saaremaal"). Indeksis on iga koha nimetava ja omastava tüvi; otsingul
+proovitakse sõna ennast ja seejärel sõna ilma iga käändelõputa (pikim enne),
+st paar sõnastiku päringut sõna kohta, sõltumata tabeli suurusest.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+# Kanooniline nimi -> (lat, lon, riik, eestikeelsed tüved: nimetav ja omastav, kui need erinevad)
+PLACES: Dict[str, Tuple[float, float, str, Tuple[str, ...]]] = {
+    # Eesti
+    "Tallinn": (59.4370, 24.7536, "EE", ("Tallinn", "Tallinna")),
+    "Tartu": (58.3780, 26.7290, "EE", ("Tartu",)),
+    "Narva": (59.3772, 28.1903, "EE", ("Narva",)),
+    "Pärnu": (58.3859, 24.4971, "EE", ("Pärnu",)),
+    "Kohtla-Järve": (59.3986, 27.2731, "EE", ("Kohtla-Järve",)),
+    "Viljandi": (58.3639, 25.5900, "EE", ("Viljandi",)),
+    "Maardu": (59.4767, 25.0250, "EE", ("Maardu",)),
+    "Rakvere": (59.3464, 26.3558, "EE", ("Rakvere",)),
+    "Kuressaare": (58.2481, 22.5039, "EE", ("Kuressaare",)),
+    "Sillamäe": (59.3997, 27.7631, "EE", ("Sillamäe",)),
+    "Valga": (57.7778, 26.0472, "EE", ("Valga",)),
+    "Võru": (57.8339, 27.0194, "EE", ("Võru",)),
+    "Jõhvi": (59.3592, 27.4211, "EE", ("Jõhvi",)),
+    "Haapsalu": (58.9431, 23.5414, "EE", ("Haapsalu",)),
+    "Keila": (59.3036, 24.4131, "EE", ("Keila",)),
+    "Paide": (58.8856, 25.5572, "EE", ("Paide",)),
+    "Rapla": (58.9994, 24.7928, "EE", ("Rapla",)),
+    "Põlva": (58.0603, 27.0694, "EE", ("Põlva",)),
+    "Jõgeva": (58.7467, 26.3939, "EE", ("Jõgeva",)),
+    "Kärdla": (58.9978, 22.7492, "EE", ("Kärdla",)),
+    "Otepää": (58.0581, 26.4961, "EE", ("Otepää",)),
+    "Elva": (58.2225, 26.4211, "EE", ("Elva",)),
+    "Paldiski": (59.3567, 24.0531, "EE", ("Paldiski",)),
+    "Türi": (58.8086, 25.4325, "EE", ("Türi",)),
+    "Põltsamaa": (58.6525, 25.9703, "EE", ("Põltsamaa",)),
+    "Räpina": (58.0981, 27.4636, "EE", ("Räpina",)),
+    "Tõrva": (58.0022, 25.9347, "EE", ("Tõrva",)),
+    "Kunda": (59.4967, 26.5289, "EE", ("Kunda",)),
+    "Kiviõli": (59.3531, 26.9711, "EE", ("Kiviõli",)),
+    "Narva-Jõesuu": (59.4589, 28.0408, "EE", ("Narva-Jõesuu",)),
+    "Kehra": (59.3364, 25.3408, "EE", ("Kehra",)),
+    "Loksa": (59.5786, 25.7161, "EE", ("Loksa",)),
+    "Antsla": (57.8256, 26.5400, "EE", ("Antsla",)),
+    "Lihula": (58.6881, 23.8447, "EE", ("Lihula",)),
+    # Naabrid ja Euroopa
+    "Riga": (56.9496, 24.1052, "LV", ("Riia",)),
+    "Vilnius": (54.6872, 25.2797, "LT", ("Vilnius", "Vilniuse")),
+    "Kaunas": (54.8985, 23.9036, "LT", ("Kaunas", "Kaunase")),
+    "Helsinki": (60.1699, 24.9384, "FI", ("Helsingi",)),
+    "Tampere": (61.4978, 23.7610, "FI", ("Tampere",)),
+    "Stockholm": (59.3293, 18.0686, "SE", ("Stockholm", "Stockholmi")),
+    "Oslo": (59.9139, 10.7522, "NO", ("Oslo",)),
+    "Copenhagen": (55.6761, 12.5683, "DK", ("Kopenhaagen", "Kopenhaageni")),
+    "Reykjavik": (64.1466, -21.9426, "IS", ("Reykjavik", "Reykjaviki")),
+    "Berlin": (52.5200, 13.4050, "DE", ("Berliin", "Berliini")),
+    "Hamburg": (53.5511, 9.9937, "DE", ("Hamburg", "Hamburgi")),
+    "Munich": (48.1351, 11.5820, "DE", ("München", "Müncheni")),
+    "London": (51.5072, -0.1276, "GB", ("London", "Londoni")),
+    "Dublin": (53.3498, -6.2603, "IE", ("Dublin", "Dublini")),
+    "Paris": (48.8566, 2.3522, "FR", ("Pariis", "Pariisi")),
+    "Amsterdam": (52.3676, 4.9041, "NL", ("Amsterdam", "Amsterdami")),
+    "Brussels": (50.8503, 4.3517, "BE", ("Brüssel", "Brüsseli")),
+    "Luxembourg": (49.6116, 6.1319, "LU", ("Luxembourg", "Luxembourgi")),
+    "Bern": (46.9480, 7.4474, "CH", ("Bern", "Berni")),
+    "Vienna": (48.2082, 16.3738, "AT", ("Viin", "Viini")),
+    "Prague": (50.0755, 14.4378, "CZ", ("Praha",)),
+    "Bratislava": (48.1486, 17.1077, "SK", ("Bratislava",)),
+    "Warsaw": (52.2297, 21.0122, "PL", ("Varssavi",)),
+    "Budapest": (47.4979, 19.0402, "HU", ("Budapest", "Budapesti")),
+    "Ljubljana": (46.0569, 14.5058, "SI", ("Ljubljana",)),
+    "Zagreb": (45.8150, 15.9819, "HR", ("Zagreb", "Zagrebi")),
+    "Belgrade": (44.7866, 20.4489, "RS", ("Belgrad", "Belgradi")),
+    "Bucharest": (44.4268, 26.1025, "RO", ("Bukarest", "Bukaresti")),
+    "Sofia": (42.6977, 23.3219, "BG", ("Sofia",)),
+    "Athens": (37.9838, 23.7275, "GR", ("Ateena",)),
+    "Rome": (41.9028, 12.4964, "IT", ("Rooma",)),
+    "Milan": (45.4642, 9.1900, "IT", ("Milano",)),
+    "Madrid": (40.4168, -3.7038, "ES", ("Madrid", "Madridi")),
+    "Barcelona": (41.3874, 2.1686, "ES", ("Barcelona",)),
+    "Lisbon": (38.7223, -9.1393, "PT", ("Lissabon", "Lissaboni")),
+    "Kyiv": (50.4501, 30.5234, "UA", ("Kiiev", "Kiievi")),
+    "Minsk": (53.9006, 27.5590, "BY", ("Minsk", "Minski")),
+    "Moscow": (55.7558, 37.6173, "RU", ("Moskva",)),
+    "Saint Petersburg": (59.9311, 30.3609, "RU", ("Peterburi",)),
+    "Pskov": (57.8136, 28.3496, "RU", ("Pihkva",)),
+    "Istanbul": (41.0082, 28.9784, "TR", ("Istanbul", "Istanbuli")),
+    "Ankara": (39.9334, 32.8597, "TR", ("Ankara",)),
+    # Ingliskeelse prompti näited
+    "Washington": (38.9072, -77.0369, "US", ("Washington", "Washingtoni")),
+    "New York": (40.7128, -74.0060, "US", ("New York", "New Yorgi")),
+    "Los Angeles": (34.0522, -118.2437, "US", ("Los Angeles", "Los Angelese")),
+}
+
+# Maakond -> suurim linn (tüved: nimetav ja omastav; "Harju maakond" on kahesõnaline)
+COUNTIES_ET: Dict[str, str] = {
+    "Harjumaa": "Tallinn", "Harju maakond": "Tallinn", "Harju maakonna": "Tallinn",
+    "Tartumaa": "Tartu", "Tartu maakond": "Tartu", "Tartu maakonna": "Tartu",
+    "Ida-Virumaa": "Narva", "Ida-Viru maakond": "Narva", "Ida-Viru maakonna": "Narva",
+    "Pärnumaa": "Pärnu", "Pärnu maakond": "Pärnu", "Pärnu maakonna": "Pärnu",
+    "Lääne-Virumaa": "Rakvere", "Lääne-Viru maakond": "Rakvere", "Lääne-Viru maakonna": "Rakvere",
+    "Viljandimaa": "Viljandi", "Viljandi maakond": "Viljandi", "Viljandi maakonna": "Viljandi",
+    "Raplamaa": "Rapla", "Rapla maakond": "Rapla", "Rapla maakonna": "Rapla",
+    "Võrumaa": "Võru", "Võru maakond": "Võru", "Võru maakonna": "Võru",
+    "Saaremaa": "Kuressaare", "Saare maakond": "Kuressaare", "Saare maakonna": "Kuressaare",
+    "Jõgevamaa": "Jõgeva", "Jõgeva maakond": "Jõgeva", "Jõgeva maakonna": "Jõgeva",
+    "Järvamaa": "Paide", "Järva maakond": "Paide", "Järva maakonna": "Paide",
+    "Valgamaa": "Valga", "Valga maakond": "Valga", "Valga maakonna": "Valga",
+    "Põlvamaa": "Põlva", "Põlva maakond": "Põlva", "Põlva maakonna": "Põlva",
+    "Läänemaa": "Haapsalu", "Lääne maakond": "Haapsalu", "Lääne maakonna": "Haapsalu",
+    "Hiiumaa": "Kärdla", "Hiiu maakond": "Kärdla", "Hiiu maakonna": "Kärdla",
+}
+
+# Riik (ja mõni piirkond) -> pealinn või suurim linn
+COUNTRIES: Dict[str, Dict[str, str]] = {
+    "et": {
+        "Eesti": "Tallinn", "Läti": "Riga", "Leedu": "Vilnius", "Soome": "Helsinki", "Rootsi": "Stockholm",
+        "Norra": "Oslo", "Taani": "Copenhagen", "Island": "Reykjavik", "Islandi": "Reykjavik",
+        "Saksamaa": "Berlin", "Inglismaa": "London", "Suurbritannia": "London", "Ühendkuningriik": "London",
+        "Ühendkuningriigi": "London", "Iirimaa": "Dublin", "Prantsusmaa": "Paris", "Holland": "Amsterdam",
+        "Hollandi": "Amsterdam", "Madalmaad": "Amsterdam", "Madalmaade": "Amsterdam", "Belgia": "Brussels",
+        "Luksemburg": "Luxembourg", "Luksemburgi": "Luxembourg", "Šveits": "Bern", "Šveitsi": "Bern",
+        "Austria": "Vienna", "Tšehhi": "Prague", "Slovakkia": "Bratislava", "Poola": "Warsaw",
+        "Ungari": "Budapest", "Sloveenia": "Ljubljana", "Horvaatia": "Zagreb", "Serbia": "Belgrade",
+        "Rumeenia": "Bucharest", "Bulgaaria": "Sofia", "Kreeka": "Athens", "Itaalia": "Rome",
+        "Hispaania": "Madrid", "Portugal": "Lisbon", "Portugali": "Lisbon", "Ukraina": "Kyiv",
+        "Valgevene": "Minsk", "Venemaa": "Moscow", "Türgi": "Ankara", "Ameerika": "Washington",
+        "USA": "Washington", "Ühendriigid": "Washington", "Ühendriikide": "Washington",
+    },
+    "en": {
+        "Estonia": "Tallinn", "Latvia": "Riga", "Lithuania": "Vilnius", "Finland": "Helsinki",
+        "Sweden": "Stockholm", "Norway": "Oslo", "Denmark": "Copenhagen", "Iceland": "Reykjavik",
+        "Germany": "Berlin", "England": "London", "Britain": "London", "Great Britain": "London",
+        "UK": "London", "United Kingdom": "London", "Ireland": "Dublin", "France": "Paris",
+        "Netherlands": "Amsterdam", "Holland": "Amsterdam", "Belgium": "Brussels", "Switzerland": "Bern",
+        "Austria": "Vienna", "Czechia": "Prague", "Czech Republic": "Prague", "Slovakia": "Bratislava",
+        "Poland": "Warsaw", "Hungary": "Budapest", "Slovenia": "Ljubljana", "Croatia": "Zagreb",
+        "Serbia": "Belgrade", "Romania": "Bucharest", "Bulgaria": "Sofia", "Greece": "Athens",
+        "Italy": "Rome", "Spain": "Madrid", "Portugal": "Lisbon", "Ukraine": "Kyiv", "Belarus": "Minsk",
+        "Russia": "Moscow", "Turkey": "Ankara", "USA": "Washington",
+        "United States": "Washington", "America": "Washington", "California": "Los Angeles",
+        "New York State": "New York",
+        # Kohalikud ja vanad nimed
+        "Kiev": "Kyiv", "Warszawa": "Warsaw", "Praha": "Prague", "Roma": "Rome", "Wien": "Vienna",
+        "München": "Munich", "Lisboa": "Lisbon", "St Petersburg": "Saint Petersburg",
+        "Washington DC": "Washington", "Washington D.C.": "Washington",
+    },
+}
+
+# Eesti riiginimed, mis nimetavas/omastavas kattuvad keele või rahvuse
+# omadussõnaga ("eesti keeles", "soome saun"): lausest (find_cities) neid
+# ilma käändelõputa ei võeta; tööriista argumendina (resolve) kehtivad
+ET_ADJECTIVE_ALIASES = frozenset({
+    "eesti", "läti", "leedu", "soome", "rootsi", "norra", "taani", "islandi", "hollandi", "šveitsi",
+    "tšehhi", "poola", "ungari", "kreeka", "itaalia", "hispaania", "portugali", "türgi", "ukraina",
+})
+
+# Eesti käändelõpud omastava tüve järel, pikim enne (Tartusse, Tartust, Tartus)
+ET_CASE_ENDINGS = ("sse", "st", "lt", "le", "ks", "ni", "na", "ta", "ga", "s", "l")
+# Tundmatu nime lõpu eemaldamisel peab tüvi jääma vähemalt nii pikk
+MIN_STEM = 3
+
+_WORD = re.compile(r"[\w.-]+")
+
+
+@dataclass(frozen=True)
+class Place:
+    name: str
+    lat: float
+    lon: float
+    country: str
+
+    def as_geocode(self) -> Dict[str, object]:
+        """Sama kuju nagu OpenWeatherClient.geocode() tulemus."""
+        return {"lat": self.lat, "lon": self.lon, "name": self.name, "country": self.country}
+
+
+def words(text: str) -> List[str]:
+    """Väiketähtedega sõnad (sidekriipsuga nimed jäävad üheks sõnaks)."""
+    return [w.strip(".") for w in _WORD.findall(text.lower()) if w.strip(".")]
+
+
+def _key(text: str) -> str:
+    return " ".join(words(text))
+
+
+@lru_cache(maxsize=None)
+def index(lang: str) -> Dict[str, str]:
+    """Tüvi (väiketähtedega) -> kanooniline nimi."""
+    forms: Dict[str, str] = {}
+    for name, (_lat, _lon, _country, stems) in PLACES.items():
+        forms[_key(name)] = name
+        if lang == "et":
+            for stem in stems:
+                forms.setdefault(_key(stem), name)
+    if lang == "et":
+        for alias, name in COUNTIES_ET.items():
+            forms.setdefault(_key(alias), name)
+    for alias, name in COUNTRIES.get(lang, {}).items():
+        forms.setdefault(_key(alias), name)
+    return forms
+
+
+def lookup(phrase: str, lang: str) -> Optional[str]:
+    """Üks sõna või fraas (väiketähtedega) -> kanooniline nimi; eesti keeles ka käändes."""
+    forms = index(lang)
+    name = forms.get(phrase)
+    if name is not None or lang != "et":
+        return name
+    for ending in ET_CASE_ENDINGS:
+        if phrase.endswith(ending):
+            name = forms.get(phrase[: -len(ending)])
+            if name is not None:
+                return name
+    return None
+
+
+def strip_case(word: str) -> Optional[str]:
+    """Tundmatu eesti nime tõenäoline nimetav/omastav tüvi (Kilingi-Nõmmel -> Kilingi-Nõmme)."""
+    for ending in ET_CASE_ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM:
+            return word[: -len(ending)]
+    return None
+
+
+def place(name: str) -> Place:
+    lat, lon, country, _stems = PLACES[name]
+    return Place(name, lat, lon, country)
+
+
+@lru_cache(maxsize=None)
+def regions(lang: str) -> Dict[str, str]:
+    """Koma järel lubatud täpsustus (riik, eesti keeles ka maakond; väiketähtedega) -> kanooniline nimi."""
+    forms: Dict[str, str] = {}
+    # Mudel kirjutab täpsustuse sageli inglise keeles ka eesti keele paketis
+    for aliases in (COUNTRIES.get(lang, {}), COUNTRIES["en"]):
+        for alias, name in aliases.items():
+            forms.setdefault(_key(alias), name)
+    if lang == "et":
+        for alias, name in COUNTIES_ET.items():
+            forms.setdefault(_key(alias), name)
+    return forms
+
+
+def qualifier_matches(qualifier: str, country: str, lang: str) -> bool:
+    """Kas täpsustus ("LV", "Läti", "Harjumaa") viitab samale riigile kui `country`."""
+    key = _key(qualifier)
+    if key.upper() == country:
+        return True
+    name = regions(lang).get(key)
+    return name is not None and PLACES[name][2] == country
+
+
+def resolve(text: str, lang: str) -> Optional[Place]:
+    """Tööriista argument (nt "Tartus", "Saaremaa", "Läti", "Riga, LV") -> koht või None.
+
+    Koma järel oleva täpsustuse korral ("London, CA", "Paris, US") kehtib
+    tabeli kirje ainult siis, kui viimane täpsustus sobib kirje riigiga;
+    muidu jäetakse nimi geokodeerimise hooleks.
+    """
+    parts = [part for part in text.split(",") if part.strip()]
+    phrase = _key(parts[0]) if parts else ""
+    name = lookup(phrase, lang) if phrase else None
+    if name is None:
+        return None
+    found = place(name)
+    if len(parts) > 1 and not qualifier_matches(parts[-1], found.country, lang):
+        return None
+    return found
+
+
+def find_cities(text: str, lang: str) -> List[str]:
+    """Kõik lauses mainitud teadaolevad kohad (kanoonilised nimed, esinemise järjekorras).
+
+    Omadussõnaga kattuvaid riiginimesid (ET_ADJECTIVE_ALIASES) loetakse ainult
+    käändes ("Eestis", "Soomes"; mitte "eesti keeles").
+    """
+    tokens = words(text)
+    found: List[str] = []
+    i = 0
+    while i < len(tokens):
+        # Kolme- ja kahesõnalised nimed enne ühesõnalisi
+        for size in (3, 2, 1):
+            if i + size > len(tokens):
+                continue
+            phrase = " ".join(tokens[i:i + size])
+            if lang == "et" and phrase in ET_ADJECTIVE_ALIASES:
+                continue
+            name = lookup(phrase, lang)
+            if name is not None:
+                if name not in found:
+                    found.append(name)
+                i += size
+                break
+        else:
+            i += 1
+    return found
@@ -0,0 +1,107 @@
+"""intent.py
+Ilmaküsimuse kavatsuse ja väärtuste (linn, päevade arv) tuvastamine ilma LLM-ita.
+
+Kasutavad kiirtee (fast_path.py, lõplik transkriptsioon) ja ennetav päring
+(prefetch.py, vahepealsed transkriptsioonid). Sõnavara on keele kaupa nagu
+numerals.py-s.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from gazetteer import find_cities, words
+
+# Pikemad laused sisaldavad tavaliselt veel midagi, millele peab vastama LLM
+MAX_WORDS = 12
+DEFAULT_FORECAST_DAYS = 5
+
+
+@dataclass(frozen=True)
+class Vocabulary:
+    weather: FrozenSet[str]
+    forecast: FrozenSet[str]
+    # sõna -> (esimene päev 0-st, päevi kokku), nt homme -> ainult teine päev;
+    # päevad loetakse linna kohalikust tänasest kuupäevast (weather_tools.forecast_fields)
+    day_words: Dict[str, Tuple[int, int]]
+    day_units: FrozenSet[str]
+    numbers: Dict[str, int]
+    # Kellaaeg, minevik, võrdlus: kiirtee mall sellele ei vasta
+    blockers: FrozenSet[str]
+
+
+VOCABULARY: Dict[str, Vocabulary] = {
+    "et": Vocabulary(
+        weather=frozenset({"ilm", "ilma", "ilmaga", "ilmad", "temperatuur", "temperatuuri", "kraadi", "sooja", "külma"}),
+        forecast=frozenset({"prognoos", "prognoosi", "ilmaprognoos", "ilmaprognoosi", "ennusta", "ennustus",
+                            "järgmised", "järgmise", "järgmiseks", "lähipäevad", "lähipäevadel"}),
+        day_words={"homme": (1, 2), "homsel": (1, 2), "ülehomme": (2, 3), "nädal": (0, 5), "nädala": (0, 5),
+                   "nädalaks": (0, 5)},
+        day_units=frozenset({"päev", "päeva", "päevaks", "päevane", "päevast", "päevase"}),
+        numbers={"üks": 1, "ühe": 1, "üheks": 1, "kaks": 2, "kahe": 2, "kaheks": 2, "kolm": 3, "kolme": 3,
+                 "kolmeks": 3, "neli": 4, "nelja": 4, "neljaks": 4, "viis": 5, "viie": 5, "viieks": 5},
+        blockers=frozenset({"kell", "kella", "hommikul", "lõunal", "pärastlõunal", "õhtul", "öösel", "eile",
+                            "tund", "tunni", "tunniks", "võrreldes", "kui", "miks"}),
+    ),
+    "en": Vocabulary(
+        weather=frozenset({"weather", "temperature", "degrees", "warm", "cold", "hot"}),
+        forecast=frozenset({"forecast", "predict", "next", "coming"}),
+        day_words={"tomorrow": (1, 2), "week": (0, 5)},
+        day_units=frozenset({"day", "days"}),
+        numbers={"one": 1, "two": 2, "three": 3, "four": 4, "five": 5},
+        blockers=frozenset({"morning", "afternoon", "evening", "tonight", "night", "yesterday", "o'clock",
+                            "hour", "hours", "pm", "am", "than", "why", "after"}),
+    ),
+}
+
+
+@dataclass(frozen=True)
+class Intent:
+    kind: str           # "weather" | "forecast"
+    city: str           # kanooniline nimi (gazetteer.PLACES)
+    days: int = 1       # mitu päeva prognoosist tuua
+    first_day: int = 0  # mitmendast päevast vastata (homme -> 1, kohaliku tänase kuupäeva suhtes)
+
+
+def extract(text: str, lang: str) -> Optional[Intent]:
+    """Kavatsus ja väärtused kindla vaste korral, muidu None."""
+    vocab = VOCABULARY.get(lang)
+    if vocab is None:
+        return None
+    tokens = words(text)
+    if not tokens or len(tokens) > MAX_WORDS or vocab.blockers.intersection(tokens):
+        return None
+    cities = find_cities(text, lang)
+    if len(cities) != 1:
+        return None
+
+    days: Optional[int] = None
+    first_day = 0
+    for i, token in enumerate(tokens):
+        if token in vocab.day_words:
+            if days is not None:
+                return None  # mitu ajamäärangut
+            first_day, days = vocab.day_words[token]
+        elif token in vocab.day_units and i > 0:
+            prev = tokens[i - 1]
+            count = int(prev) if prev.isdigit() else vocab.numbers.get(prev)
+            if count is not None:
+                if days is not None or not 1 <= count <= DEFAULT_FORECAST_DAYS:
+                    return None
+                days, first_day = count, 0
+
+    if days is not None or vocab.forecast.intersection(tokens):
+        return Intent("forecast", cities[0], days or DEFAULT_FORECAST_DAYS, first_day)
+    if vocab.weather.intersection(tokens):
+        return Intent("weather", cities[0])
+    return None
+
+
+def wants_forecast(tokens: List[str], lang: str) -> bool:
+    """Kas sõnades on prognoosile viitav sõna või päevade arv."""
+    vocab = VOCABULARY.get(lang)
+    if vocab is None:
+        return False
+    return bool(vocab.forecast.intersection(tokens) or vocab.day_units.intersection(tokens)
+                or vocab.day_words.keys() & set(tokens))
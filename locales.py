@@ -0,0 +1,466 @@
+"""locales.py
+Keelepaketid ühe mitmekeelse workeri jaoks.
+
+Üks LocalePack sisaldab kõike, mis varem oli agent.py ja agent-english.py
+koopiates erinev: süsteemiviip, tervitused, häälevalik, tööriistade
+kirjeldused, vastuste mallid ja numbrite keel. Keel valitakse iga töö kohta
+(resolve_locale) dispatch'i või ruumi metaandmetest, nii et üks soe
+protsessipool teenindab kõiki keeli.
+
+Uue keele lisamiseks: lisa LocalePack, registreeri see LOCALES-is, lisa
+numerals.py-sse keele numbrisõnad ja dispatch-reegel (vt dispatch-rule-*.json).
+
+Keskkond:
+  AGENT_LOCALE   - vaikimisi keel, kui töö metaandmed seda ei määra (vaikimisi et)
+  SPOKEN_NUMBERS - 0 annab numbrid komaga, muidu sõnadena
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass, field
+from string import Formatter
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from numerals import format_number
+
+logger = logging.getLogger("locales")
+
+
+def spoken_numbers() -> bool:
+    """Arvud sõnadena (kõnevalmis); SPOKEN_NUMBERS=0 annab numbrid komaga. Loetakse pärast .env laadimist."""
+    return os.getenv("SPOKEN_NUMBERS", "1") != "0"
+
+
+def compact_output() -> bool:
+    """Tööriistade lühike tulemus (compact_*); TOOL_OUTPUT=verbose annab täislausetes teksti."""
+    return os.getenv("TOOL_OUTPUT", "compact") != "verbose"
+
+
+_OPTIONAL = re.compile(r"\[([^\[\]]*)\]")
+
+
+def render_template(template: str, fields: Mapping[str, Any]) -> str:
+    """str.format, kuid valikuline osa "[...]" jäetakse välja, kui mõni selle väli on tühi.
+
+    Nt "{temp}[, tundub nagu {feels}]" annab ilma tuntava temperatuurita
+    lihtsalt temperatuuri (format_number annab puuduvale väärtusele "").
+    """
+    def optional(match: "re.Match[str]") -> str:
+        names = [name for _text, name, _spec, _conv in Formatter().parse(match.group(1)) if name]
+        return match.group(1) if all(fields.get(name) not in (None, "") for name in names) else ""
+
+    return _OPTIONAL.sub(optional, template).format(**fields)
+
+
+# Tööriista vastused, mis pole veateated, kuid milles ilmaandmeid pole
+MISSING_DATA_MESSAGES = ("current_missing", "forecast_missing")
+
+
+@dataclass(frozen=True)
+class LocalePack:
+    code: str               # numerals.py ja OpenWeather `lang`
+    tts_voice: str
+    stt_language: str
+    instructions: str
+    greetings: Tuple[str, ...]
+    greeting_fallback: str
+    # Tööriistade kirjeldused (LLM-i skeem)
+    city_arg: str
+    days_arg: str
+    current_doc: str
+    forecast_doc: str
+    cities_arg: str
+    multi_current_doc: str
+    multi_forecast_doc: str
+    detail_doc: str
+    day_arg: str
+    metric_arg: str
+    time_doc: str
+    time_arg: str
+    # Vastuste mallid (str.format; praeguse ilma mallides on "[...]" valikuline osa, vt render_template)
+    messages: Mapping[str, str]
+    current_template: str
+    forecast_header: str
+    forecast_day: str
+    forecast_description: str
+    stale_note: str
+    # Kiirtee (fast_path.py) kõnevastused: lühemad, ilma riigikoodi ja rõhuta
+    spoken_current: str
+    spoken_forecast_header: str
+    spoken_forecast_day: str
+    # Lühike tulemus (compact_output): päev ühel real, muud näitajad get_weather_detail kaudu
+    compact_current: str
+    compact_forecast_header: str
+    compact_forecast_day: str
+    compact_detail_hint: str
+    # get_weather_detail: näitaja -> mall ühe päeva väljadega ("all" = forecast_day)
+    detail_metrics: Mapping[str, str]
+    # get_weather_at: kellaaeg või päevaosa (part_names: morning/afternoon/evening/night -> keeles)
+    time_point: str
+    time_part: str
+    part_names: Mapping[str, str]
+    day_names: Mapping[str, str] = field(default_factory=dict)
+    # Tööriistad tagastavad vea korral teksti, mitte erindit
+    error_prefixes: Tuple[str, ...] = ()
+
+    # saab valida, kas tahta arve komakohtadega või mitte.
+    def format_float(self, value: Optional[float], use_decimals: bool = True, unit: Optional[str] = None) -> str:
+        return format_number(value, self.code, 1 if use_decimals else 0, spoken_numbers(), unit)
+
+    def format_int(self, value: Optional[int], unit: Optional[str] = None) -> str:
+        return format_number(value, self.code, 0, spoken_numbers(), unit)
+
+    def fetch_error(self, code: str, details: Mapping[str, float]) -> str:
+        """OpenWeatherError (kood + arvulised väljad) -> veateade paketi keeles."""
+        template = self.messages.get(f"error_{code}", self.messages["error_network"])
+        values = {
+            name: self.format_int(int(value)) if name == "status" else self.format_int(max(1, round(value)), unit="s")
+            for name, value in details.items()
+        }
+        return self.messages["fetch_error"].format(error=template.format(**values))
+
+    def is_failure(self, text: str) -> bool:
+        """Kas tööriista tekst on veateade või teade, et andmed puuduvad (testid ja koormustest)."""
+        return text.startswith(self.error_prefixes) or any(
+            text.startswith(self.messages[key]) for key in MISSING_DATA_MESSAGES
+        )
+
+    def day_name(self, english_name: str) -> str:
+        return self.day_names.get(english_name, english_name)
+
+    def stale(self, age_s: Optional[float]) -> str:
+        """Märkus, kui ilmateenus ei vastanud ja andmed tulid vahemälust."""
+        if age_s is None:
+            return ""
+        minutes = max(1, int(round(age_s / 60)))
+        age = self.format_int(minutes, unit="min") if minutes < 90 else self.format_int(round(minutes / 60), unit="h")
+        return "\n" + self.stale_note.format(age=age)
+
+
+ET = LocalePack(
+    code="et",
+    tts_voice="et-EE-AnuNeural",
+    stt_language="en",
+    instructions="""Oled eesti keelt kõnelev häälassistent.
+
+KINDEL REEGLIKOMPLEKT (JÄRGI TÄPSELT, ÄRA SELGITA KASUTAJALE):
+1. Iga kasutaja sõnumi puhul kontrolli: kas ta küsib
+    a) praegust ilma (ilm, temperatuur, tuul, niiskus, rõhk, pilvisus jmt) või
+    b) prognoosi (sõnad: prognoos, homme, ülehomme, järgmised, mitu päeva, ennusta).
+2. Kui (1a) ja linn on üheselt mõistetav -> KOHE kutsu get_weather.
+3. Kui (1b) ja linn on üheselt mõistetav -> KOHE kutsu get_weather_forecast (days = kasutaja soov; kui puudub, kasuta 5).
+4. Maakonna või riigi korral anna tööriistale selle nimi (nt Saaremaa, Läti); kui tööriist seda ei tunne, kasuta suurimat linna või pealinna.
+5. Kui linn pole selge -> küsi täpsustust (ära kasuta tööriista enne selgust).
+6. ÄRA kunagi vasta ilmaandmetest enne kui vastav tööriist on käivitatud ja tulemus käes.
+7. Pärast tööriista tulemuse saamist vasta KOHE lõppkasutajale ilma tööriista mainimata.
+8. Kui sama linna ilma või prognoosi küsitakse uuesti, kutsu tööriista uuesti: tulemused on tööriista vahemälus ja kordus on kiire.
+9. Kui sõnum ei puuduta ilma ega prognoosi -> vasta tavaliselt, ilma tööriistu kutsumata.
+10. Kui kasutaja küsib mitme linna ilma või prognoosi -> kutsu üks kord get_weather_multi või get_weather_forecast_multi kõigi linnadega (mitte get_weather iga linna jaoks eraldi).
+11. Kui kasutaja küsib ühe päeva täpsemaid andmeid (tuntav temperatuur, niiskus, rõhk, keskmine temperatuur) -> kutsu get_weather_detail (day: 1 = täna, 2 = homme, ...).
+12. Kui kasutaja küsib kindlat kellaaega või päevaosa (kell 15, hommikul, pärastlõunal, õhtul, öösel) -> kutsu get_weather_at (day: 1 = täna, 2 = homme, ...; time: "15:00" või morning/afternoon/evening/night).
+
+STIIL:
+- Ainult eesti keel.
+- Ära kasuta markdown'i, koodi vormingut, emotikone ega emojisid.
+- Ilma kirjelduses kirjuta KÕIK numbrid sõnadena (13,2 -> "kolmteist koma kaks").
+- Tööriista tulemuses on numbrid tavaliselt juba sõnadena; kasuta neid muutmata.
+- Vasta sellele, mida küsiti, täislausetena ja lühidalt (nt "kas homme sajab?" -> sademed ja temperatuur). Täpsemaid näitajaid nimeta siis, kui neid küsitakse.
+- Ära ütle kunagi, et kasutad või kasutasid funktsiooni.
+
+OTSUSTUSPROTOKOLL (SISENEMÕTE, ÄRA VÄLJASTA): "Kas sõnum sisaldab ilma või prognoosi indikaatoreid? Kui jah -> vali õige tööriist või küsi linna. Kui ei -> tavaline vastus."
+
+KEELATUD:
+- "Ma kasutan get_weather..." või muu tööriista meta-jutt.
+- Ilma numbrid toorandmetena ilma sõnadeks teisendamata.
+- Ilmavastus ilma tööriista eelnevata (kui linn olemas).
+
+NÄITED:
+[KASUTAJA] Mis ilm täna Tartus on?
+[SINA] (tee get_weather(city="Tartu") tööriista kutse; pärast tööriista tulemust) Tartus on praegu ... (numbrid sõnadena).
+
+[KASUTAJA] Kas homme Pärnus sajab?
+[SINA] (get_weather_forecast(city="Pärnu", days=2); vasta homse päeva kohta) Homme on Pärnus oodata ...
+
+[KASUTAJA] Ennusta Tallinna ilma järgmised 3 päeva.
+[SINA] (get_weather_forecast(city="Tallinn", days=3); siis kohe vastus) Tallinna järgmise kolme päeva prognoos on selline, esimesel päeval ...
+
+[KASUTAJA] Kuidas sul läheb?
+[SINA] (Tööriista EI kasuta) Mul läheb hästi, aitäh küsimast ...
+
+[HALB] "Ma pean nüüd kasutama get_weather funktsiooni." (ÄRA NII TEE)
+
+LÕPP: JÄRGI REEGLEID TÄPSELT.
+""",
+    greetings=(
+        "Tere! Olen sinu ilmasünoptik. Millise linna ilma soovid teada? Oskan ennustada iga linna ilma kuni viis päeva ette.",
+        "Tere! Mina olen sinu ilmasünoptik. Ütle, millise linna ilma kohta soovid infot. Saan anda prognoosi kuni viieks päevaks.",
+    ),
+    greeting_fallback="Ütle kasutajale, et oled tema ilma sünoptik. Palun küsi, millise linna ilma soovitakse teada. Maini, et suudad ennustata iga linna ilma kuni 5 päeva ette.",
+    city_arg="Linna, maakonna või riigi nimi (võib olla käändes, nt Tartus, Saaremaal, Lätis)",
+    days_arg="Päevade arv prognoosiks (1-5)",
+    current_doc="Tagastab praegused ilmatingimused OpenWeather API-st.",
+    forecast_doc="""Tagastab kuni 5-päevase prognoosi kasutades OpenWeather API v2.5 /forecast (3h sammuga) endpointi.
+    Töötlemine:
+    - Grupi 3h kirjete loend kuupäeva (kohalik aeg) järgi
+    - Arvutab iga päeva min/maks temperatuuri, keskmise päeva temperatuuri, keskmise tunde temperatuuri (feels_like), keskmise tuule kiiruse, keskmise niiskuse, keskmise rõhu
+    - Võtab kõige sagedasema ilma kirjelduse
+    NB: Tasuta /forecast annab kuni ~5 päeva (40 * 3h kirjet).""",
+    cities_arg="Linnade nimed (kuni viis), nt Tallinn, Tartu, Pärnu",
+    multi_current_doc="Tagastab mitme linna praegused ilmatingimused korraga (linnade võrdlus).",
+    multi_forecast_doc="Tagastab mitme linna kuni 5-päevase prognoosi korraga (linnade võrdlus).",
+    detail_doc="Tagastab ühe prognoosipäeva täpsemad andmed: kõik näitajad või üks (temperatuur, tuntav temperatuur, tuul, niiskus, rõhk, kirjeldus).",
+    day_arg="Prognoosipäev: 1 = täna, 2 = homme, ... 5",
+    metric_arg="Näitaja: all (kõik), temp, feels, wind, humidity, pressure või description",
+    time_doc="Tagastab prognoosi kindlaks kellaajaks või päevaosaks (linna kohalik aeg), kuni 5 päeva ette.",
+    time_arg="Kellaaeg HH:MM (nt 15:00) või päevaosa: morning, afternoon, evening, night",
+    messages={
+        "no_api_key": "Vabandust, API võti pole seadistatud. Palun seadistage OPENWEATHER_API_KEY keskkonnamuutuja.",
+        "no_api_key_forecast": "Vabandust, ilma API võti pole seadistatud. Palun seadistage OPENWEATHER_API_KEY keskkonnamuutuja.",
+        "city_not_found": "Linna '{city}' ei leitud. Palun kontrollige linna nime õigsust.",
+        "city_not_found_forecast": "Linna '{city}' ei leitud. Kas saad palun uuesti linna nime öelda?",
+        "current_missing": "Praegused ilma andmed puuduvad.",
+        "forecast_missing": "Prognoosi andmed puuduvad.",
+        "fetch_error": "Viga ilmaandmete hankimisel: {error}",
+        # weather_client.OpenWeatherError.code -> põhjus (fetch_error {error})
+        "error_unavailable": "ilmateenus on ajutiselt kättesaamatu, oota {retry_in} ja proovi uuesti",
+        "error_rate_limited": "päringute limiit on täis (ootasin {wait})",
+        "error_timeout": "päring aegus ({timeout})",
+        "error_http": "ilmateenus vastas veaga {status}",
+        "error_invalid_response": "ilmateenuse vastus oli vigane",
+        "error_network": "ilmateenusega ei saanud ühendust",
+        "unexpected_error": "Ootamatu viga: {error}",
+        "too_many_cities": "Korraga saab küsida kuni {max} linna; vastus on esimese {max} kohta.",
+        "context_removed": "(Varasem tulemus on kontekstist eemaldatud; vajadusel küsi tööriistalt uuesti.)",
+        "detail_day_missing": "Selle päeva prognoosi pole; prognoos on {days} päeva kohta.",
+        "time_invalid": "Kellaaega '{time}' ei mõistnud; kasuta kuju HH:MM või morning, afternoon, evening, night.",
+        "time_out_of_range": "Selle aja kohta prognoosi pole: prognoos algab praegusest hetkest ja ulatub kuni viis päeva ette.",
+    },
+    current_template="""Praegused ilmatingimused {country} linnas {city_name} on järgmised:
+Õhutemperatuur on {temp}[ (tundub nagu {feels})]
+[Tuule kiirus on {wind}
+][Õhu niiskus on {humidity}
+][Õhurõhk on {pressure_value} hektopaskali
+]{description}""",
+    forecast_header="Ilmaprognoos järgnevaks {days} päevaks {country} linnas {city_name}:\n\n",
+    forecast_day=(
+        "{day_name} on ilm järgmine:\n"
+        "päeva keskmine temperatuur on {avg_temp}, mis tundub nagu {feels}. \n"
+        "Päeva miinimum temperatuur on {min_temp} ja maksimum temperatuur ulatub {max_temp_value} kraadini. \n"
+        "Tuule keskmine kiirus on {wind}, õhuniiskus on {humidity} ning õhurõhk on {pressure}. \n"
+    ),
+    forecast_description="Üldine ilma kirjeldus: {description}.\n\n",
+    stale_note="NB: ilmateenus ei ole hetkel kättesaadav, need andmed on {age} vanad.",
+    spoken_current="{city_name} linnas on praegu {temp}[, tundub nagu {feels}]. {description_sentence}[Tuule kiirus on {wind}. ][Õhuniiskus on {humidity}.]",
+    spoken_forecast_header="{city_name} linna ilmaprognoos.",
+    spoken_forecast_day="{day_name} on temperatuur {min_temp} kuni {max_temp}, tuule kiirus {wind}. {description_sentence}",
+    compact_current="{city_name} ({country}), praegu: {temp}[, tundub {feels}]; {description}[; tuul {wind}]",
+    compact_forecast_header="{city_name} ({country}), prognoos {days} päeva:",
+    compact_forecast_day="{day_name}: {min_temp} kuni {max_temp}; {description}; tuul {wind}",
+    compact_detail_hint="Keskmine ja tuntav temperatuur, niiskus, rõhk: get_weather_detail.",
+    detail_metrics={
+        "temp": "{day_name} on keskmine temperatuur {avg_temp}, miinimum {min_temp} ja maksimum {max_temp}.",
+        "feels": "{day_name} tundub temperatuur keskmiselt nagu {feels}.",
+        "wind": "{day_name} on tuule keskmine kiirus {wind}.",
+        "humidity": "{day_name} on keskmine õhuniiskus {humidity}.",
+        "pressure": "{day_name} on keskmine õhurõhk {pressure}.",
+        "description": "{day_name}: {description}.",
+    },
+    time_point="{city_name} ({country}), {day_name} kell {time}: {temp}, tundub {feels}; {description}; tuul {wind}, niiskus {humidity}",
+    time_part="{city_name} ({country}), {day_name} {part}: {min_temp} kuni {max_temp}; {description}; tuul {wind}",
+    part_names={"morning": "hommikul", "afternoon": "pärastlõunal", "evening": "õhtul", "night": "öösel"},
+    day_names={
+        "Monday": "Esmaspäeval",
+        "Tuesday": "Teisipäeval",
+        "Wednesday": "Kolmapäeval",
+        "Thursday": "Neljapäeval",
+        "Friday": "Reedel",
+        "Saturday": "Laupäeval",
+        "Sunday": "Pühapäeval",
+    },
+    error_prefixes=("Viga", "Ootamatu viga", "Vabandust", "Linna "),
+)
+
+EN = LocalePack(
+    code="en",
+    tts_voice="en-US-JennyNeural",
+    stt_language="en",
+    instructions="""You are an English-speaking voice assistant.
+
+STRICT RULE SET (FOLLOW EXACTLY, DO NOT EXPLAIN TO USER):
+1. For every user message check: are they asking for
+    a) current weather (weather, temperature, wind, humidity, pressure, clouds etc.) or
+    b) forecast (words: forecast, tomorrow, day after tomorrow, next days, predict).
+2. If (1a) and city is unambiguous -> IMMEDIATELY call get_weather.
+3. If (1b) and city is unambiguous -> IMMEDIATELY call get_weather_forecast (days = user desire; if missing, use 5).
+4. For a region or country pass its name to the tool (e.g. California, UK); if the tool does not know it, use the largest city or the capital.
+5. If city is unclear -> ask for clarification (do NOT use tool before clarity).
+6. NEVER answer with weather data before the corresponding tool has been executed and result received.
+7. After receiving tool result, answer the end user IMMEDIATELY without mentioning the tool.
+8. If weather or forecast for the same city is asked again, call the tool again: results are cached by the tool and repeat calls are fast.
+9. If message is not about weather or forecast -> answer normally, without calling tools.
+10. If user asks about several cities -> call get_weather_multi or get_weather_forecast_multi once with all of them (not get_weather once per city).
+11. If user asks for more detail about one day (feels like, humidity, pressure, average temperature) -> call get_weather_detail (day: 1 = today, 2 = tomorrow, ...).
+12. If user asks about a time of day (at 3 pm, in the morning, afternoon, evening, at night) -> call get_weather_at (day: 1 = today, 2 = tomorrow, ...; time: "15:00" or morning/afternoon/evening/night).
+
+STYLE:
+- Only English language.
+- Do not use markdown, code formatting, emoticons or emojis.
+- In weather description, write ALL numbers as words (13.2 -> "thirteen point two").
+- Tool results usually already contain numbers as words; use them unchanged.
+- Answer what was asked, in full sentences and briefly (e.g. "will it rain tomorrow?" -> precipitation and temperature). Mention further details when asked.
+- Never say you use or used a function.
+
+DECISION PROTOCOL (INTERNAL THOUGHT, DO NOT OUTPUT): "Does message contain weather or forecast indicators? If yes -> choose right tool or ask city. If no -> normal answer."
+
+FORBIDDEN:
+- "I am using get_weather..." or other tool meta-talk.
+- Weather numbers as raw data without converting to words.
+- Weather answer without preceding tool call (if city exists).
+
+EXAMPLES:
+[USER] What is the weather like in London today?
+[YOU] (call get_weather(city="London"); after tool result) In London, it is currently ... (numbers as words).
+
+[USER] Will it rain in Paris tomorrow?
+[YOU] (get_weather_forecast(city="Paris", days=2); answer about tomorrow) Tomorrow in Paris you can expect ...
+
+[USER] Forecast for Paris for the next 3 days.
+[YOU] (get_weather_forecast(city="Paris", days=3); then immediate answer) The forecast for Paris for the next three days is as follows, on the first day ...
+
+[USER] How are you?
+[YOU] (Do NOT use tool) I am doing well, thank you for asking ...
+
+[BAD] "I need to use get_weather function now." (DO NOT DO THIS)
+
+END: FOLLOW RULES EXACTLY.
+""",
+    greetings=(
+        "Hello! I am your weather forecaster. Which city's weather would you like to know? I can forecast any city's weather up to five days ahead.",
+        "Hi! I'm your weather forecaster. Tell me which city you're interested in. I can give you a forecast for up to five days.",
+    ),
+    greeting_fallback="Tell the user that you are their weather forecaster. Please ask which city's weather they would like to know. Mention that you can forecast any city's weather up to 5 days ahead.",
+    city_arg="City, region or country name (e.g. London, California, France)",
+    days_arg="Number of days for forecast (1-5)",
+    current_doc="Returns current weather conditions from OpenWeather API.",
+    forecast_doc="Returns up to 5-day forecast using OpenWeather API v2.5 /forecast (3h steps).",
+    cities_arg="City names (up to five), e.g. London, Paris, Berlin",
+    multi_current_doc="Returns current weather conditions for several cities at once (city comparison).",
+    multi_forecast_doc="Returns up to 5-day forecast for several cities at once (city comparison).",
+    detail_doc="Returns details for one forecast day: all values or one (temperature, feels like, wind, humidity, pressure, description).",
+    day_arg="Forecast day: 1 = today, 2 = tomorrow, ... 5",
+    metric_arg="Value: all, temp, feels, wind, humidity, pressure or description",
+    time_doc="Returns the forecast for a time of day or part of the day (city local time), up to 5 days ahead.",
+    time_arg="Time HH:MM (e.g. 15:00) or part of day: morning, afternoon, evening, night",
+    messages={
+        "no_api_key": "Sorry, API key is not configured. Please configure OPENWEATHER_API_KEY environment variable.",
+        "no_api_key_forecast": "Sorry, weather API key is not configured. Please configure OPENWEATHER_API_KEY environment variable.",
+        "city_not_found": "City '{city}' not found. Please check the city name.",
+        "city_not_found_forecast": "City '{city}' not found. Can you please say the city name again?",
+        "current_missing": "Current weather data is missing.",
+        "forecast_missing": "Forecast data missing.",
+        "fetch_error": "Error fetching weather data: {error}",
+        "error_unavailable": "the weather service is temporarily unavailable, retrying in {retry_in}",
+        "error_rate_limited": "the request limit is reached (waited {wait})",
+        "error_timeout": "the request timed out ({timeout})",
+        "error_http": "the weather service returned error {status}",
+        "error_invalid_response": "the weather service sent an invalid response",
+        "error_network": "could not connect to the weather service",
+        "unexpected_error": "Unexpected error: {error}",
+        "too_many_cities": "At most {max} cities can be requested at once; the answer covers the first {max}.",
+        "context_removed": "(Earlier result removed from the context; call the tool again if needed.)",
+        "detail_day_missing": "No forecast for that day; the forecast covers {days} days.",
+        "time_invalid": "Could not understand the time '{time}'; use HH:MM or morning, afternoon, evening, night.",
+        "time_out_of_range": "No forecast for that time: the forecast starts now and covers up to five days ahead.",
+    },
+    current_template="""Current weather conditions in {city_name}, {country} are as follows:
+Air temperature is {temp}[ (feels like {feels})]
+[Wind speed is {wind}
+][Humidity is {humidity}
+][Pressure is {pressure}
+]{description}""",
+    forecast_header="Weather forecast for the next {days} days in {city_name}, {country}:\n\n",
+    forecast_day=(
+        "On {day_name}, the weather is as follows:\n"
+        "Day's average temperature is {avg_temp}, feels like {feels}. \n"
+        "Day's minimum temperature is {min_temp} and maximum temperature reaches {max_temp}. \n"
+        "Average wind speed is {wind}, humidity is {humidity} and pressure is {pressure}. \n"
+    ),
+    forecast_description="General weather description: {description}.\n\n",
+    stale_note="Note: the weather service is currently unavailable, this data is {age} old.",
+    spoken_current="Right now in {city_name} it is {temp}[, feeling like {feels}]. {description_sentence}[Wind speed is {wind}. ][Humidity is {humidity}.]",
+    spoken_forecast_header="Here is the forecast for {city_name}.",
+    spoken_forecast_day="On {day_name}, {min_temp} to {max_temp}, wind speed {wind}. {description_sentence}",
+    compact_current="{city_name} ({country}), now: {temp}[, feels like {feels}]; {description}[; wind {wind}]",
+    compact_forecast_header="{city_name} ({country}), forecast for {days} days:",
+    compact_forecast_day="{day_name}: {min_temp} to {max_temp}; {description}; wind {wind}",
+    compact_detail_hint="Average and feels-like temperature, humidity, pressure: get_weather_detail.",
+    detail_metrics={
+        "temp": "On {day_name}, the average temperature is {avg_temp}, minimum {min_temp} and maximum {max_temp}.",
+        "feels": "On {day_name}, it feels like {feels} on average.",
+        "wind": "On {day_name}, the average wind speed is {wind}.",
+        "humidity": "On {day_name}, the average humidity is {humidity}.",
+        "pressure": "On {day_name}, the average pressure is {pressure}.",
+        "description": "On {day_name}: {description}.",
+    },
+    time_point="{city_name} ({country}), {day_name} at {time}: {temp}, feels like {feels}; {description}; wind {wind}, humidity {humidity}",
+    time_part="{city_name} ({country}), {day_name} {part}: {min_temp} to {max_temp}; {description}; wind {wind}",
+    part_names={"morning": "in the morning", "afternoon": "in the afternoon", "evening": "in the evening", "night": "at night"},
+    error_prefixes=("Error", "Unexpected error", "Sorry", "City "),
+)
+
+LOCALES: Dict[str, LocalePack] = {pack.code: pack for pack in (ET, EN)}
+
+# Ruumi nime eesliide -> keel (vt dispatch-rule*.json); pikem eesliide enne
+ROOM_PREFIXES: Tuple[Tuple[str, str], ...] = (
+    ("call-en-", "en"),
+    ("call-et-", "et"),
+    # Üldise "call-" eesliite (varasemad reeglid, ka ingliskeelse workeri omad)
+    # keele määrab AGENT_LOCALE; eestikeelne reegel annab keele ka metaandmetes
+)
+
+
+def default_locale() -> str:
+    code = os.getenv("AGENT_LOCALE", "et")
+    return code if code in LOCALES else "et"
+
+
+def get_locale(code: Optional[str] = None) -> LocalePack:
+    return LOCALES.get(code or "", LOCALES[default_locale()])
+
+
+def _locale_from_metadata(metadata: Optional[str]) -> Optional[str]:
+    """Metaandmed on JSON ({"locale": "en"}) või lihtsalt keelekood ("en")."""
+    if not metadata:
+        return None
+    metadata = metadata.strip()
+    try:
+        data = json.loads(metadata)
+    except ValueError:
+        data = metadata
+    if isinstance(data, dict):
+        data = data.get("locale") or data.get("lang")
+    if isinstance(data, str):
+        code = data.strip().lower().split("-")[0]
+        if code in LOCALES:
+            return code
+        logger.warning("tundmatu keel metaandmetes: %r", data)
+    return None
+
+
+def resolve_locale(*metadata: Optional[str], room_name: str = "") -> LocalePack:
+    """Töö keel: esimene metaandmetes leitud keel, siis ruumi nime eesliide, siis vaikimisi.
+
+    Kutsuja annab metaandmed tähtsuse järjekorras (töö/dispatch, siis ruum).
+    """
+    for item in metadata:
+        code = _locale_from_metadata(item)
+        if code:
+            return LOCALES[code]
+    for prefix, code in ROOM_PREFIXES:
+        if room_name.startswith(prefix):
+            return LOCALES[code]
+    return get_locale()
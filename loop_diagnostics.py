@@ -0,0 +1,273 @@
+"""loop_diagnostics.py
+Sündmustsükli blokeerimise detektor arendusrežiimile (python agent.py dev / console).
+
+Blokeeriv kutse (nt requests.get tööriistas) peatab kogu kõne: heli, STT ja
+LLM-i voog ootavad, kuni see lõpeb. Tootmises ei märka seda keegi, sest viga
+ei teki, ainult latentsus kasvab. LoopDiagnostics jookseb kõne protsessis:
+
+- südamelöök: iga 10 ms ajastatud tagasikutse mõõdab tsükli hilinemist;
+- valvurlõim: kui südamelööki pole olnud üle läve (vaikimisi 50 ms),
+  võetakse tsükli lõime pinust proov iga 5 ms järel, kuni tsükkel vabaneb;
+- omistamine: iga proov omistatakse tööriistale (tööriista funktsioon pinus),
+  selle repo koodile (moodul.funktsioon), LiveKiti pluginale või teegile;
+  eraldi märgitakse sisemine kaader, mis tegelikult blokeeris (nt lib:requests).
+
+Kõne lõpus kirjutatakse JSON aruanne (LOOP_DIAGNOSTICS_DIR, vaikimisi
+WEATHER_CACHE_DIR/diagnostics) ja kokkuvõte logisse "loop-diagnostics".
+Aruande saab hiljem üle vaadata ja piiri vastu kontrollida (CI):
+
+  python loop_diagnostics.py .cache/diagnostics/loop-*.json --max-stall-ms 100
+
+Keskkond:
+  LOOP_DIAGNOSTICS              - 1 sees, 0 väljas; määramata korral sees ainult dev/console režiimis
+  LOOP_DIAGNOSTICS_THRESHOLD_MS - blokeeringu lävi ms (vaikimisi 50)
+  LOOP_DIAGNOSTICS_DIR          - aruannete kataloog
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import collections
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Counter, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from weather_cache import cache_dir
+
+logger = logging.getLogger("loop-diagnostics")
+
+DEV_COMMANDS = ("dev", "console")
+HEARTBEAT_S = 0.01
+SAMPLE_S = 0.005
+DEFAULT_THRESHOLD_MS = 50.0
+STACK_DEPTH = 12
+MAX_LAG_SAMPLES = 200_000
+MAX_STALLS = 500
+
+_REPO = Path(__file__).resolve().parent
+_PLUGIN = re.compile(r"[/\\]livekit[/\\]plugins[/\\]([\w]+)")
+_PACKAGE = re.compile(r"[/\\](?:site|dist)-packages[/\\]([\w]+)")
+
+
+def enable_for_dev_mode(argv: Sequence[str]) -> None:
+    """Workeri main(): dev/console korral lülitab diagnostika sisse (tööprotsessid pärivad keskkonna)."""
+    if len(argv) > 1 and argv[1] in DEV_COMMANDS:
+        os.environ.setdefault("LOOP_DIAGNOSTICS", "1")
+
+
+def enabled() -> bool:
+    return os.getenv("LOOP_DIAGNOSTICS", "0") == "1"
+
+
+def report_dir() -> Path:
+    return Path(os.getenv("LOOP_DIAGNOSTICS_DIR") or cache_dir() / "diagnostics")
+
+
+@lru_cache(maxsize=4096)
+def classify(filename: str, function: str, tool_names: FrozenSet[str] = frozenset()) -> str:
+    """Kaadri omanik: tool:<nimi>, app:<moodul>.<funktsioon>, plugin:<nimi>, livekit, lib:<pakett> või stdlib."""
+    if function in tool_names:
+        return f"tool:{function}"
+    m = _PLUGIN.search(filename)
+    if m:
+        return f"plugin:{m.group(1)}"
+    m = _PACKAGE.search(filename)
+    if m:
+        return "livekit" if m.group(1) == "livekit" else f"lib:{m.group(1)}"
+    path = Path(filename)
+    if _REPO in path.parents:
+        return f"app:{path.stem}.{function}"
+    return f"stdlib:{path.stem}"
+
+
+@dataclass
+class Stall:
+    start: float
+    duration_ms: float
+    owner: str
+    leaf: str
+    samples: int
+    stack: List[str] = field(default_factory=list)
+
+
+class LoopDiagnostics:
+    """Ühe protsessi sündmustsükli hilinemine ja blokeeringute pinuproovid."""
+
+    def __init__(self, label: str = "", threshold_ms: Optional[float] = None, tool_names: Iterable[str] = ()) -> None:
+        self.label = label
+        self.threshold_s = (threshold_ms if threshold_ms is not None
+                            else float(os.getenv("LOOP_DIAGNOSTICS_THRESHOLD_MS", DEFAULT_THRESHOLD_MS))) / 1000
+        self.tool_names = frozenset(tool_names)
+        self.lags: collections.deque = collections.deque(maxlen=MAX_LAG_SAMPLES)
+        self.stalls: List[Stall] = []
+        self.blocked_by: Counter[str] = collections.Counter()
+        self.stacks: Counter[str] = collections.Counter()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread = 0
+        self._last_tick = 0.0
+        self._expected = 0.0
+        self._started = 0.0
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._started = self._last_tick = time.perf_counter()
+        self._expected = self._last_tick + HEARTBEAT_S
+        self._handle = self._loop.call_later(HEARTBEAT_S, self._tick)
+        self._watcher = threading.Thread(target=self._watch, daemon=True, name="loop-diagnostics")
+        self._watcher.start()
+
+    def _tick(self) -> None:
+        now = time.perf_counter()
+        self.lags.append(max(now - self._expected, 0.0))
+        self._last_tick = now
+        self._expected = now + HEARTBEAT_S
+        if not self._stop.is_set():
+            self._handle = self._loop.call_later(HEARTBEAT_S, self._tick)
+
+    def _watch(self) -> None:
+        samples: List[Tuple[str, str, Tuple[str, ...]]] = []
+        stalled_since = None
+        while not self._stop.wait(SAMPLE_S):
+            last_tick = self._last_tick
+            if time.perf_counter() - last_tick > self.threshold_s:
+                frame = sys._current_frames().get(self._loop_thread)
+                if frame is not None:
+                    samples.append(self._sample(frame))
+                stalled_since = last_tick
+            elif stalled_since is not None:
+                # Tsükkel vabanes: blokeering kestis viimasest südamelöögist enne seda kuni järgmiseni
+                self._record(stalled_since, last_tick, samples)
+                samples, stalled_since = [], None
+        if stalled_since is not None:
+            self._record(stalled_since, time.perf_counter(), samples)
+
+    def _sample(self, frame) -> Tuple[str, str, Tuple[str, ...]]:
+        labels: List[str] = []
+        stack: List[str] = []
+        while frame is not None:
+            code = frame.f_code
+            labels.append(classify(code.co_filename, code.co_name, self.tool_names))
+            if len(stack) < STACK_DEPTH:
+                stack.append(f"{Path(code.co_filename).name}:{code.co_name}:{frame.f_lineno}")
+            frame = frame.f_back
+        leaf = labels[0] if labels else "?"
+        # Omanik: tööriist, siis selle repo kood, siis plugin (sisemisest väljapoole), muidu sisemine kaader
+        owner = next((x for x in labels if x.startswith("tool:")), None)
+        owner = owner or next((x for x in labels if x.startswith("app:")), None)
+        owner = owner or next((x for x in labels if x.startswith("plugin:")), leaf)
+        return owner, leaf, tuple(stack)
+
+    def _record(self, start: float, end: float, samples: List[Tuple[str, str, Tuple[str, ...]]]) -> None:
+        duration_ms = (end - start - HEARTBEAT_S) * 1000
+        if not samples:
+            return
+        owner, leaf, stack = collections.Counter(samples).most_common(1)[0][0]
+        self.blocked_by[owner] += duration_ms
+        self.stacks[" <- ".join(stack)] += len(samples)
+        if len(self.stalls) < MAX_STALLS:
+            self.stalls.append(Stall(round(start - self._started, 3), round(duration_ms, 1), owner, leaf, len(samples), list(stack)))
+        logger.warning("sündmustsükkel blokeeritud %.0f ms: %s (%s) %s", duration_ms, owner, leaf, stack[0] if stack else "")
+
+    def report(self) -> Dict[str, object]:
+        lags = sorted(self.lags)
+
+        def pct(p: float) -> float:
+            return round(lags[min(int(p * len(lags)), len(lags) - 1)] * 1000, 1) if lags else 0.0
+
+        return {
+            "label": self.label,
+            "pid": os.getpid(),
+            "duration_s": round(time.perf_counter() - self._started, 1),
+            "threshold_ms": self.threshold_s * 1000,
+            "lag_ms": {"p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99), "max": pct(1.0)},
+            "stall_count": len(self.stalls),
+            "max_stall_ms": max((s.duration_ms for s in self.stalls), default=0.0),
+            "blocked_ms_by_owner": {k: round(v, 1) for k, v in self.blocked_by.most_common()},
+            "top_stacks": [{"samples": n, "stack": s} for s, n in self.stacks.most_common(10)],
+            "stalls": [asdict(s) for s in self.stalls],
+        }
+
+    async def aclose(self) -> None:
+        """Lõpetab mõõtmise ja kirjutab aruande (shutdown callback)."""
+        self._stop.set()
+        if self._handle is not None:
+            self._handle.cancel()
+        if self._watcher is not None:
+            await asyncio.to_thread(self._watcher.join)
+        data = self.report()
+        directory = report_dir()
+        name = re.sub(r"[^\w.-]", "_", self.label) or "session"
+        path = directory / f"loop-{name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.json"
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(data, ensure_ascii=False, indent=2))
+        except OSError as e:
+            logger.error("aruande kirjutamine ebaõnnestus (%s): %s", path, e)
+            path = None
+        for line in summary(data):
+            logger.info(line)
+        if path is not None:
+            logger.info("aruanne: %s", path)
+
+
+def summary(data: Dict[str, object]) -> List[str]:
+    lag = data["lag_ms"]
+    lines = [
+        f"sündmustsükkel ({data['label'] or 'sessioon'}, {data['duration_s']} s): "
+        f"hilinemine p50 {lag['p50']} ms, p95 {lag['p95']} ms, p99 {lag['p99']} ms, max {lag['max']} ms; "
+        f"blokeeringuid üle {data['threshold_ms']:g} ms: {data['stall_count']}, pikim {data['max_stall_ms']} ms",
+    ]
+    for owner, ms in data["blocked_ms_by_owner"].items():
+        lines.append(f"  {ms:8.1f} ms  {owner}")
+    for item in data["top_stacks"][:3]:
+        lines.append(f"  {item['samples']:4d} proovi: {item['stack']}")
+    return lines
+
+
+def start_loop_diagnostics(label: str = "", tool_names: Iterable[str] = ()) -> Optional[LoopDiagnostics]:
+    """Käivitab diagnostika tööprotsessis (kutsu entrypointist); väljas olles None."""
+    if not enabled():
+        return None
+    diagnostics = LoopDiagnostics(label, tool_names=tool_names)
+    diagnostics.start()
+    logger.info("sündmustsükli diagnostika sees (lävi %.0f ms)", diagnostics.threshold_s * 1000)
+    return diagnostics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sündmustsükli diagnostika aruannete kokkuvõte ja piiride kontroll")
+    parser.add_argument("reports", nargs="+", help="loop-*.json aruanded")
+    parser.add_argument("--max-stall-ms", type=float, help="Lõpeta veakoodiga 1, kui mõni blokeering on pikem")
+    parser.add_argument("--max-p99-ms", type=float, help="Lõpeta veakoodiga 1, kui hilinemise p99 on suurem")
+    args = parser.parse_args()
+
+    failed = False
+    for name in args.reports:
+        data = json.loads(Path(name).read_text())
+        print(name)
+        for line in summary(data):
+            print(line)
+        if args.max_stall_ms is not None and data["max_stall_ms"] > args.max_stall_ms:
+            print(f"[VIGA] blokeering {data['max_stall_ms']} ms > {args.max_stall_ms:g} ms")
+            failed = True
+        if args.max_p99_ms is not None and data["lag_ms"]["p99"] > args.max_p99_ms:
+            print(f"[VIGA] hilinemise p99 {data['lag_ms']['p99']} ms > {args.max_p99_ms:g} ms")
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
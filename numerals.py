@@ -0,0 +1,169 @@
+"""numerals.py
+Arvude kõnevalmis sõnastamine (eesti ja inglise keel).
+
+  number_to_words(13.2, "et")          -> "kolmteist koma kaks"
+  number_to_words(-4.0, "et")          -> "miinus neli"
+  with_unit(1013, "hPa", "et", 0)      -> "tuhat kolmteist hektopaskalit"
+  with_unit(81, "%", "en", 0)          -> "eighty-one percent"
+
+Ilmaandmete tavalised vahemikud (täisarvud 0..1199 ja temperatuurid kümnendiku
+täpsusega -60..60) on eelnevalt tabelitesse arvutatud, et tööriistakutse ajal
+piisaks ühest sõnastiku päringust.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Optional, Tuple
+
+_ET_DIGITS = ["null", "üks", "kaks", "kolm", "neli", "viis", "kuus", "seitse", "kaheksa", "üheksa"]
+_EN_SMALL = [
+    "zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine",
+    "ten", "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen",
+    "seventeen", "eighteen", "nineteen",
+]
+_EN_TENS = ["", "", "twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety"]
+
+_MINUS = {"et": "miinus", "en": "minus"}
+_POINT = {"et": "koma", "en": "point"}
+
+# ühik -> (ainsus, mitmus); eesti keeles järgneb arvule üks nimetav, muudele osastav
+_UNITS: Dict[str, Dict[str, Tuple[str, str]]] = {
+    "et": {
+        "%": ("protsent", "protsenti"),
+        "hPa": ("hektopaskal", "hektopaskalit"),
+        "°C": ("kraad", "kraadi"),
+        "m/s": ("meeter sekundis", "meetrit sekundis"),
+        "min": ("minut", "minutit"),
+        "h": ("tund", "tundi"),
+        "s": ("sekund", "sekundit"),
+    },
+    "en": {
+        "%": ("percent", "percent"),
+        "hPa": ("hectopascal", "hectopascals"),
+        "°C": ("degree", "degrees"),
+        "m/s": ("meter per second", "meters per second"),
+        "min": ("minute", "minutes"),
+        "h": ("hour", "hours"),
+        "s": ("second", "seconds"),
+    },
+}
+
+INT_TABLE_SIZE = 1200
+TENTHS_RANGE = 600  # -60,0 .. 60,0
+
+
+def _int_words_et(n: int) -> str:
+    if n < 10:
+        return _ET_DIGITS[n]
+    if n == 10:
+        return "kümme"
+    if n < 20:
+        return _ET_DIGITS[n - 10] + "teist"
+    if n < 100:
+        tens, rest = divmod(n, 10)
+        words = _ET_DIGITS[tens] + "kümmend"
+        return f"{words} {_ET_DIGITS[rest]}" if rest else words
+    if n < 1000:
+        hundreds, rest = divmod(n, 100)
+        words = "sada" if hundreds == 1 else _ET_DIGITS[hundreds] + "sada"
+        return f"{words} {_int_words_et(rest)}" if rest else words
+    for scale, one, many in ((10**9, "miljard", "miljardit"), (10**6, "miljon", "miljonit"), (1000, "tuhat", "tuhat")):
+        if n >= scale:
+            count, rest = divmod(n, scale)
+            words = one if count == 1 else f"{_int_words_et(count)} {many}"
+            return f"{words} {_int_words_et(rest)}" if rest else words
+    raise AssertionError(n)
+
+
+def _int_words_en(n: int) -> str:
+    if n < 20:
+        return _EN_SMALL[n]
+    if n < 100:
+        tens, rest = divmod(n, 10)
+        return f"{_EN_TENS[tens]}-{_EN_SMALL[rest]}" if rest else _EN_TENS[tens]
+    if n < 1000:
+        hundreds, rest = divmod(n, 100)
+        words = f"{_EN_SMALL[hundreds]} hundred"
+        return f"{words} {_int_words_en(rest)}" if rest else words
+    for scale, name in ((10**9, "billion"), (10**6, "million"), (1000, "thousand")):
+        if n >= scale:
+            count, rest = divmod(n, scale)
+            words = f"{_int_words_en(count)} {name}"
+            return f"{words} {_int_words_en(rest)}" if rest else words
+    raise AssertionError(n)
+
+
+_INT_WORDS = {"et": _int_words_et, "en": _int_words_en}
+_INT_TABLE: Dict[str, Tuple[str, ...]] = {
+    lang: tuple(fn(i) for i in range(INT_TABLE_SIZE)) for lang, fn in _INT_WORDS.items()
+}
+
+
+def int_to_words(n: int, lang: str = "et") -> str:
+    if n < 0:
+        return f"{_MINUS[lang]} {int_to_words(-n, lang)}"
+    if n < INT_TABLE_SIZE:
+        return _INT_TABLE[lang][n]
+    return _INT_WORDS[lang](n)
+
+
+def _compose(value: float, lang: str, decimals: int) -> str:
+    text = f"{abs(value):.{decimals}f}"
+    int_part, _, frac = text.partition(".")
+    frac = frac.rstrip("0")
+    words = int_to_words(int(int_part), lang)
+    if frac:
+        if lang == "en":
+            frac_words = " ".join(_EN_SMALL[int(d)] for d in frac)
+        else:
+            stripped = frac.lstrip("0")
+            zeros = ["null"] * (len(frac) - len(stripped))
+            frac_words = " ".join(zeros + [int_to_words(int(stripped), lang)])
+        words = f"{words} {_POINT[lang]} {frac_words}"
+    if value < 0 and (int(int_part) or frac):
+        words = f"{_MINUS[lang]} {words}"
+    return words
+
+
+_TENTHS_TABLE: Dict[str, Tuple[str, ...]] = {
+    lang: tuple(_compose(k / 10, lang, 1) for k in range(-TENTHS_RANGE, TENTHS_RANGE + 1))
+    for lang in _INT_WORDS
+}
+
+
+def number_to_words(value: float, lang: str = "et", decimals: int = 1) -> str:
+    """Ümardab väärtuse `decimals` kohani ja tagastab selle sõnadena (",0" jäetakse ära)."""
+    if decimals == 0:
+        return int_to_words(int(round(value)), lang)
+    if decimals == 1:
+        tenths = int(round(value * 10))
+        if -TENTHS_RANGE <= tenths <= TENTHS_RANGE:
+            return _TENTHS_TABLE[lang][tenths + TENTHS_RANGE]
+    return _compose(round(value, decimals), lang, decimals)
+
+
+def with_unit(value: float, unit: str, lang: str = "et", decimals: int = 1) -> str:
+    """Arv koos ühikuga, nt "kaheksakümmend üks protsenti"."""
+    words = number_to_words(value, lang, decimals)
+    singular, plural = _UNITS[lang][unit]
+    is_one = round(abs(value), decimals) == 1 and words.split()[-1] in ("üks", "one")
+    return f"{words} {singular if is_one else plural}"
+
+
+def format_number(
+    value: Optional[float], lang: str, decimals: int, spoken: bool, unit: Optional[str] = None
+) -> str:
+    """Tööriistade vormindus: sõnadena (spoken) või numbritena keele komaeraldajaga.
+
+    Kui `unit` on antud, lisatakse ühik õiges arvus (nt "üks kraad", "kaks kraadi").
+    Puuduv väärtus (None) annab tühja teksti; mallid jätavad selle osa välja
+    (locales.render_template).
+    """
+    if value is None:
+        return ""
+    if spoken:
+        return with_unit(value, unit, lang, decimals) if unit else number_to_words(value, lang, decimals)
+    text = f"{value:.{decimals}f}" if decimals else str(int(round(value)))
+    if lang == "et":
+        text = text.replace(".", ",")
+    return f"{text} {_UNITS[lang][unit][1]}" if unit else text
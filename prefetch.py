@@ -0,0 +1,163 @@
+"""prefetch.py
+Ennetav ilmapäring vahepealsetest (interim) STT transkriptsioonidest.
+
+Kui helistaja alles räägib ja vahepealses transkriptsioonis on tuntud linn
+(gazetteer.py), alustatakse taustal ilmapäringut madala prioriteediga
+(rate_limit.LOW); koordinaadid tulevad gazetteerist. Tulemus läheb
+tööriistade vahemällu, nii et kui LLM (või kiirtee) hiljem sama linna
+küsib, on andmed juba kohalikud või päring poolel teel (single-flight, prioriteet tõstetakse kõrgeks).
+
+Raisatud päringud on piiratud: vooru kohta kuni MAX_PER_TURN linna ja kui
+kõne jooksul on raisatud MAX_WASTED ennetust, lõpetatakse ennetamine selles
+kõnes. Ennetus (linn + endpoint) on "tabamus", kui tööriist küsis sama linna
+samast endpoint'ist enne vooru lõppu, muidu "raisatud". Vooru lõpus
+ennetused unustatakse, nii et järgmistes voorudes võib sama linna uuesti
+ennetada.
+
+Keskkond:
+  PREFETCH - 0 lülitab ennetuse välja (vaikimisi sees)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import os
+from dataclasses import dataclass
+from typing import Dict, Optional, Set, Tuple
+
+import prometheus_client
+
+from gazetteer import find_cities, place, words
+from intent import wants_forecast
+from locales import LocalePack
+from rate_limit import LOW
+from telemetry import DEPLOYMENT
+from weather_cache import normalize_city
+from weather_client import OpenWeatherError, get_client
+
+logger = logging.getLogger("prefetch")
+
+MAX_PER_TURN = 2
+MAX_WASTED = 4
+
+PREFETCHES = prometheus_client.Counter(
+    "voice_agent_prefetch",
+    "Ennetavad ilmapäringud tulemuse kaupa (hit, wasted, capped)",
+    ["deployment", "result"],
+)
+
+
+@dataclass
+class _Entry:
+    city: str
+    endpoint: str
+    used: bool = False
+
+
+_current: contextvars.ContextVar[Optional["Prefetcher"]] = contextvars.ContextVar("prefetcher", default=None)
+
+
+def note_lookup(city: str, endpoint: str) -> None:
+    """Tööriist küsis linna (endpoint: weather | forecast); aktiivse ennetaja korral arvestatakse tabamus."""
+    prefetcher = _current.get()
+    if prefetcher is not None:
+        prefetcher.note_lookup(city, endpoint)
+
+
+class Prefetcher:
+    def __init__(self, pack: LocalePack, max_per_turn: int = MAX_PER_TURN, max_wasted: int = MAX_WASTED) -> None:
+        self.pack = pack
+        self.max_per_turn = max_per_turn
+        self.max_wasted = max_wasted
+        self.enabled = os.getenv("PREFETCH", "1") != "0"
+        self.started = 0
+        self.hits = 0
+        self.wasted = 0
+        self.capped = 0
+        # Praeguse vooru ennetused: (linn, endpoint) -> kirje
+        self._entries: Dict[Tuple[str, str], _Entry] = {}
+        self._tasks: Set["asyncio.Task[None]"] = set()
+
+    def activate(self) -> None:
+        """Seob ennetaja praeguse kontekstiga; sealt loodud tööriistakutsed teatavad tabamustest."""
+        _current.set(self)
+
+    def attach(self, session) -> None:
+        session.on("user_input_transcribed", self._on_transcript)
+        session.on("agent_state_changed", self._on_agent_state)
+        session.on("close", lambda _ev: self._end_turn())
+
+    def _on_transcript(self, ev) -> None:
+        if ev.is_final or not self.enabled:
+            return
+        text = ev.transcript
+        cities = find_cities(text, self.pack.code)
+        if not cities:
+            return
+        forecast = wants_forecast(words(text), self.pack.code)
+        for city in cities:
+            self._prefetch(city, "forecast" if forecast else "weather")
+
+    def _prefetch(self, city: str, endpoint: str) -> None:
+        key = (normalize_city(city), endpoint)
+        if key in self._entries:
+            return
+        cities = {city_key for city_key, _endpoint in self._entries}
+        if self.wasted >= self.max_wasted or (key[0] not in cities and len(cities) >= self.max_per_turn):
+            self.capped += 1
+            PREFETCHES.labels(DEPLOYMENT, "capped").inc()
+            return
+        self._entries[key] = _Entry(city, endpoint)
+        self.started += 1
+        task = asyncio.get_running_loop().create_task(self._fetch(city, endpoint))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(self, city: str, endpoint: str) -> None:
+        client = get_client()
+        lang = self.pack.code
+        # find_cities annab gazetteeri kanoonilised nimed: koordinaadid on kohalikud
+        known = place(city)
+        lat, lon = known.lat, known.lon
+        try:
+            if endpoint == "forecast":
+                await client.forecast_days(lat, lon, lang=lang, priority=LOW)
+            else:
+                await client.current(lat, lon, lang=lang, priority=LOW)
+        except OpenWeatherError as e:
+            # Madal prioriteet: limiit täis või teenus maas; tööriist proovib ise uuesti
+            logger.debug("ennetus ebaõnnestus (%s, %s): %s", city, endpoint, e)
+        except Exception:
+            logger.exception("ennetus ebaõnnestus (%s, %s)", city, endpoint)
+
+    def note_lookup(self, city: str, endpoint: str) -> None:
+        entry = self._entries.get((normalize_city(city), endpoint))
+        if entry is not None and not entry.used:
+            entry.used = True
+            self.hits += 1
+            PREFETCHES.labels(DEPLOYMENT, "hit").inc()
+
+    def _on_agent_state(self, ev) -> None:
+        # Vooru lõpp: agent lõpetas rääkimise
+        if ev.old_state == "speaking" and ev.new_state == "listening":
+            self._end_turn()
+
+    def _end_turn(self) -> None:
+        for entry in self._entries.values():
+            if not entry.used:
+                self.wasted += 1
+                PREFETCHES.labels(DEPLOYMENT, "wasted").inc()
+        # Järgmises voorus võib samu linnu uuesti ennetada
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "started": self.started,
+            "hits": self.hits,
+            "wasted": self.wasted,
+            "capped": self.capped,
+            "hit_ratio": self.hits / self.started if self.started else 0.0,
+            "waste_ratio": self.wasted / self.started if self.started else 0.0,
+        }
@@ -0,0 +1,235 @@
+"""rate_limit.py
+OpenWeather päringute piiramine ja kaitselüliti.
+
+TokenBucket      - märgiämber (vaikimisi 60 päringut minutis). Olek hoitakse
+                   failis, mida lukustatakse fcntl-iga, nii et kõik sama
+                   workeri tööprotsessid jagavad üht limiiti. Ilma fcntl-ita
+                   (Windows) on ämber protsessi põhine.
+PriorityLimiter  - järjekord märkide ootamiseks: kõrge prioriteet (päring, mida
+                   ootab helistaja) saab märgi enne madalat (eelsoojendus,
+                   ennetav päring). Madala prioriteediga ootaja tõstetakse
+                   kõrgeks, kui sama päringut hakkab ootama helistaja.
+CircuitBreaker   - pärast järjestikuseid tõrkeid lõpetab päringud kohe (avatud),
+                   teatud aja pärast lubab ühe proovipäringu (pooleldi avatud).
+
+Keskkond:
+  OPENWEATHER_RATE_PER_MIN - lubatud päringuid minutis (vaikimisi 60)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Hashable, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+logger = logging.getLogger("rate-limit")
+
+HIGH = 0  # helistaja ootab vastust
+LOW = 1   # taustatöö: eelsoojendus, ennetav päring
+
+_STATE = struct.Struct("<dd")  # märke, viimase uuenduse aeg
+
+
+class RateLimitExceeded(Exception):
+    """Märki ei saadud lubatud ooteaja jooksul (`max_wait` sekundit)."""
+
+    def __init__(self, max_wait: float) -> None:
+        super().__init__(f"päringute limiit täis, ootasin {max_wait:g} s")
+        self.max_wait = max_wait
+
+
+class TokenBucket:
+    def __init__(self, rate_per_min: float = 60.0, burst: Optional[float] = None, state_path: Optional[Path] = None) -> None:
+        self.rate = rate_per_min / 60.0
+        self.burst = burst if burst is not None else max(1.0, rate_per_min / 6)
+        self.state_path = state_path if fcntl is not None else None
+        self._tokens = self.burst
+        self._updated = time.time()
+        self._fd: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _refill(self, tokens: float, updated: float, now: float) -> float:
+        return min(self.burst, tokens + max(0.0, now - updated) * self.rate)
+
+    def _update(self, take: float, pause: float = 0.0) -> float:
+        """Võtab `take` märki, kui võimalik. Tagastab 0 või aja sekundites järgmise märgini."""
+        now = time.time()
+        if self.state_path is None:
+            with self._lock:
+                tokens, wait = self._apply(self._refill(self._tokens, self._updated, now), take, pause)
+                self._tokens, self._updated = tokens, now
+            return wait
+        if self._fd is None:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            self._fd = os.open(self.state_path, os.O_RDWR | os.O_CREAT, 0o644)
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                raw = os.pread(self._fd, _STATE.size, 0)
+                tokens, updated = _STATE.unpack(raw) if len(raw) == _STATE.size else (self.burst, now)
+                tokens, wait = self._apply(self._refill(tokens, updated, now), take, pause)
+                os.pwrite(self._fd, _STATE.pack(tokens, now), 0)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return wait
+
+    def _apply(self, tokens: float, take: float, pause: float) -> "tuple[float, float]":
+        if pause:
+            # Negatiivne saldo = paus, mille jooksul märke ei jagata
+            return min(tokens, -pause * self.rate), 0.0
+        if tokens >= take:
+            return tokens - take, 0.0
+        return tokens, (take - tokens) / self.rate
+
+    def try_take(self) -> float:
+        return self._update(1.0)
+
+    def penalize(self, seconds: float) -> None:
+        """Ülesvool vastas 429: ära jaga märke `seconds` sekundi jooksul."""
+        self._update(0.0, pause=seconds)
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class PriorityLimiter:
+    def __init__(self, bucket: TokenBucket) -> None:
+        self.bucket = bucket
+        self.waited = 0
+        self.rejected = 0
+        self._heap: List[list] = []  # [prioriteet, jrk, future, võti]
+        self._by_key: Dict[Hashable, list] = {}
+        self._seq = itertools.count()
+        self._pump_task: Optional["asyncio.Task[None]"] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    async def acquire(self, priority: int = HIGH, max_wait: float = 3.0, key: Optional[Hashable] = None) -> None:
+        if not self._heap and self.bucket.try_take() == 0:
+            return
+        loop = asyncio.get_running_loop()
+        entry = [priority, next(self._seq), loop.create_future(), key]
+        heapq.heappush(self._heap, entry)
+        if key is not None:
+            self._by_key[key] = entry
+        self._ensure_pump()
+        self.waited += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(entry[2]), max_wait)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise RateLimitExceeded(max_wait) from None
+        finally:
+            if not entry[2].done():
+                entry[2].cancel()  # pump jätab tühistatud ootajad vahele
+            if key is not None and self._by_key.get(key) is entry:
+                del self._by_key[key]
+
+    def promote(self, key: Hashable) -> None:
+        """Sama päringut ootab nüüd helistaja: tõsta järjekorras ettepoole."""
+        entry = self._by_key.get(key)
+        if entry is not None and entry[0] > HIGH and not entry[2].done():
+            entry[0] = HIGH
+            heapq.heapify(self._heap)
+            if self._wakeup is not None:
+                self._wakeup.set()
+
+    def _ensure_pump(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._pump_task is None or self._pump_task.done() or self._pump_task.get_loop() is not loop:
+            # Uus sündmustsükkel (nt järjestikused asyncio.run kutsed): vanad ootajad on surnud
+            if self._pump_task is not None and self._pump_task.get_loop() is not loop:
+                self._heap = [entry for entry in self._heap if entry[2].get_loop() is loop]
+                heapq.heapify(self._heap)
+            self._wakeup = asyncio.Event()
+            self._pump_task = loop.create_task(self._pump())
+        elif self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _pump(self) -> None:
+        while self._heap:
+            head = self._heap[0]
+            if head[2].done():
+                heapq.heappop(self._heap)
+                continue
+            wait = self.bucket.try_take()
+            if wait == 0:
+                heapq.heappop(self._heap)
+                head[2].set_result(None)
+                continue
+            # Oota märki; äratus, kui järjekord muutub (uus kõrge prioriteediga ootaja)
+            assert self._wakeup is not None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> Dict[str, int]:
+        queued = sum(1 for entry in self._heap if not entry[2].done())
+        return {"queued": queued, "waited": self.waited, "rejected": self.rejected}
+
+
+class CircuitBreaker:
+    """Protsessi põhine kaitselüliti: closed -> open (fail fast) -> half_open (üks proov)."""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.short_circuited = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self.state = "half_open"
+            self._probe_in_flight = False
+        if self.state == "half_open" and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        self.short_circuited += 1
+        return False
+
+    def retry_in(self) -> float:
+        return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def release(self) -> None:
+        """Lubatud päringut ei saadetud (nt kohalik limiit): proov vabaks, olek ei muutu."""
+        self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        if self.state != "closed":
+            logger.info("OpenWeather taastus, kaitselüliti suletud")
+        self.state = "closed"
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                logger.warning("OpenWeather ei vasta (%d tõrget järjest), kaitselüliti avatud %g s",
+                               self.failures, self.reset_timeout)
+            self.state = "open"
+            self._opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, object]:
+        return {"state": self.state, "failures": self.failures, "short_circuited": self.short_circuited}
@@ -0,0 +1,169 @@
+"""session_recorder.py
+Kõne salvestus jõudluse regressioonitestide jaoks (benchmarks/replay.py).
+
+Salvestab helistaja sissetuleva heli kaadrid (pärast müra summutust, nagu
+need jõuavad VAD-i ja STT-ni) ja sessiooni sündmused: transkriptsioonid,
+kasutaja ja agendi olekud, vestluse kirjed, tööriistakutsed ja mõõdikud.
+Kirjutamine käib eraldi lõimes, et sündmustsükkel ei ootaks faili.
+
+Formaat (gzip, väljad little-endian):
+  päis   MAGIC + versioon (u8)
+  kirje  tüüp (u8), aeg salvestuse algusest s (f64), sisu pikkus (u32), sisu
+         AUDIO: sagedus (u32), kanaleid (u16), int16 PCM
+         EVENT: UTF-8 JSON {"type": ..., ...}
+
+NB: salvestis sisaldab helistaja häält; lülita sisse ainult testkõnedele.
+
+Keskkond:
+  SESSION_RECORD_DIR - kui määratud, salvestatakse iga kõne sinna (<ruum>-<aeg>.lkrec)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+import re
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from livekit import rtc
+from livekit.agents.voice.io import AudioInput
+
+logger = logging.getLogger("session-recorder")
+
+MAGIC = b"LKREC"
+VERSION = 1
+AUDIO = 1
+EVENT = 2
+
+_RECORD = struct.Struct("<BdI")
+_AUDIO = struct.Struct("<IH")
+
+
+@dataclass
+class Record:
+    kind: int
+    t: float
+    frame: Optional[rtc.AudioFrame] = None
+    event: Optional[Dict[str, Any]] = None
+
+
+class RecordingAudioInput(AudioInput):
+    """Sessiooni helisisendi vahelüli: iga kaader läheb edasi ja salvestisse."""
+
+    def __init__(self, source: AudioInput, recorder: "SessionRecorder") -> None:
+        super().__init__(label="session-recorder", source=source)
+        self._recorder = recorder
+
+    async def __anext__(self) -> rtc.AudioFrame:
+        frame = await self.source.__anext__()
+        self._recorder.audio(frame)
+        return frame
+
+
+class SessionRecorder:
+    def __init__(self, path: Path, meta: Optional[Dict[str, Any]] = None) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.frames = 0
+        self.events = 0
+        self._file = gzip.open(self.path, "wb", compresslevel=1)
+        self._file.write(MAGIC + bytes([VERSION]))
+        self._start = time.perf_counter()
+        # Üks kirjutuslõim: kirjed jäävad järjekorda ja sündmustsükkel ei blokeeru
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="session-recorder")
+        self.event("meta", version=VERSION, created=time.strftime("%Y-%m-%dT%H:%M:%S"), **(meta or {}))
+
+    def _put(self, kind: int, payload: bytes, at: Optional[float]) -> None:
+        t = time.perf_counter() - self._start if at is None else at
+        self._writer.submit(self._file.write, _RECORD.pack(kind, t, len(payload)) + payload)
+
+    def audio(self, frame: rtc.AudioFrame, at: Optional[float] = None) -> None:
+        self.frames += 1
+        self._put(AUDIO, _AUDIO.pack(frame.sample_rate, frame.num_channels) + frame.data.tobytes(), at)
+
+    def event(self, kind: str, at: Optional[float] = None, **data: Any) -> None:
+        self.events += 1
+        payload = json.dumps({"type": kind, **data}, ensure_ascii=False, default=str).encode("utf-8")
+        self._put(EVENT, payload, at)
+
+    def attach(self, session) -> None:
+        """Kutsu pärast session.start(): RoomIO seab helisisendi alles seal."""
+        session.on("user_input_transcribed", lambda ev: self.event(
+            "transcript", text=ev.transcript, final=ev.is_final, language=ev.language))
+        session.on("user_state_changed", lambda ev: self.event("user_state", old=ev.old_state, new=ev.new_state))
+        session.on("agent_state_changed", lambda ev: self.event("agent_state", old=ev.old_state, new=ev.new_state))
+        session.on("conversation_item_added", self._on_item)
+        session.on("function_tools_executed", self._on_tools)
+        session.on("metrics_collected", self._on_metrics)
+        if session.input.audio is not None:
+            session.input.audio = RecordingAudioInput(session.input.audio, self)
+
+    def _on_item(self, ev) -> None:
+        item = ev.item
+        self.event("item", role=getattr(item, "role", ""), text=getattr(item, "text_content", None) or "")
+
+    def _on_tools(self, ev) -> None:
+        calls = [{"name": c.name, "arguments": c.arguments} for c in ev.function_calls]
+        outputs = [len(o.output) if o is not None else 0 for o in ev.function_call_outputs]
+        self.event("tools", calls=calls, output_chars=outputs)
+
+    def _on_metrics(self, ev) -> None:
+        m = ev.metrics
+        data = m.model_dump() if hasattr(m, "model_dump") else dict(vars(m))
+        self.event("metrics", metrics=data)
+
+    def _close(self) -> None:
+        self._writer.shutdown(wait=True)
+        self._file.close()
+
+    async def aclose(self) -> None:
+        await asyncio.to_thread(self._close)
+        logger.info("salvestis %s: %d helikaadrit, %d sündmust, %.0f kB",
+                    self.path, self.frames, self.events, self.path.stat().st_size / 1024)
+
+
+def read_recording(path: Path) -> Iterator[Record]:
+    """Salvestise kirjed järjekorras; katkenud kõne poolik lõpp jäetakse vahele."""
+    with gzip.open(path, "rb") as f:
+        head = f.read(len(MAGIC) + 1)
+        if head[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path}: pole kõne salvestis")
+        if head[len(MAGIC)] > VERSION:
+            raise ValueError(f"{path}: tundmatu versioon {head[len(MAGIC)]}")
+        try:
+            while True:
+                header = f.read(_RECORD.size)
+                if len(header) < _RECORD.size:
+                    return
+                kind, t, size = _RECORD.unpack(header)
+                payload = f.read(size)
+                if len(payload) < size:
+                    return
+                if kind == AUDIO:
+                    rate, channels = _AUDIO.unpack_from(payload)
+                    pcm = payload[_AUDIO.size:]
+                    yield Record(kind, t, frame=rtc.AudioFrame(pcm, rate, channels, len(pcm) // (2 * channels)))
+                elif kind == EVENT:
+                    yield Record(kind, t, event=json.loads(payload.decode("utf-8")))
+        except EOFError:
+            # Protsess lõpetati enne faili sulgemist: gzip lõpp puudub
+            return
+
+
+def start_session_recorder(room_name: str, meta: Optional[Dict[str, Any]] = None) -> Optional[SessionRecorder]:
+    """Salvestaja, kui SESSION_RECORD_DIR on seadistatud; muidu None."""
+    directory = os.getenv("SESSION_RECORD_DIR")
+    if not directory:
+        return None
+    name = re.sub(r"[^\w.-]", "_", room_name) or "session"
+    path = Path(directory) / f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.lkrec"
+    logger.info("kõne salvestatakse: %s", path)
+    return SessionRecorder(path, {"room": room_name, **(meta or {})})
@@ -0,0 +1,188 @@
+"""shared_cache.py
+Hosti ühine vahemälu (SQLite WAL režiimis) kõigi LiveKit tööprotsesside jaoks.
+
+Iga töö jookseb eraldi protsessis, seega protsessi mälus olev vahemälu on
+järgmise kõne jaoks külm. SharedCache hoiab geokodeerimise ja ilmapäringute
+vastuseid ühes andmebaasifailis: ühe kõne tehtud päring on sama masina
+teistele (ka samaaegsetele) kõnedele kohalik tabamus.
+
+- WAL: lugejad ei oota kirjutajat ega üksteist; lugemine on üks PK päring.
+- Kirjutamine on üks tehing (INSERT OR REPLACE), st atomaarne; see tehakse
+  eraldi lõimes, et sündmustsükkel ei ootaks faililukku.
+- Sündmustsüklist loetakse aget() kaudu lugemislõimes: ka ühenduse avamine
+  (kataloog, PRAGMA-d, skeem) ja busy_timeout ootamine ei blokeeri tsüklit.
+  warm() avab mõlema lõime ühendused ette (prewarm ajal).
+- Iga kirje kehtib kuni `expires`; aegunud ja liigsed (vanimad) kirjed
+  kustutatakse iga PRUNE_EVERY kirjutuse järel.
+- Andmebaasi vead logitakse ja neid käsitletakse möödalasuna: vahemälu ei
+  tohi tööriistu katki teha.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+
+logger = logging.getLogger("shared-cache")
+
+PRUNE_EVERY = 200
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    ns      TEXT NOT NULL,
+    key     TEXT NOT NULL,
+    value   TEXT NOT NULL,
+    stored  REAL NOT NULL,
+    expires REAL NOT NULL,
+    PRIMARY KEY (ns, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS entries_stored ON entries (stored);
+"""
+
+
+class SharedCache:
+    def __init__(self, path: Path, *, max_entries: int = 20000, busy_timeout_ms: int = 2000) -> None:
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.busy_timeout_ms = busy_timeout_ms
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._local = threading.local()
+        self._writes = 0
+        # Üks kirjutuslõim: kirjutused järjestatakse ja sündmustsükkel ei blokeeru
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shared-cache")
+        # Üks lugemislõim: PK päring on lühike, ühendus avatakse üks kord
+        self._reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shared-cache-read")
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 ühendus on lõimepõhine
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000, isolation_level=None)
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def warm(self) -> None:
+        """Avab lugemis- ja kirjutuslõime ühendused ette (sünkroonne, prewarm ajal)."""
+        for executor in (self._reader, self._writer):
+            try:
+                executor.submit(self._conn).result()
+            except (sqlite3.Error, OSError) as e:
+                self.errors += 1
+                logger.warning("ühise vahemälu avamine ebaõnnestus: %s", e)
+                return
+
+    async def aget(self, ns: str, key: str) -> Optional[Tuple[Any, float]]:
+        """get() lugemislõimes; sobib sündmustsüklist kutsumiseks."""
+        return await asyncio.get_running_loop().run_in_executor(self._reader, self.get, ns, key)
+
+    async def arecent(self, ns: str, limit: int) -> List[Tuple[str, Any, float]]:
+        """recent() lugemislõimes; sobib sündmustsüklist kutsumiseks."""
+        return await asyncio.get_running_loop().run_in_executor(self._reader, self.recent, ns, limit)
+
+    def get(self, ns: str, key: str) -> Optional[Tuple[Any, float]]:
+        """(väärtus, salvestamise aeg) või None, kui kirjet pole või see on aegunud."""
+        try:
+            row = self._conn().execute(
+                "SELECT value, stored FROM entries WHERE ns = ? AND key = ? AND expires > ?",
+                (ns, key, time.time()),
+            ).fetchone()
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning("ühise vahemälu lugemine ebaõnnestus: %s", e)
+            return None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0]), row[1]
+
+    def recent(self, ns: str, limit: int) -> List[Tuple[str, Any, float]]:
+        """Uusimad kehtivad kirjed (vanim ees), nt protsessi mälu eelsoojenduseks."""
+        try:
+            rows = self._conn().execute(
+                "SELECT key, value, stored FROM entries WHERE ns = ? AND expires > ? ORDER BY stored DESC LIMIT ?",
+                (ns, time.time(), limit),
+            ).fetchall()
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning("ühise vahemälu lugemine ebaõnnestus: %s", e)
+            return []
+        return [(key, json.loads(value), stored) for key, value, stored in reversed(rows)]
+
+    def put(self, ns: str, key: str, value: Any, retention: float, stored: Optional[float] = None) -> None:
+        """Sünkroonne kirjutus (kirje hoitakse alles `retention` sekundit)."""
+        stored = time.time() if stored is None else stored
+        payload = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        try:
+            conn = self._conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (ns, key, value, stored, expires) VALUES (?, ?, ?, ?, ?)",
+                (ns, key, payload, stored, stored + retention),
+            )
+            self._writes += 1
+            if self._writes % PRUNE_EVERY == 0:
+                self._prune(conn)
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning("ühise vahemälu kirjutamine ebaõnnestus: %s", e)
+
+    def put_nowait(self, ns: str, key: str, value: Any, retention: float, stored: Optional[float] = None) -> None:
+        """Kirjutab taustalõimes; sobib sündmustsüklist kutsumiseks."""
+        stored = time.time() if stored is None else stored
+        self._writer.submit(self.put, ns, key, value, retention, stored)
+
+    def flush(self) -> None:
+        """Ootab, kuni kõik put_nowait kirjutused on tehtud."""
+        self._writer.submit(lambda: None).result()
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM entries WHERE expires <= ?", (time.time(),))
+            (count,) = conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+            if count > self.max_entries:
+                # Piiratud suurus: kõigepealt lähevad vanimad kirjed
+                conn.execute(
+                    "DELETE FROM entries WHERE (ns, key) IN (SELECT ns, key FROM entries ORDER BY stored LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def close(self) -> None:
+        self._writer.submit(self._close_conn)
+        self._reader.submit(self._close_conn)
+        self._writer.shutdown(wait=True)
+        self._reader.shutdown(wait=True)
+        self._close_conn()
+
+    def _close_conn(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,240 @@
+"""telemetry.py
+Iga kõnevooru latentsuse jälgimine: VAD -> STT -> LLM -> tööriistad -> TTS.
+
+Iga vooru kohta salvestatakse ajatemplid (kõne lõpp, lõplik transkriptsioon,
+LLM-i esimene token, tööriistade algus/lõpp eraldi geokodeerimise ja ilma
+päringu kaupa, TTS-i esimene bait, esimene heli) ja LLM-ile saadetud
+tokenid (context_budget.py hinnang ja mudeli teatatud prompt_tokens). Voor väljastatakse JSON
+reana logijasse "turn-trace" ja etappide kestused Prometheuse histogrammidesse.
+
+Keskkond:
+  DEPLOYMENT_NAME          - histogrammide silt "deployment" (vaikimisi "default")
+  PROMETHEUS_PORT          - kui määratud, avab worker /metrics selles pordis
+  PROMETHEUS_MULTIPROC_DIR - töö protsesside mõõdikute koondamiseks (LiveKit worker)
+"""
+
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import functools
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+import prometheus_client
+
+logger = logging.getLogger("turn-trace")
+
+DEPLOYMENT = os.getenv("DEPLOYMENT_NAME", "default")
+
+STAGE_SECONDS = prometheus_client.Histogram(
+    "voice_agent_stage_seconds",
+    "Kõnevooru etappide kestus sekundites",
+    ["deployment", "stage"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.2, 0.35, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 8.0, 13.0),
+)
+# Voorud tee kaupa: "fast" (fast_path.py, ilma LLM-ita) või "llm"; kiirtee osakaal = fast / kõik
+TURNS = prometheus_client.Counter(
+    "voice_agent_turns",
+    "Kõnevoorud vastuse tee kaupa",
+    ["deployment", "path"],
+)
+TURN_SECONDS = prometheus_client.Histogram(
+    "voice_agent_turn_seconds",
+    "Kõne lõpust esimese helini (time_to_first_audio) vastuse tee kaupa",
+    ["deployment", "path"],
+    buckets=(0.1, 0.2, 0.35, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 8.0, 13.0),
+)
+# LLM-i sisendtokenid vooru kohta (kõik vooru LLM-i päringud kokku)
+PROMPT_TOKENS = prometheus_client.Histogram(
+    "voice_agent_prompt_tokens",
+    "LLM-ile saadetud sisendtokenid vooru kohta",
+    ["deployment"],
+    buckets=(250, 500, 1000, 1500, 2000, 3000, 4000, 6000, 8000, 12000, 16000),
+)
+
+
+def observe(stage: str, seconds: float) -> None:
+    STAGE_SECONDS.labels(DEPLOYMENT, stage).observe(max(seconds, 0.0))
+
+
+def worker_prometheus_options() -> Dict[str, Any]:
+    """WorkerOptions lisavõtmed, kui PROMETHEUS_PORT on seadistatud."""
+    port = os.getenv("PROMETHEUS_PORT")
+    return {"prometheus_port": int(port)} if port else {}
+
+
+@dataclass
+class ToolSpan:
+    stage: str
+    start: float
+    end: float
+
+
+@dataclass
+class TurnTrace:
+    turn: int
+    end_of_speech: Optional[float] = None
+    final_transcript: Optional[float] = None
+    transcript: str = ""
+    llm_first_token: Optional[float] = None
+    llm_calls: int = 0
+    tts_first_byte: Optional[float] = None
+    first_audio: Optional[float] = None
+    path: str = "llm"
+    prompt_tokens: int = 0
+    context_tokens: int = 0
+    context_compacted: int = 0
+    tools: List[ToolSpan] = field(default_factory=list)
+
+
+_current: contextvars.ContextVar[Optional[Union["TurnTracer", "SpanCollector"]]] = contextvars.ContextVar("turn_tracer", default=None)
+
+
+@contextlib.contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Mõõdab ploki kestust; aktiivse jälgija korral lisab selle jooksvale voorule."""
+    start = time.time()
+    try:
+        yield
+    finally:
+        end = time.time()
+        observe(stage, end - start)
+        tracer = _current.get()
+        if tracer is not None:
+            tracer.add_tool_span(ToolSpan(stage, start, end))
+
+
+class SpanCollector:
+    """Kogub spanid ilma sessioonita (nt debug_weather.py partiirežiim)."""
+
+    def __init__(self) -> None:
+        self.spans: List[ToolSpan] = []
+
+    def add_tool_span(self, tool_span: ToolSpan) -> None:
+        self.spans.append(tool_span)
+
+    def total(self, stage: str) -> float:
+        return sum(s.end - s.start for s in self.spans if s.stage == stage)
+
+
+def collect_spans() -> SpanCollector:
+    """Järgmised spanid selles kontekstis (ülesandes) lähevad tagastatud kogujasse."""
+    collector = SpanCollector()
+    _current.set(collector)
+    return collector
+
+
+def mark_fast_path() -> None:
+    """Jooksev voor vastati kiirteel (ilma LLM-ita)."""
+    tracer = _current.get()
+    if isinstance(tracer, TurnTracer):
+        tracer.set_path("fast")
+
+
+def note_context(tokens: int, compacted: int) -> None:
+    """LLM-i päringu konteksti hinnanguline suurus (context_budget.py) jooksvale voorule."""
+    tracer = _current.get()
+    if isinstance(tracer, TurnTracer):
+        turn = tracer._current_turn()
+        turn.context_tokens += tokens
+        turn.context_compacted += compacted
+
+
+def traced_tool(fn):
+    """Tööriista dekoraator (function_tool alla): kogu kutse kestus etapina "tool"."""
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        with span(f"tool:{fn.__name__}"):
+            return await fn(*args, **kwargs)
+    return wrapper
+
+
+class TurnTracer:
+    def __init__(self, on_turn: Optional[Callable[[Dict[str, Any]], None]] = None) -> None:
+        self._turn_no = 0
+        self._turn: Optional[TurnTrace] = None
+        # Lõpetatud vooru kirje (sama mis logireal), nt benchmarks/replay.py aruande jaoks
+        self._on_turn = on_turn
+
+    def activate(self) -> None:
+        """Seob jälgija praeguse kontekstiga; sealt loodud ülesanded (sh tööriistad) pärivad selle."""
+        _current.set(self)
+
+    def attach(self, session) -> None:
+        session.on("user_state_changed", self._on_user_state)
+        session.on("user_input_transcribed", self._on_transcript)
+        session.on("agent_state_changed", self._on_agent_state)
+        session.on("metrics_collected", self._on_metrics)
+        session.on("close", lambda _ev: self._finish())
+
+    def _current_turn(self) -> TurnTrace:
+        if self._turn is None:
+            self._turn_no += 1
+            self._turn = TurnTrace(turn=self._turn_no)
+        return self._turn
+
+    def add_tool_span(self, tool_span: ToolSpan) -> None:
+        self._current_turn().tools.append(tool_span)
+
+    def set_path(self, path: str) -> None:
+        self._current_turn().path = path
+
+    def _on_user_state(self, ev) -> None:
+        if ev.new_state == "speaking" and self._turn is not None and self._turn.first_audio is not None:
+            self._finish()
+        elif ev.old_state == "speaking" and ev.new_state == "listening":
+            if self._turn is not None and self._turn.first_audio is not None:
+                self._finish()
+            self._current_turn().end_of_speech = ev.created_at
+
+    def _on_transcript(self, ev) -> None:
+        if ev.is_final:
+            turn = self._current_turn()
+            turn.final_transcript = ev.created_at
+            turn.transcript = ev.transcript
+
+    def _on_agent_state(self, ev) -> None:
+        if ev.new_state == "speaking" and self._turn is not None and self._turn.first_audio is None:
+            self._turn.first_audio = ev.created_at
+        elif ev.old_state == "speaking" and ev.new_state == "listening":
+            self._finish()
+
+    def _on_metrics(self, ev) -> None:
+        m = ev.metrics
+        kind = getattr(m, "type", "")
+        if kind == "llm_metrics":
+            turn = self._current_turn()
+            turn.llm_calls += 1
+            turn.prompt_tokens += m.prompt_tokens
+            observe("llm_ttft", m.ttft)
+            if turn.llm_first_token is None and m.ttft >= 0:
+                turn.llm_first_token = m.timestamp - m.duration + m.ttft
+        elif kind == "tts_metrics":
+            observe("tts_ttfb", m.ttfb)
+            turn = self._current_turn()
+            if turn.tts_first_byte is None and m.ttfb >= 0:
+                turn.tts_first_byte = m.timestamp - m.duration + m.ttfb
+        elif kind == "eou_metrics":
+            observe("eou_delay", m.end_of_utterance_delay)
+            observe("stt_final", m.transcription_delay)
+
+    def _finish(self) -> None:
+        turn, self._turn = self._turn, None
+        if turn is None or turn.end_of_speech is None:
+            return
+        TURNS.labels(DEPLOYMENT, turn.path).inc()
+        if turn.first_audio is not None:
+            observe("time_to_first_audio", turn.first_audio - turn.end_of_speech)
+            TURN_SECONDS.labels(DEPLOYMENT, turn.path).observe(max(turn.first_audio - turn.end_of_speech, 0.0))
+        if turn.llm_calls:
+            PROMPT_TOKENS.labels(DEPLOYMENT).observe(turn.prompt_tokens or turn.context_tokens)
+        record = asdict(turn)
+        record["deployment"] = DEPLOYMENT
+        logger.info(json.dumps(record, ensure_ascii=False))
+        if self._on_turn is not None:
+            self._on_turn(record)
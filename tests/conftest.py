@@ -0,0 +1,42 @@
+import contextlib
+import sys
+from pathlib import Path
+
+import pytest
+
+# Moodulid on repo juurkataloogis (nagu benchmarks/ skriptideski)
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import weather_client  # noqa: E402
+from fake_openweather import FakeOpenWeather  # noqa: E402
+
+
+@pytest.fixture
+def openweather(monkeypatch, tmp_path):
+    """`async with openweather(latency_ms=...) as server:` kohalik OpenWeather ja uus get_client().
+
+    Vahemälu ja märgiämbri olek on ajutises kataloogis, nii et testid ei
+    jaga midagi omavahel ega arendaja .cache kataloogiga.
+    """
+    monkeypatch.setenv("WEATHER_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("OPENWEATHER_API_KEY", "test")
+    monkeypatch.setattr(weather_client, "_client", None)
+
+    @contextlib.asynccontextmanager
+    async def serve(**kwargs):
+        server = FakeOpenWeather(**kwargs)
+        monkeypatch.setenv("OPENWEATHER_BASE_URL", await server.start())
+        weather_client._client = None
+        try:
+            yield server
+        finally:
+            client = weather_client._client
+            if client is not None:
+                await client.aclose()
+                client.shared_cache.close()
+            weather_client._client = None
+            await server.stop()
+
+    return serve
@@ -0,0 +1,72 @@
+from livekit.agents.llm import ChatContext, FunctionCall, FunctionCallOutput
+
+from context_budget import ContextBudget, context_tokens, remember_summary
+
+NOTE = "tulemus eemaldatud"
+
+
+def conversation(turns: int, output_size: int = 400) -> ChatContext:
+    """Juhised, tervitus ja `turns` vooru: kasutaja küsimus, tööriistakutse, tulemus, vastus."""
+    ctx = ChatContext.empty()
+    ctx.add_message(role="system", content="Oled ilmaabiline.")
+    ctx.add_message(role="assistant", content="Tere!")
+    for n in range(turns):
+        ctx.add_message(role="user", content=f"ilm linnas {n}")
+        ctx.items.append(FunctionCall(call_id=str(n), name="get_weather", arguments=f'{{"city": "{n}"}}'))
+        ctx.items.append(FunctionCallOutput(call_id=str(n), name="get_weather",
+                                            output=f"{n}:" + "x" * output_size, is_error=False))
+        ctx.add_message(role="assistant", content=f"vastus {n}")
+    return ctx
+
+
+def outputs(ctx: ChatContext) -> list:
+    return [item.output for item in ctx.items if item.type == "function_call_output"]
+
+
+def test_recent_turns_stay_intact():
+    ctx = conversation(2)
+    before = outputs(ctx)
+    report = ContextBudget(NOTE, max_tokens=10, keep_turns=2).compact(ctx)
+    assert (report.compacted, report.dropped) == (0, 0)
+    assert outputs(ctx) == before
+
+
+def test_old_outputs_are_summarized_or_noted():
+    ctx = conversation(4)
+    full = outputs(ctx)
+    remember_summary(full[0], "Linnas 0 on 5 kraadi.")
+    report = ContextBudget(NOTE, max_tokens=10_000, keep_turns=2).compact(ctx)
+    assert report.compacted == 2 and report.dropped == 0
+    assert outputs(ctx) == ["Linnas 0 on 5 kraadi.", NOTE, *full[2:]]
+    assert report.tokens == context_tokens(ctx) < report.tokens_before
+
+
+def test_short_outputs_are_kept():
+    ctx = conversation(3, output_size=10)
+    before = outputs(ctx)
+    assert ContextBudget(NOTE, max_tokens=10_000, keep_turns=1).compact(ctx).compacted == 0
+    assert outputs(ctx) == before
+
+
+def test_oldest_turns_dropped_over_budget_keeping_instructions():
+    ctx = conversation(5)
+    budget = ContextBudget(NOTE, max_tokens=0, keep_turns=2)
+    original = list(ctx.items)
+    report = budget.compact(ctx)
+    # kolm vanemat vooru ja tervitus välja; juhised ja kaks viimast vooru jäävad
+    assert report.dropped == 3 * 4 + 1
+    assert ctx.items[0].role == "system"
+    assert ctx.items[1:] == original[-8:]
+    assert [item.text_content for item in ctx.items if item.type == "message" and item.role == "user"] == [
+        "ilm linnas 3", "ilm linnas 4"]
+
+
+def test_drops_only_what_is_needed():
+    ctx = conversation(5)
+    compacted = conversation(5)
+    ContextBudget(NOTE, max_tokens=10_000, keep_turns=2).compact(compacted)
+    budget = context_tokens(compacted) - 1  # üle eelarve vaid napilt
+    report = ContextBudget(NOTE, max_tokens=budget, keep_turns=2).compact(ctx)
+    # tervitus ja esimene voor (neli kirjet)
+    assert report.dropped == 4 + 1
+    assert report.tokens <= budget
@@ -0,0 +1,81 @@
+from datetime import date, timedelta
+
+import pytest
+
+import forecast_agg
+from forecast_agg import EPOCH_ORDINAL, SECONDS_PER_DAY, STEP_SECONDS, at_time, over_range, summarize_forecast
+
+T0 = 1_700_000_000 - 1_700_000_000 % STEP_SECONDS
+
+
+def entry(i: int, temp, wind=4.0, desc="pilves", **main):
+    return {
+        "dt": T0 + i * STEP_SECONDS,
+        "main": {"temp": temp, "feels_like": None if temp is None else temp - 2,
+                 "humidity": 80, "pressure": 1010, **main},
+        "wind": {"speed": wind},
+        "weather": [{"description": desc}],
+    }
+
+
+def columns(*entries, tz=0):
+    return summarize_forecast({"city": {"timezone": tz}, "list": list(entries)}).columns
+
+
+def test_at_time_interpolates_between_entries():
+    cols = columns(entry(0, 0.0, wind=2.0), entry(1, 6.0, wind=8.0, desc="selge"))
+    point = at_time(cols, T0 + STEP_SECONDS // 3)
+    assert point.temp == pytest.approx(2.0)
+    assert point.feels == pytest.approx(0.0)
+    assert point.wind == pytest.approx(4.0)
+    assert point.description == "pilves"  # lähim kirje
+    assert at_time(cols, T0 + 2 * STEP_SECONDS // 3).description == "selge"
+
+
+def test_at_time_outside_forecast():
+    cols = columns(entry(0, 1.0), entry(1, 2.0))
+    # enne esimest kirjet kuni üks samm: esimese kirje väärtus
+    assert at_time(cols, T0 - STEP_SECONDS).temp == 1.0
+    assert at_time(cols, T0 - STEP_SECONDS - 1) is None
+    assert at_time(cols, T0 + STEP_SECONDS + 1) is None
+    assert at_time(columns(), T0) is None
+
+
+def test_at_time_skips_missing_values():
+    cols = columns(entry(0, 0.0), entry(1, None), entry(2, 10.0))
+    assert at_time(cols, T0 + STEP_SECONDS).temp == pytest.approx(5.0)
+
+
+def test_over_range_uses_hourly_points():
+    cols = columns(entry(0, 0.0), entry(1, 6.0), entry(2, 3.0, desc="vihm"), entry(3, 3.0, desc="vihm"))
+    summary = over_range(cols, T0 + 3600, T0 + 2 * STEP_SECONDS)
+    # tunnid 1..5: 2, 4, 6, 5, 4
+    assert (summary.min_temp, summary.max_temp) == pytest.approx((2.0, 6.0))
+    assert summary.avg_wind == pytest.approx(4.0)
+    assert summary.description == "pilves"
+    assert over_range(cols, T0 + 2 * STEP_SECONDS, T0 + 4 * STEP_SECONDS).description == "vihm"
+
+
+def test_over_range_outside_forecast():
+    cols = columns(entry(0, 1.0), entry(1, 2.0))
+    assert over_range(cols, T0 + 2 * STEP_SECONDS, T0 + 4 * STEP_SECONDS) is None
+    assert over_range(cols, T0, T0) is None
+
+
+def test_days_follow_local_date():
+    tz = SECONDS_PER_DAY - T0 % SECONDS_PER_DAY  # esimene kirje on kohalikult kesköö
+    summary = summarize_forecast({"city": {"timezone": tz}, "list": [entry(i, float(i)) for i in range(9)]})
+    first = date.fromordinal(EPOCH_ORDINAL + T0 // SECONDS_PER_DAY + 1)
+    assert [d.date for d in summary.days] == [first, first + timedelta(days=1)]
+    assert (summary.days[0].min_temp, summary.days[0].max_temp) == (0.0, 7.0)
+
+
+def test_small_and_large_payloads_aggregate_alike(monkeypatch):
+    entries = [entry(i, float(i % 7), wind=i % 5, desc="vihm" if i % 3 else "pilves") for i in range(40)]
+    entries[5]["main"]["temp"] = None
+    payload = {"city": {"timezone": 7200}, "list": entries}
+    small = summarize_forecast(payload)
+    monkeypatch.setattr(forecast_agg, "VECTORIZE_MIN_ENTRIES", 0)
+    large = summarize_forecast(payload)
+    assert small.days == large.days
+    assert small.columns.dt.tolist() == large.columns.dt.tolist()
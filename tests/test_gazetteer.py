@@ -0,0 +1,66 @@
+import pytest
+
+from gazetteer import find_cities, lookup, resolve, strip_case
+
+
+@pytest.mark.parametrize(
+    "phrase, name",
+    [
+        ("tartu", "Tartu"),
+        ("tartus", "Tartu"),
+        ("tartusse", "Tartu"),
+        ("tallinnast", "Tallinn"),
+        ("tallinnas", "Tallinn"),
+        ("pärnule", "Pärnu"),
+        ("saaremaal", "Kuressaare"),
+        ("riias", "Riga"),
+        ("helsingisse", "Helsinki"),
+        ("lätis", "Riga"),
+        ("new yorgis", "New York"),
+        ("harju maakonnas", "Tallinn"),
+    ],
+)
+def test_lookup_strips_case_endings(phrase, name):
+    assert lookup(phrase, "et") == name
+
+
+def test_lookup_english_has_no_case_endings():
+    assert lookup("london", "en") == "London"
+    assert lookup("londonis", "en") is None
+    assert lookup("germany", "en") == "Berlin"
+
+
+def test_strip_case_unknown_name():
+    assert strip_case("kilingi-nõmmel") == "kilingi-nõmme"
+    assert strip_case("aas") is None  # tüvi jääks liiga lühikeseks
+
+
+@pytest.mark.parametrize(
+    "text, lang, name",
+    [
+        ("Tartus", "et", "Tartu"),
+        ("  Tallinnast ", "et", "Tallinn"),
+        ("Saaremaa", "et", "Kuressaare"),
+        ("Riga, LV", "et", "Riga"),
+        ("Riia, Läti", "et", "Riga"),
+        ("London, England", "et", "London"),
+        ("London, UK", "en", "London"),
+        ("Tallinn, Harjumaa", "et", "Tallinn"),
+        ("Los Angeles, CA, US", "en", "Los Angeles"),
+        ("Eesti", "et", "Tallinn"),
+    ],
+)
+def test_resolve(text, lang, name):
+    assert resolve(text, lang).name == name
+
+
+@pytest.mark.parametrize("text", ["London, CA", "Paris, US", "Kilingi-Nõmme", "", ","])
+def test_resolve_leaves_rest_to_geocoding(text):
+    assert resolve(text, "en") is None
+
+
+def test_find_cities_skips_adjectives():
+    assert find_cities("räägi eesti keeles", "et") == []
+    assert find_cities("soome saunas, aga Soomes on külm", "et") == ["Helsinki"]
+    assert find_cities("milline ilm on Eestis", "et") == ["Tallinn"]
+    assert find_cities("ilm Tartus ja Tallinnas ja jälle Tartus", "et") == ["Tartu", "Tallinn"]
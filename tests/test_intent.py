@@ -0,0 +1,84 @@
+import asyncio
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from fake_openweather import CITIES
+from fast_path import try_fast_path
+from intent import Intent, extract, wants_forecast
+from locales import get_locale
+
+
+@pytest.mark.parametrize(
+    "text, lang, intent",
+    [
+        ("Mis ilm on Tartus?", "et", Intent("weather", "Tartu")),
+        ("Kas Pärnus on sooja", "et", Intent("weather", "Pärnu")),
+        ("Mis ilm on homme Tartus?", "et", Intent("forecast", "Tartu", 2, 1)),
+        ("Tallinna ilmaprognoos", "et", Intent("forecast", "Tallinn", 5, 0)),
+        ("Tallinna ilm kolmeks päevaks", "et", Intent("forecast", "Tallinn", 3, 0)),
+        ("Riia ilm 2 päeva", "et", Intent("forecast", "Riga", 2, 0)),
+        ("What's the weather in London?", "en", Intent("weather", "London")),
+        ("London forecast for 3 days", "en", Intent("forecast", "London", 3, 0)),
+        ("Weather in Paris tomorrow", "en", Intent("forecast", "Paris", 2, 1)),
+    ],
+)
+def test_extract(text, lang, intent):
+    assert extract(text, lang) == intent
+
+
+@pytest.mark.parametrize(
+    "text, lang",
+    [
+        # Kellaaeg, päevaosa, minevik, võrdlus: vastab LLM
+        ("Mis ilm on Tartus kell 15", "et"),
+        ("Mis ilm on homme hommikul Tartus", "et"),
+        ("Mis ilm oli eile Tartus", "et"),
+        ("Kas Tartus on soojem kui Tallinnas", "et"),
+        ("Weather in London tomorrow morning", "en"),
+        ("Was it colder yesterday in London", "en"),
+        # Kaks linna, pole linna, pole ilmasõna, kaks ajamäärangut, liiga pikk
+        ("Mis ilm on Tartus ja Tallinnas", "et"),
+        ("Mis ilm on eesti keeles", "et"),
+        ("Tere Tartu", "et"),
+        ("Tartu ilm homme ja ülehomme", "et"),
+        ("Tartu ilm 10 päevaks", "et"),
+        ("Palun ütle mulle väga lühidalt ja selgelt, mis ilm täna õhtupoolikul Tartus täpselt on", "et"),
+    ],
+)
+def test_extract_leaves_to_llm(text, lang):
+    assert extract(text, lang) is None
+
+
+def test_wants_forecast():
+    assert wants_forecast(["homme", "tartus"], "et")
+    assert wants_forecast(["kolm", "päeva"], "et")
+    assert not wants_forecast(["mis", "ilm", "tartus"], "et")
+    assert not wants_forecast(["weather"], "xx")
+
+
+def test_fast_path_blocker_makes_no_request(openweather):
+    async def run():
+        async with openweather() as server:
+            assert await try_fast_path(get_locale("et"), "Mis ilm on Tartus kell 15?") is None
+            assert not server.requests
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("code, text", [("et", "Mis ilm on homme Tartus?"), ("en", "Weather in Tartu tomorrow")])
+def test_fast_path_tomorrow_is_local_date(openweather, code, text):
+    pack = get_locale(code)
+    tz = CITIES["Tartu"][3]
+    tomorrow = date(1970, 1, 1) + timedelta(days=(int(time.time()) + tz) // 86400 + 1)
+
+    async def run():
+        async with openweather():
+            return await try_fast_path(pack, text)
+
+    reply = asyncio.run(run())
+    assert reply is not None
+    # Ainult homne päev, mitte tänane
+    assert pack.day_name(tomorrow.strftime("%A")) in reply
+    assert pack.day_name((tomorrow - timedelta(days=1)).strftime("%A")) not in reply
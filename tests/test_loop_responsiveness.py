@@ -0,0 +1,45 @@
+"""Ilmatööriistad ei blokeeri sündmustsüklit.
+
+Tööriistad kutsutakse aeglase kohaliku OpenWeather vastu ning samal ajal
+mõõdetakse, kui palju hilineb 10 ms taktiga "südamelöögi" ülesanne.
+"""
+
+import asyncio
+import time
+
+from locales import LOCALES
+from weather_tools import tools_for
+
+DELAY_MS = 500
+HEARTBEAT = 0.01
+MAX_LAG_MS = 100
+
+
+async def heartbeat(lags: list, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(HEARTBEAT)
+        lags.append(time.perf_counter() - start - HEARTBEAT)
+
+
+def test_tools_keep_event_loop_responsive(openweather):
+    async def run():
+        async with openweather(latency_ms=DELAY_MS) as server:
+            get_weather, get_weather_forecast = tools_for("et")[:2]
+            lags: list = []
+            stop = asyncio.Event()
+            beat = asyncio.create_task(heartbeat(lags, stop))
+            current, forecast = await asyncio.gather(get_weather("Tartu"), get_weather_forecast("Tartu", days=3))
+            stop.set()
+            await beat
+            return server, current, forecast, lags
+
+    server, current, forecast, lags = asyncio.run(run())
+    # Prognoos peab olema päris andmed, mitte "andmed puuduvad"
+    pack = LOCALES["et"]
+    assert not pack.is_failure(current), current
+    assert not pack.is_failure(forecast), forecast
+    assert server.requests == {"weather": 1, "forecast": 1}
+    # Viivituse ajal jõuab südamelöök kümneid kordi; ükski ei tohi hilineda üle läve
+    assert len(lags) >= DELAY_MS / 1000 / HEARTBEAT / 2
+    assert max(lags) * 1000 < MAX_LAG_MS
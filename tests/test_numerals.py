@@ -0,0 +1,47 @@
+import pytest
+
+from locales import get_locale, render_template
+from numerals import format_number
+
+
+@pytest.mark.parametrize("spoken", [True, False])
+@pytest.mark.parametrize("lang", ["et", "en"])
+def test_missing_value_is_empty(lang, spoken):
+    assert format_number(None, lang, 1, spoken) == ""
+    assert format_number(None, lang, 0, spoken, unit="%") == ""
+
+
+def test_format_number():
+    assert format_number(-2.5, "et", 1, True, unit="°C") == "miinus kaks koma viis kraadi"
+    assert format_number(-2.5, "et", 1, False, unit="°C") == "-2,5 kraadi"
+    assert format_number(1, "et", 0, True, unit="°C") == "üks kraad"
+    assert format_number(81, "en", 0, True, unit="%") == "eighty-one percent"
+
+
+def test_render_template_skips_missing_clause():
+    template = "{temp}[, tundub {feels}]; {description}[; tuul {wind}]"
+    fields = {"temp": "5 kraadi", "feels": "", "description": "pilves", "wind": "3 m/s"}
+    assert render_template(template, fields) == "5 kraadi; pilves; tuul 3 m/s"
+    fields["feels"] = "2 kraadi"
+    assert render_template(template, fields) == "5 kraadi, tundub 2 kraadi; pilves; tuul 3 m/s"
+
+
+@pytest.mark.parametrize("code", ["et", "en"])
+def test_current_templates_without_optional_metrics(code):
+    pack = get_locale(code)
+    fields = {
+        "country": "EE",
+        "city_name": "Tartu",
+        "temp": pack.format_float(4.2, unit="°C"),
+        "feels": pack.format_float(None, unit="°C"),
+        "wind": pack.format_float(None, unit="m/s"),
+        "humidity": pack.format_int(None, unit="%"),
+        "pressure": pack.format_int(None, unit="hPa"),
+        "pressure_value": pack.format_int(None),
+        "description": "selge",
+        "description_sentence": "Selge. ",
+    }
+    for template in (pack.current_template, pack.compact_current, pack.spoken_current):
+        text = render_template(template, fields)
+        assert "None" not in text and "[" not in text
+        assert fields["temp"] in text
@@ -0,0 +1,82 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import prefetch
+from locales import get_locale
+from prefetch import Prefetcher
+
+
+def interim(text: str) -> SimpleNamespace:
+    return SimpleNamespace(is_final=False, transcript=text)
+
+
+@pytest.fixture
+def prefetcher(openweather):
+    """Ennetaja, mille päringud lähevad kohalikku asendusserverisse."""
+    def run(scenario):
+        async def main():
+            async with openweather() as server:
+                p = Prefetcher(get_locale("et"))
+                p.enabled = True
+                p.activate()
+                await scenario(p, server)
+                await asyncio.gather(*p._tasks)
+                return p
+
+        return asyncio.run(main())
+
+    return run
+
+
+def test_hit_needs_same_endpoint(prefetcher):
+    async def scenario(p, server):
+        p._on_transcript(interim("mis ilm on Tartus"))
+        await asyncio.gather(*p._tasks)
+        assert server.requests == {"weather": 1}
+        prefetch.note_lookup("Tartu", "forecast")
+        assert p.hits == 0
+        prefetch.note_lookup("Tartu", "weather")
+        prefetch.note_lookup("Tartu", "weather")  # üks ennetus on üks tabamus
+        assert p.hits == 1
+
+    p = prefetcher(scenario)
+    assert p.stats()["started"] == 1
+
+
+def test_city_can_be_prefetched_again_next_turn(prefetcher):
+    async def scenario(p, server):
+        p._on_transcript(interim("mis ilm on Tartus"))
+        p._on_transcript(interim("mis ilm on Tartus praegu"))  # sama vooru kordus
+        assert p.started == 1
+        p._end_turn()
+        assert p.wasted == 1
+        p._on_transcript(interim("ja homme Tartus"))  # uus voor, prognoos
+        prefetch.note_lookup("Tartu", "forecast")
+        p._end_turn()
+
+    p = prefetcher(scenario)
+    assert (p.started, p.hits, p.wasted) == (2, 1, 1)
+
+
+def test_per_turn_and_wasted_caps(prefetcher):
+    async def scenario(p, server):
+        p._on_transcript(interim("ilm Tartus, Pärnus ja Narvas"))
+        assert (p.started, p.capped) == (2, 1)
+        p._end_turn()
+        p._on_transcript(interim("ilm Viljandis ja Rakveres"))
+        p._end_turn()
+        assert p.wasted == p.max_wasted
+        p._on_transcript(interim("ilm Tallinnas"))  # raisatud ennetuste piir täis
+        assert p.started == 4
+
+    p = prefetcher(scenario)
+    assert p.capped == 2
+
+
+def test_final_transcript_is_ignored(prefetcher):
+    async def scenario(p, server):
+        p._on_transcript(SimpleNamespace(is_final=True, transcript="ilm Tartus"))
+
+    assert prefetcher(scenario).started == 0
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+import rate_limit
+from rate_limit import CircuitBreaker
+from weather_client import OpenWeatherError, get_client
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    return now
+
+
+def open_breaker(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.failure_threshold):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_breaker_opens_after_threshold(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    open_breaker(breaker)
+    assert not breaker.allow()
+    assert breaker.retry_in() == 30
+    assert breaker.short_circuited == 1
+
+
+def test_half_open_allows_one_probe(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    open_breaker(breaker)
+    clock[0] += 30
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    assert not breaker.allow()  # teine kutse ootab proovi tulemust
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_failed_probe_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    open_breaker(breaker)
+    clock[0] += 30
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.retry_in() == 30
+
+
+def test_released_probe_does_not_stick(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    open_breaker(breaker)
+    clock[0] += 30
+    assert breaker.allow()
+    breaker.release()  # nt kohalik limiit: päringut ei saadetud
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+
+
+def test_stale_cache_when_upstream_fails(openweather):
+    async def run():
+        async with openweather() as server:
+            client = get_client()
+            fresh = await client.current(58.378, 26.729, "et")
+            client.weather_cache.ttls["weather"] = 0.0
+            server.error_rate = 1.0
+
+            for _ in range(client.breaker.failure_threshold):
+                assert await client.current(58.378, 26.729, "et") == fresh
+            assert client.breaker.state == "open"
+            assert client.stale_age("weather", 58.378, 26.729, "et") is not None
+            assert client.weather_cache.stats()["stale_served"] == client.breaker.failure_threshold
+
+            # Avatud lüliti: ülesvoolu ei küsita, vastus tuleb endiselt vahemälust
+            requests = server.requests["weather"]
+            assert await client.current(58.378, 26.729, "et") == fresh
+            assert server.requests["weather"] == requests
+
+            # Ilma vahemäluta kohata annab avatud lüliti koodiga vea
+            with pytest.raises(OpenWeatherError) as err:
+                await client.current(10.0, 10.0, "et")
+            assert err.value.code == "unavailable" and err.value.details["retry_in"] > 0
+
+            # half_open: õnnestunud proov sulgeb lüliti
+            client.breaker.reset_timeout = 0.0
+            server.error_rate = 0.0
+            await client.current(58.378, 26.729, "et")
+            assert client.breaker.state == "closed"
+
+    asyncio.run(run())
@@ -0,0 +1,46 @@
+import asyncio
+
+from weather_client import get_client
+from weather_tools import tools_for
+
+CALLERS = 50
+
+
+def test_concurrent_callers_share_one_request(openweather):
+    async def run():
+        async with openweather(latency_ms=50) as server:
+            client = get_client()
+            results = await asyncio.gather(*(client.current(58.378, 26.729, "et") for _ in range(CALLERS)))
+            assert all(result is results[0] for result in results)
+            assert server.requests == {"weather": 1}
+            assert client.weather_cache.stats()["coalesced"] == CALLERS - 1
+
+    asyncio.run(run())
+
+
+def test_concurrent_tool_calls_share_one_request(openweather):
+    async def run():
+        async with openweather(latency_ms=50) as server:
+            get_weather, get_weather_forecast = tools_for("et")[:2]
+            texts = await asyncio.gather(
+                *(get_weather("Tartu") for _ in range(CALLERS)),
+                *(get_weather_forecast("Tartus", 3) for _ in range(CALLERS)),
+            )
+            # Tartu on gazetteeris: geokodeerimist pole, kumbki endpoint üks kord
+            assert server.requests == {"weather": 1, "forecast": 1}
+            assert len(set(texts[:CALLERS])) == 1 and len(set(texts[CALLERS:])) == 1
+            assert texts[0].startswith("Tartu (EE)")
+
+    asyncio.run(run())
+
+
+def test_cached_response_is_not_refetched(openweather):
+    async def run():
+        async with openweather() as server:
+            client = get_client()
+            first = await client.forecast(59.437, 24.7536, "en")
+            second = await client.forecast(59.437, 24.7536, "en")
+            assert first is second
+            assert server.requests == {"forecast": 1}
+
+    asyncio.run(run())
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+from livekit.agents.llm.utils import build_legacy_openai_schema
+
+from locales import get_locale
+from weather_tools import build_tools, parse_when, time_text
+
+ARG_FIELDS = {
+    "city": "city_arg",
+    "cities": "cities_arg",
+    "days": "days_arg",
+    "day": "day_arg",
+    "metric": "metric_arg",
+    "time": "time_arg",
+}
+
+
+@pytest.mark.parametrize("code", ["et", "en"])
+def test_schema_has_argument_descriptions(code):
+    pack = get_locale(code)
+    for tool in build_tools(pack):
+        schema = build_legacy_openai_schema(tool)["function"]
+        properties = schema["parameters"]["properties"]
+        assert properties, schema["name"]
+        for name, prop in properties.items():
+            assert prop.get("description") == getattr(pack, ARG_FIELDS[name]), (schema["name"], name)
+
+
+def test_detail_schema():
+    pack = get_locale("et")
+    schemas = {s["name"]: s for s in (build_legacy_openai_schema(t)["function"] for t in build_tools(pack))}
+    detail = schemas["get_weather_detail"]
+    assert detail["description"] == pack.detail_doc
+    assert "all" in detail["parameters"]["properties"]["metric"]["enum"]
+    assert detail["parameters"]["required"] == ["city"]
+
+
+@pytest.mark.parametrize("value,expected", [
+    ("15:00", (None, 900, 900)),
+    ("7.30", (None, 450, 450)),
+    ("9", (None, 540, 540)),
+    ("24:00", (None, 1440, 1440)),
+    ("Evening", ("evening", 1080, 1380)),
+])
+def test_parse_when(value, expected):
+    assert parse_when(value) == expected
+
+
+@pytest.mark.parametrize("value", ["24:01", "24:59", "25:00", "12:60", "12:5", "noon"])
+def test_parse_when_rejects(value):
+    assert parse_when(value) is None
+
+
+def test_time_text_rejects_past_midnight():
+    pack = get_locale("et")
+    text = asyncio.run(time_text(pack, "Tartu", 1, "24:30"))
+    assert text == pack.messages["time_invalid"].format(time="24:30")
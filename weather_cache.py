@@ -0,0 +1,271 @@
+"""weather_cache.py
+Tööriistakihi vahemälud.
+
+GeocodeCache - linna nimi -> (lat, lon, name, country), TTL + LRU.
+WeatherCache - /weather ja /forecast vastused, võti on ümardatud koordinaadid +
+endpoint + keel. Samaaegsed möödalasked jagavad üht päringut.
+
+Mõlemal on kaks taset: protsessi mälu ja valikuline SharedCache (SQLite), mida
+jagavad kõik sama masina tööprotsessid ja mis elab üle workeri taaskäivituse.
+PayloadMemo  - vastusest tuletatud andmed (nt päevade kokkuvõtted), arvutatakse
+üks kord iga vastuse kohta.
+
+Keskkond:
+  WEATHER_CACHE_DIR - (valikuline) kataloog vahemälu failide jaoks
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from shared_cache import SharedCache
+
+logger = logging.getLogger("weather-cache")
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent / ".cache"
+NS_GEOCODE = "geocode"
+
+
+def cache_dir() -> Path:
+    return Path(os.getenv("WEATHER_CACHE_DIR") or DEFAULT_CACHE_DIR)
+
+
+def normalize_city(city: str) -> str:
+    """Võti: väiketähed, ilma ääre- ja korduvate tühikuteta."""
+    return " ".join(city.split()).casefold()
+
+
+class GeocodeCache:
+    def __init__(
+        self,
+        shared: Optional["SharedCache"] = None,
+        *,
+        ttl: float = 30 * 24 * 3600,
+        max_entries: int = 1000,
+    ) -> None:
+        self.shared = shared
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._loaded = False
+
+    def load(self) -> None:
+        """Täidab protsessi mälu ühisest vahemälust (sünkroonne, prewarm ajal)."""
+        self._fill(self.shared.recent(NS_GEOCODE, self.max_entries) if self.shared is not None else [])
+
+    async def aload(self) -> None:
+        """load() sündmustsüklist: andmebaasi loetakse lugemislõimes."""
+        self._fill(await self.shared.arecent(NS_GEOCODE, self.max_entries) if self.shared is not None else [])
+
+    def _fill(self, rows: List[Tuple[str, Any, float]]) -> None:
+        self._loaded = True
+        now = time.time()
+        for key, place, stored in rows:
+            if now - stored < self.ttl and key not in self._entries:
+                self._entries[key] = {"ts": stored, "place": place}
+
+    async def get(self, city: str) -> Optional[Dict[str, Any]]:
+        if not self._loaded:
+            await self.aload()
+        key = normalize_city(city)
+        entry = self._entries.get(key)
+        if entry is None and self.shared is not None:
+            # Teine tööprotsess võis linna vahepeal geokodeerida
+            row = await self.shared.aget(NS_GEOCODE, key)
+            entry = self._entries.get(key)
+            if entry is None and row is not None:
+                entry = {"ts": row[1], "place": row[0]}
+                self._remember(key, entry)
+        if entry is None or time.time() - entry["ts"] >= self.ttl:
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry["place"]
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def put(self, city: str, place: Dict[str, Any]) -> None:
+        key = normalize_city(city)
+        now = time.time()
+        self._remember(key, {"ts": now, "place": place})
+        if self.shared is not None:
+            self.shared.put_nowait(NS_GEOCODE, key, place, self.ttl, stored=now)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class SingleFlight:
+    """Sama võtmega samaaegsed kutsed ootavad ühe ja sama käimasoleva päringu ära."""
+
+    def __init__(self) -> None:
+        self._inflight: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        fut = self._inflight.get(key)
+        if fut is None:
+            fut = asyncio.ensure_future(fn())
+            self._inflight[key] = fut
+            fut.add_done_callback(lambda _f: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # shield: ühe ootaja katkestamine ei tühista teiste päringut
+        return await asyncio.shield(fut)
+
+
+CacheKey = Tuple[str, float, float, str]
+
+
+class WeatherCache:
+    def __init__(
+        self,
+        *,
+        ttls: Optional[Dict[str, float]] = None,
+        max_entries: int = 512,
+        precision: int = 2,
+        shared: Optional["SharedCache"] = None,
+        retention: float = 6 * 3600.0,
+    ) -> None:
+        self.ttls = {"weather": 300.0, "forecast": 1800.0}
+        if ttls:
+            self.ttls.update(ttls)
+        self.max_entries = max_entries
+        self.precision = precision
+        self.shared = shared
+        self.retention = retention  # kui kaua hoitakse kirjet ühises vahemälus (aegunud andmete varuks)
+        self.hits = 0
+        self.misses = 0
+        self.stale_served = 0
+        # Aegunud kirjeid ei kustutata kohe: need jäävad LRU piires alles
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Any]]" = OrderedDict()
+        self._flight = SingleFlight()
+
+    def key(self, endpoint: str, lat: float, lon: float, lang: str) -> CacheKey:
+        return (endpoint, round(lat, self.precision), round(lon, self.precision), lang)
+
+    async def _entry(self, key: CacheKey) -> Optional[Tuple[float, Any]]:
+        entry = self._entries.get(key)
+        if self.shared is not None and (entry is None or time.time() - entry[0] >= self.ttls[key[0]]):
+            # Teine tööprotsess võis andmed vahepeal värskendada (loetakse lugemislõimes)
+            row = await self.shared.aget(key[0], json.dumps(key[1:]))
+            entry = self._entries.get(key)
+            if row is not None and (entry is None or row[1] > entry[0]):
+                entry = (row[1], row[0])
+                self._remember(key, entry)
+        return entry
+
+    def _remember(self, key: CacheKey, entry: Tuple[float, Any]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, key: CacheKey) -> Optional[Any]:
+        entry = await self._entry(key)
+        if entry is None:
+            return None
+        ts, value = entry
+        if time.time() - ts >= self.ttls[key[0]]:
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def age(self, key: CacheKey) -> Optional[float]:
+        """Kirje vanus sekundites (ka aegunud kirjel) või None, kui kirjet pole."""
+        entry = self._entries.get(key)
+        return None if entry is None else time.time() - entry[0]
+
+    def is_fresh(self, key: CacheKey) -> bool:
+        age = self.age(key)
+        return age is not None and age < self.ttls[key[0]]
+
+    async def get_stale(self, key: CacheKey, max_age: float) -> Optional[Any]:
+        """Aegunud kirje varuvariandiks, kui ülesvool pole kättesaadav."""
+        entry = await self._entry(key)
+        if entry is None or time.time() - entry[0] > max_age:
+            return None
+        self.stale_served += 1
+        return entry[1]
+
+    def put(self, key: CacheKey, value: Any) -> None:
+        now = time.time()
+        self._remember(key, (now, value))
+        if self.shared is not None:
+            self.shared.put_nowait(key[0], json.dumps(key[1:]), value, self.retention, stored=now)
+
+    async def get_or_fetch(self, key: CacheKey, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        value = await self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+
+        async def _fill() -> Any:
+            result = await fetch()
+            self.put(key, result)
+            return result
+
+        return await self._flight.do(key, _fill)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self._flight.coalesced,
+            "stale_served": self.stale_served,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class PayloadMemo:
+    """Mäletab iga vahemälu võtme jaoks viimase vastuse põhjal arvutatud tulemust.
+
+    Tulemus kehtib seni, kuni vahemälu annab sama vastuse objekti; uue vastuse
+    korral arvutatakse see uuesti.
+    """
+
+    def __init__(self, max_entries: int = 512) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Any, Any]]" = OrderedDict()
+
+    def get_or_compute(self, key: Hashable, payload: Any, compute: Callable[[Any], Any]) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] is payload:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        result = compute(payload)
+        self._entries[key] = (payload, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return result
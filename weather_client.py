@@ -0,0 +1,281 @@
+"""weather_client.py
+Jagatud asünkroonne OpenWeather klient.
+
+Kõik tööriistad kasutavad ühte aiohttp sessiooni protsessi kohta: ühendused
+hoitakse elus ja taaskasutatakse (keep-alive + pool) ning päringud ei blokeeri
+workeri sündmustsüklit.
+
+Päringud läbivad workeri ühise märgiämbri (vt rate_limit.py) ja kaitselüliti.
+Kui ülesvool ei vasta, antakse võimalusel vahemälust aegunud andmed; nende
+vanuse saab küsida stale_age() kaudu.
+
+Keskkond:
+  OPENWEATHER_API_KEY      - API võti
+  OPENWEATHER_BASE_URL     - (valikuline) alternatiivne aadress, nt kohalik test-server
+  OPENWEATHER_RATE_PER_MIN - (valikuline) päringute limiit minutis, vaikimisi 60
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from typing import Any, Dict, Hashable, List, Optional
+
+import aiohttp
+
+from forecast_agg import ForecastSummary, at_time, summarize_forecast
+from rate_limit import HIGH, LOW, CircuitBreaker, PriorityLimiter, RateLimitExceeded, TokenBucket
+from shared_cache import SharedCache
+from weather_cache import GeocodeCache, PayloadMemo, SingleFlight, WeatherCache, cache_dir, normalize_city
+
+logger = logging.getLogger("weather-client")
+
+DEFAULT_BASE_URL = "https://api.openweathermap.org"
+GEO_PATH = "/geo/1.0/direct"
+WEATHER_PATH = "/data/2.5/weather"
+FORECAST_PATH = "/data/2.5/forecast"
+
+# Samad ajalõpud, mis varem requests.get kutsetel
+GEO_TIMEOUT = 10.0
+WEATHER_TIMEOUT = 10.0
+FORECAST_TIMEOUT = 15.0
+
+# Kui kaua oodatakse märki: helistaja ootab vastust, taustatöö võib oodata kauem
+RATE_LIMIT_MAX_WAIT = {HIGH: 3.0, LOW: 30.0}
+# 429 ilma Retry-After päiseta
+DEFAULT_RETRY_AFTER = 30.0
+# Kui vanu andmeid võib tõrke korral veel anda
+STALE_MAX_AGE = 6 * 3600.0
+
+
+class OpenWeatherError(Exception):
+    """Võrgu- või HTTP viga OpenWeather päringul.
+
+    Sõnum on logide jaoks. Helistajale mõeldud teksti koostab keelepakett
+    (LocalePack.fetch_error) koodi ja arvuliste väljade järgi:
+      unavailable (retry_in), rate_limited (wait), timeout (timeout),
+      http (status), invalid_response, network
+    """
+
+    def __init__(self, message: str, status: Optional[int] = None, code: str = "http", **details: float) -> None:
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.details: Dict[str, float] = dict(details, status=status) if status is not None else dict(details)
+
+
+class OpenWeatherClient:
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        *,
+        pool_size: int = 32,
+        keepalive_timeout: float = 60.0,
+        connect_timeout: float = 5.0,
+    ) -> None:
+        self.base_url = (base_url or os.getenv("OPENWEATHER_BASE_URL") or DEFAULT_BASE_URL).rstrip("/")
+        self._pool_size = pool_size
+        self._keepalive_timeout = keepalive_timeout
+        self._connect_timeout = connect_timeout
+        self.shared_cache = SharedCache(cache_dir() / "shared.sqlite3")
+        self.geocode_cache = GeocodeCache(self.shared_cache)
+        self.weather_cache = WeatherCache(shared=self.shared_cache, retention=STALE_MAX_AGE)
+        self.forecast_memo = PayloadMemo(self.weather_cache.max_entries)
+        self._geo_flight = SingleFlight()
+        rate = float(os.getenv("OPENWEATHER_RATE_PER_MIN") or 60)
+        self.bucket = TokenBucket(rate, state_path=cache_dir() / "ratelimit.state")
+        self.limiter = PriorityLimiter(self.bucket)
+        self.breaker = CircuitBreaker()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._warmup_task: Optional["asyncio.Task[None]"] = None
+
+    @property
+    def api_key(self) -> Optional[str]:
+        return os.getenv("OPENWEATHER_API_KEY")
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Sessioon on seotud sündmustsükliga; uus tsükkel (nt asyncio.run) saab uue sessiooni
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=self._pool_size,
+                keepalive_timeout=self._keepalive_timeout,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(connect=self._connect_timeout),
+            )
+            self._loop = loop
+        return self._session
+
+    def _unavailable(self) -> OpenWeatherError:
+        retry_in = self.breaker.retry_in()
+        return OpenWeatherError(
+            f"ilmateenus on ajutiselt kättesaamatu, proovin uuesti {retry_in:.0f} s pärast",
+            status=503,
+            code="unavailable",
+            retry_in=retry_in,
+        )
+
+    async def _get_json(
+        self,
+        path: str,
+        params: Dict[str, Any],
+        timeout: float,
+        *,
+        priority: int = HIGH,
+        key: Optional[Hashable] = None,
+    ) -> Any:
+        # Kaitselüliti enne märgijärjekorda: avatud lüliti korral ei kulutata märki ega oodata
+        if not self.breaker.allow():
+            raise self._unavailable()
+        try:
+            await self.limiter.acquire(priority, RATE_LIMIT_MAX_WAIT[priority], key)
+        except RateLimitExceeded as e:
+            self.breaker.release()
+            raise OpenWeatherError(str(e), status=429, code="rate_limited", wait=e.max_wait) from None
+        except BaseException:
+            self.breaker.release()
+            raise
+
+        session = self._get_session()
+        query = dict(params)
+        query["appid"] = self.api_key or ""
+        # Iga väljapääs ilma kasutatava vastuseta (ka vigane JSON ja tühistamine) on tõrge;
+        # muidu jääks half_open proov lõpmatuseni pooleli
+        healthy = False
+        try:
+            async with session.get(
+                self.base_url + path,
+                params=query,
+                timeout=aiohttp.ClientTimeout(total=timeout, connect=self._connect_timeout),
+            ) as resp:
+                if resp.status == 429:
+                    self.bucket.penalize(_retry_after(resp.headers.get("Retry-After")))
+                if resp.status >= 400:
+                    # Ka 4xx (v.a 429) tähendab, et teenus vastab
+                    healthy = resp.status != 429 and resp.status < 500
+                    # URL-i ei lisata sõnumisse, sest see sisaldab API võtit
+                    raise OpenWeatherError(f"{resp.status} {resp.reason}", status=resp.status)
+                try:
+                    data = await resp.json(content_type=None)
+                except ValueError:
+                    raise OpenWeatherError("vigane vastus (pole JSON)", code="invalid_response") from None
+                healthy = True
+                return data
+        except asyncio.TimeoutError:
+            raise OpenWeatherError(f"päring aegus ({timeout:g} s)", code="timeout", timeout=timeout) from None
+        except aiohttp.ClientError as e:
+            raise OpenWeatherError(str(e) or e.__class__.__name__, code="network") from e
+        finally:
+            if healthy:
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+
+    async def geocode(self, city: str, priority: int = HIGH) -> List[Dict[str, Any]]:
+        cached = await self.geocode_cache.get(city)
+        if cached is not None:
+            return [cached]
+        key = ("geo", normalize_city(city))
+        if priority == HIGH:
+            self.limiter.promote(key)
+        geo_data = await self._geo_flight.do(
+            key[1],
+            lambda: self._get_json(GEO_PATH, {"q": city, "limit": 1}, GEO_TIMEOUT, priority=priority, key=key),
+        )
+        if geo_data:
+            first = geo_data[0]
+            place = {
+                "lat": first["lat"],
+                "lon": first["lon"],
+                "name": first.get("name", city),
+                "country": first.get("country", ""),
+            }
+            self.geocode_cache.put(city, place)
+            return [place]
+        return geo_data
+
+    async def _cached(self, endpoint: str, path: str, timeout: float, lat: float, lon: float, lang: str,
+                      priority: int) -> Dict[str, Any]:
+        params = {"lat": lat, "lon": lon, "units": "metric", "lang": lang}
+        key = self.weather_cache.key(endpoint, lat, lon, lang)
+        if priority == HIGH:
+            self.limiter.promote(key)
+        try:
+            return await self.weather_cache.get_or_fetch(
+                key, lambda: self._get_json(path, params, timeout, priority=priority, key=key)
+            )
+        except OpenWeatherError as e:
+            stale = await self.weather_cache.get_stale(key, STALE_MAX_AGE)
+            if stale is None:
+                raise
+            logger.warning("OpenWeather tõrge (%s), kasutan vahemälu andmeid (%s)", e, endpoint)
+            return stale
+
+    async def current(self, lat: float, lon: float, lang: str, priority: int = HIGH) -> Dict[str, Any]:
+        return await self._cached("weather", WEATHER_PATH, WEATHER_TIMEOUT, lat, lon, lang, priority)
+
+    async def forecast(self, lat: float, lon: float, lang: str, priority: int = HIGH) -> Dict[str, Any]:
+        return await self._cached("forecast", FORECAST_PATH, FORECAST_TIMEOUT, lat, lon, lang, priority)
+
+    def stale_age(self, endpoint: str, lat: float, lon: float, lang: str) -> Optional[float]:
+        """Kui viimati antud andmed on aegunud (tõrke varuvariant), siis nende vanus sekundites."""
+        key = self.weather_cache.key(endpoint, lat, lon, lang)
+        return None if self.weather_cache.is_fresh(key) else self.weather_cache.age(key)
+
+    async def forecast_days(self, lat: float, lon: float, lang: str, priority: int = HIGH) -> ForecastSummary:
+        """Päevade kokkuvõtted; arvutatakse üks kord iga /forecast vastuse kohta."""
+        f_data = await self.forecast(lat, lon, lang, priority)
+        key = self.weather_cache.key("forecast", lat, lon, lang)
+        return self.forecast_memo.get_or_compute(key, f_data, summarize_forecast)
+
+    def prewarm(self) -> None:
+        """Sünkroonne soojendus protsessi käivitamisel: kettavahemälu ja prognoosi koondamine."""
+        self.shared_cache.warm()
+        self.geocode_cache.load()
+        summary = summarize_forecast({"list": [{"dt": 0, "main": {"temp": 0.0}, "weather": [{"description": ""}]}]})
+        at_time(summary.columns, 0)  # numpy veerud (kellaaja küsimused)
+
+    def start_warmup(self) -> None:
+        """Käivitab warmup() taustal (viide hoitakse alles, et ülesanne ei kaoks)."""
+        self._warmup_task = asyncio.get_running_loop().create_task(self.warmup())
+
+    async def warmup(self) -> None:
+        """Avab ühenduse ette (DNS + TCP + TLS), et esimene tööriistakutse seda ei maksaks."""
+        try:
+            async with self._get_session().head(
+                self.base_url + "/", timeout=aiohttp.ClientTimeout(total=5.0)
+            ) as resp:
+                await resp.read()
+        except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+            logger.debug("ühenduse soojendamine ebaõnnestus: %s", e)
+
+    async def aclose(self) -> None:
+        # Ühise vahemälu kirjutused lõpule enne protsessi lõppu
+        await asyncio.to_thread(self.shared_cache.flush)
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+
+def _retry_after(value: Optional[str]) -> float:
+    try:
+        return max(1.0, float(value)) if value else DEFAULT_RETRY_AFTER
+    except ValueError:
+        return DEFAULT_RETRY_AFTER
+
+
+_client: Optional[OpenWeatherClient] = None
+
+
+def get_client() -> OpenWeatherClient:
+    """Tagastab protsessi ühise kliendi (luuakse esimesel kutsel)."""
+    global _client
+    if _client is None:
+        _client = OpenWeatherClient()
+    return _client
@@ -0,0 +1,419 @@
+"""weather_tools.py
+Ilmatööriistad (get_weather, get_weather_forecast, ...) keelepaketi (locales.py) kaupa.
+
+build_tools(pack) loob tööriistad, mille kirjeldused (LLM-i skeem), mallid ja
+numbrite keel tulevad paketist; andmed ja vahemälud (weather_client) on kõigi
+keelte peale ühised. tools_for(code) hoiab iga keele tööriistu protsessis
+ühe korra.
+
+current_fields / forecast_fields annavad vormindatud väljad ilma mallita;
+neid kasutab ka kiirtee (fast_path.py), et vastata ilma LLM-ita.
+
+get_weather_multi / get_weather_forecast_multi küsivad mitu linna ühe
+tööriistakutsega: linnad hangitakse samaaegselt (kuni MULTI_CONCURRENCY
+korraga, vahemälud ja single-flight on ühised) ja tulemus on üks koondtekst,
+nii et võrdlus maksab ühe LLM-i ringi ja kestab umbes aeglaseima linna jagu.
+
+Vaikimisi on tulemused lühikesed (pack.compact_*, päev ühel real); muud
+näitajad (keskmine ja tuntav temperatuur, niiskus, rõhk) annab ühe päeva
+kohta get_weather_detail samast vahemälust. TOOL_OUTPUT=verbose annab
+varasema täislausetes teksti.
+
+get_weather_at vastab kellaaja ("15:00") või päevaosa (hommik, pärastlõuna,
+õhtu, öö) küsimusele samast prognoosi vahemälust: 3h kirjete vahel
+interpoleeritakse (forecast_agg.at_time / over_range), kohalik aeg tuleb
+vastuse city.timezone nihkest.
+
+Iga tulemuse lühikokkuvõte (SUMMARY_*) jäetakse context_budget.py jaoks
+meelde: vanemates voorudes asendatakse pikk tulemus LLM-i päringus sellega.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import time
+from datetime import date
+from functools import lru_cache
+from typing import Annotated, Any, Awaitable, Callable, Dict, List, Literal, Optional, Tuple
+
+from livekit.agents import FunctionTool, function_tool
+from pydantic import Field
+
+from context_budget import remember_summary, summary_of
+from forecast_agg import EPOCH_ORDINAL, SECONDS_PER_DAY, ForecastSummary, at_time, over_range
+from gazetteer import resolve, strip_case
+from locales import LocalePack, compact_output, get_locale, render_template
+from prefetch import note_lookup
+from telemetry import span, traced_tool
+from weather_client import OpenWeatherError, get_client
+
+# Mitme linna tööriistad: linnu ühe kutse kohta ja samaaegseid hankeid
+MULTI_MAX_CITIES = 5
+MULTI_CONCURRENCY = 4
+
+Metric = Literal["all", "temp", "feels", "wind", "humidity", "pressure", "description"]
+
+# Päevaosad kohaliku aja tundides [algus, lõpp); öö ulatub järgmise päeva hommikusse
+DAY_PARTS = {"morning": (6, 12), "afternoon": (12, 18), "evening": (18, 23), "night": (23, 30)}
+_CLOCK = re.compile(r"^(\d{1,2})(?:[:.](\d{2}))?$")
+
+# Vanade tulemuste kokkuvõtted LLM-i kontekstis (context_budget.py); väljad on juba paketi keeles
+SUMMARY_CURRENT = "{city_name} ({country}): {temp}, {description}"
+SUMMARY_FORECAST = "{city_name} ({country}): {days}"
+SUMMARY_DAY = "{day_name} {min_temp}..{max_temp}, {description}"
+SUMMARY_AT = "{city_name} ({country}) {day_name} {when}: {temp}, {description}"
+
+
+class ToolFailure(Exception):
+    """Kasutajale mõeldud teade (API võti puudub, linna ei leitud, andmed puuduvad)."""
+
+
+def failure_text(pack: LocalePack, e: Exception, city: str, not_found: str = "city_not_found") -> str:
+    """Erind -> tööriista veateade paketi keeles."""
+    if isinstance(e, ToolFailure):
+        return str(e)
+    if isinstance(e, OpenWeatherError):
+        return pack.fetch_error(e.code, e.details)
+    if isinstance(e, KeyError):
+        return pack.messages[not_found].format(city=city)
+    return pack.messages["unexpected_error"].format(error=str(e))
+
+
+async def _place(pack: LocalePack, city: str, not_found: str, endpoint: str) -> Tuple[float, float, str, str]:
+    # Kohalik nimekiri (käänded, maakonnad, riigid) enne geokodeerimise API-t
+    known = resolve(city, pack.code)
+    note_lookup(known.name if known is not None else city, endpoint)
+    if known is not None:
+        return known.lat, known.lon, known.name, known.country
+    with span("geocode"):
+        geo_data = await get_client().geocode(city)
+        stem = strip_case(city.strip()) if not geo_data and pack.code == "et" else None
+        if stem:
+            # Tundmatu käändes nimi (Kilingi-Nõmmel): üks kordus ilma käändelõputa
+            geo_data = await get_client().geocode(stem)
+    if not geo_data:
+        raise ToolFailure(pack.messages[not_found].format(city=city))
+    return geo_data[0]["lat"], geo_data[0]["lon"], geo_data[0].get("name", city), geo_data[0].get("country", "")
+
+
+def _sentence(text: str) -> str:
+    return f"{text[:1].upper()}{text[1:]}. " if text else ""
+
+
+async def current_fields(pack: LocalePack, city: str) -> Dict[str, Any]:
+    """Praeguse ilma vormindatud väljad (pack.current_template / spoken_current jaoks)."""
+    if not os.getenv("OPENWEATHER_API_KEY"):
+        raise ToolFailure(pack.messages["no_api_key"])
+    lat, lon, city_name, country = await _place(pack, city, "city_not_found", "weather")
+
+    client = get_client()
+    with span("weather"):
+        data = await client.current(lat, lon, lang=pack.code)
+
+    main = data.get("main", {})
+    wind = data.get("wind", {})
+    weather_arr = data.get("weather", [])
+    description = weather_arr[0].get("description", "") if weather_arr else ""
+
+    temp = main.get("temp")
+    if temp is None:
+        raise ToolFailure(pack.messages["current_missing"])
+
+    return {
+        "country": country,
+        "city_name": city_name,
+        "temp": pack.format_float(temp, unit="°C"),
+        "feels": pack.format_float(main.get("feels_like"), unit="°C"),
+        "wind": pack.format_float(wind.get("speed"), unit="m/s"),
+        "humidity": pack.format_int(main.get("humidity"), unit="%"),
+        "pressure": pack.format_int(main.get("pressure"), unit="hPa"),
+        "pressure_value": pack.format_int(main.get("pressure")),
+        "description": description,
+        "description_sentence": _sentence(description),
+        "stale": pack.stale(client.stale_age("weather", lat, lon, pack.code)),
+    }
+
+
+async def _forecast(pack: LocalePack, city: str) -> Tuple[ForecastSummary, Dict[str, Any]]:
+    if not os.getenv("OPENWEATHER_API_KEY"):
+        raise ToolFailure(pack.messages["no_api_key_forecast"])
+    lat, lon, city_name, country = await _place(pack, city, "city_not_found_forecast", "forecast")
+
+    # /data/2.5/forecast, päevade kokkuvõtted on vastuse kohta vahemälus
+    client = get_client()
+    with span("weather"):
+        summary = await client.forecast_days(lat, lon, lang=pack.code)
+    if not summary.days:
+        raise ToolFailure(pack.messages["forecast_missing"])
+    header = {
+        "country": country,
+        "city_name": city_name,
+        "stale": pack.stale(client.stale_age("forecast", lat, lon, pack.code)),
+    }
+    return summary, header
+
+
+def _local_day(tz_offset: int) -> int:
+    """Linna kohalik tänane päev (päevi alates 1970-01-01), vastuse city.timezone nihke järgi."""
+    return (int(time.time()) + tz_offset) // SECONDS_PER_DAY
+
+
+async def forecast_fields(
+    pack: LocalePack, city: str, days: int, first_day: int = 0
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Prognoosi päise ja päevade vormindatud väljad (days on juba 1..5).
+
+    Päevad valitakse kuupäeva järgi linna kohaliku tänase päeva suhtes
+    (first_day 0 = täna, 1 = homme), mitte vastuse päevade järjekorra järgi:
+    vastuse esimene päev võib olla homne (hilisõhtu) või eilne (vahemälu).
+    Iga rea "offset" on päeva kaugus tänasest.
+    """
+    summary, header = await _forecast(pack, city)
+
+    today = EPOCH_ORDINAL + _local_day(summary.tz_offset)
+    start = today + first_day
+    days_selected = [day for day in summary.days if start <= day.date.toordinal() < start + days]
+    if not days_selected:
+        raise ToolFailure(pack.messages["forecast_missing"])
+    header["days"] = len(days_selected)
+    rows = [
+        {
+            "offset": day.date.toordinal() - today,
+            "day_name": pack.day_name(day.date.strftime("%A")),
+            "avg_temp": pack.format_float(day.avg_temp, unit="°C"),
+            "feels": pack.format_float(day.avg_feels, unit="°C"),
+            "min_temp": pack.format_float(day.min_temp, unit="°C"),
+            "max_temp": pack.format_float(day.max_temp, unit="°C"),
+            "max_temp_value": pack.format_float(day.max_temp),
+            "wind": pack.format_float(day.avg_wind, unit="m/s"),
+            "humidity": pack.format_int(day.avg_hum, unit="%"),
+            "pressure": pack.format_int(day.avg_press, unit="hPa"),
+            "description": day.description,
+            "description_sentence": _sentence(day.description),
+        }
+        for day in days_selected
+    ]
+    return header, rows
+
+
+async def current_text(pack: LocalePack, city: str) -> str:
+    try:
+        fields = await current_fields(pack, city)
+    except Exception as e:
+        return failure_text(pack, e, city)
+    template = pack.compact_current if compact_output() else pack.current_template
+    return remember_summary(
+        render_template(template, fields).strip() + fields["stale"],
+        SUMMARY_CURRENT.format(**fields),
+    )
+
+
+async def forecast_text(pack: LocalePack, city: str, days: int) -> str:
+    # Normaliseeri päevade arv 1..5
+    if days < 1:
+        days = 1
+    if days > 5:
+        days = 5
+
+    try:
+        header, rows = await forecast_fields(pack, city, days)
+    except Exception as e:
+        return failure_text(pack, e, city, "city_not_found_forecast")
+
+    if compact_output():
+        lines = [pack.compact_forecast_header.format(**header)]
+        lines.extend(pack.compact_forecast_day.format(**row) for row in rows)
+        lines.append(pack.compact_detail_hint)
+        forecast_info = "\n".join(lines)
+    else:
+        forecast_info = _verbose_forecast(pack, header, rows)
+    days_summary = "; ".join(SUMMARY_DAY.format(**row) for row in rows)
+    return remember_summary(
+        forecast_info.strip() + header["stale"],
+        SUMMARY_FORECAST.format(city_name=header["city_name"], country=header["country"], days=days_summary),
+    )
+
+
+def _verbose_forecast(pack: LocalePack, header: Dict[str, Any], rows: List[Dict[str, Any]]) -> str:
+    forecast_info = pack.forecast_header.format(**header)
+    for row in rows:
+        forecast_info += pack.forecast_day.format(**row)
+        if row["description"]:
+            forecast_info += pack.forecast_description.format(**row)
+        else:
+            forecast_info += "\n"
+    return forecast_info
+
+
+async def detail_text(pack: LocalePack, city: str, day: int, metric: str) -> str:
+    """Ühe prognoosipäeva (1 = täna) kõik näitajad või üks; sama vahemälu kui get_weather_forecast."""
+    try:
+        header, rows = await forecast_fields(pack, city, 5)
+    except Exception as e:
+        return failure_text(pack, e, city, "city_not_found_forecast")
+    row = next((row for row in rows if row["offset"] == day - 1), None)
+    if row is None:
+        return pack.messages["detail_day_missing"].format(days=len(rows))
+    template = pack.detail_metrics.get(metric)
+    if template is None:
+        text = pack.forecast_day.format(**row) + (pack.forecast_description.format(**row) if row["description"] else "")
+    else:
+        text = template.format(**row)
+    return f"{header['city_name']} ({header['country']}): {text.strip()}" + header["stale"]
+
+
+def parse_when(value: str) -> Optional[Tuple[Optional[str], int, int]]:
+    """"15:00" -> (None, 900, 900); "evening" -> ("evening", 1080, 1380); minutid kohaliku päeva algusest."""
+    value = value.strip().lower()
+    if value in DAY_PARTS:
+        start, end = DAY_PARTS[value]
+        return value, start * 60, end * 60
+    match = _CLOCK.match(value)
+    if not match:
+        return None
+    hour, minute = int(match.group(1)), int(match.group(2) or 0)
+    # 24:00 on päeva lõpp; 24:01 ja hilisemad ei ole kellaajad
+    if hour > 24 or minute > 59 or (hour == 24 and minute > 0):
+        return None
+    return None, hour * 60 + minute, hour * 60 + minute
+
+
+async def time_text(pack: LocalePack, city: str, day: int, when: str) -> str:
+    """Prognoos kellaajaks või päevaosaks (day 1 = täna linna kohaliku aja järgi)."""
+    parsed = parse_when(when)
+    if parsed is None:
+        return pack.messages["time_invalid"].format(time=when)
+    part, start_min, end_min = parsed
+    try:
+        summary, header = await _forecast(pack, city)
+    except Exception as e:
+        return failure_text(pack, e, city, "city_not_found_forecast")
+
+    tz = summary.tz_offset
+    local_day = _local_day(tz) + max(day, 1) - 1
+    day_start = local_day * SECONDS_PER_DAY - tz  # kohalik kesköö UTC sekundites
+    fields = dict(header, day_name=pack.day_name(date.fromordinal(EPOCH_ORDINAL + local_day).strftime("%A")))
+    if part is None:
+        point = at_time(summary.columns, day_start + start_min * 60)
+        if point is None:
+            return pack.messages["time_out_of_range"]
+        fields.update(
+            time=f"{start_min // 60:02d}:{start_min % 60:02d}",
+            temp=pack.format_float(point.temp, unit="°C"),
+            feels=pack.format_float(point.feels, unit="°C"),
+            wind=pack.format_float(point.wind, unit="m/s"),
+            humidity=pack.format_int(round(point.hum), unit="%"),
+            description=point.description,
+        )
+        text, when_name = pack.time_point.format(**fields), fields["time"]
+    else:
+        # Tänase päevaosa juba möödunud tunnid jäävad prognoosist välja
+        window = over_range(summary.columns, day_start + start_min * 60, day_start + end_min * 60)
+        if window is None:
+            return pack.messages["time_out_of_range"]
+        fields.update(
+            part=pack.part_names.get(part, part),
+            min_temp=pack.format_float(window.min_temp, unit="°C"),
+            max_temp=pack.format_float(window.max_temp, unit="°C"),
+            wind=pack.format_float(window.avg_wind, unit="m/s"),
+            description=window.description,
+        )
+        fields["temp"] = f"{fields['min_temp']}..{fields['max_temp']}"
+        text, when_name = pack.time_part.format(**fields), fields["part"]
+    return remember_summary(text + header["stale"], SUMMARY_AT.format(when=when_name, **fields))
+
+
+async def multi_text(pack: LocalePack, cities: List[str], fetch: Callable[[str], Awaitable[str]]) -> str:
+    """Linnade tekstid samaaegselt (kuni MULTI_CONCURRENCY korraga), linnade järjekorras üheks tekstiks."""
+    unique = list(dict.fromkeys(c.strip() for c in cities if c and c.strip()))
+    if not unique:
+        return pack.messages["city_not_found"].format(city="")
+    notes = []
+    if len(unique) > MULTI_MAX_CITIES:
+        notes.append(pack.messages["too_many_cities"].format(max=MULTI_MAX_CITIES))
+        unique = unique[:MULTI_MAX_CITIES]
+    sem = asyncio.Semaphore(MULTI_CONCURRENCY)
+
+    async def one(city: str) -> str:
+        async with sem:
+            return await fetch(city)
+
+    # Iga linn eraldi ülesandena: ühe linna viga ei peata teisi (tekstid sisaldavad juba veateateid)
+    texts = await asyncio.gather(*(one(city) for city in unique))
+    return remember_summary(
+        "\n\n".join(notes + list(texts)),
+        " | ".join(summary_of(text) or text for text in texts),
+    )
+
+
+def build_tools(pack: LocalePack) -> List[FunctionTool]:
+    async def get_weather(city: str) -> str:
+        return await current_text(pack, city)
+
+    async def get_weather_forecast(city: str, days: int = 5) -> str:
+        return await forecast_text(pack, city, days)
+
+    async def get_weather_multi(cities: List[str]) -> str:
+        return await multi_text(pack, cities, lambda city: current_text(pack, city))
+
+    async def get_weather_forecast_multi(cities: List[str], days: int = 3) -> str:
+        return await multi_text(pack, cities, lambda city: forecast_text(pack, city, days))
+
+    async def get_weather_detail(city: str, day: int = 1, metric: str = "all") -> str:
+        return await detail_text(pack, city, day, metric)
+
+    async def get_weather_at(city: str, time: str, day: int = 1) -> str:
+        return await time_text(pack, city, day, time)
+
+    # Skeem (argumentide kirjeldused, docstring) tuleb paketist; traced_tool kopeerib need edasi
+    get_weather.__doc__ = pack.current_doc
+    get_weather.__annotations__ = {
+        "city": Annotated[str, Field(description=pack.city_arg)],
+        "return": str,
+    }
+    get_weather_forecast.__doc__ = pack.forecast_doc
+    get_weather_forecast.__annotations__ = {
+        "city": Annotated[str, Field(description=pack.city_arg)],
+        "days": Annotated[int, Field(description=pack.days_arg)],
+        "return": str,
+    }
+    get_weather_multi.__doc__ = pack.multi_current_doc
+    get_weather_multi.__annotations__ = {
+        "cities": Annotated[List[str], Field(description=pack.cities_arg)],
+        "return": str,
+    }
+    get_weather_forecast_multi.__doc__ = pack.multi_forecast_doc
+    get_weather_forecast_multi.__annotations__ = {
+        "cities": Annotated[List[str], Field(description=pack.cities_arg)],
+        "days": Annotated[int, Field(description=pack.days_arg)],
+        "return": str,
+    }
+    get_weather_detail.__doc__ = pack.detail_doc
+    get_weather_detail.__annotations__ = {
+        "city": Annotated[str, Field(description=pack.city_arg)],
+        "day": Annotated[int, Field(description=pack.day_arg)],
+        "metric": Annotated[Metric, Field(description=pack.metric_arg)],
+        "return": str,
+    }
+    get_weather_at.__doc__ = pack.time_doc
+    get_weather_at.__annotations__ = {
+        "city": Annotated[str, Field(description=pack.city_arg)],
+        "time": Annotated[str, Field(description=pack.time_arg)],
+        "day": Annotated[int, Field(description=pack.day_arg)],
+        "return": str,
+    }
+    return [
+        function_tool()(traced_tool(fn))
+        for fn in (
+            get_weather, get_weather_forecast, get_weather_multi, get_weather_forecast_multi,
+            get_weather_detail, get_weather_at,
+        )
+    ]
+
+
+@lru_cache(maxsize=None)
+def tools_for(code: str) -> List[FunctionTool]:
+    """[get_weather, get_weather_forecast, get_weather_multi, get_weather_forecast_multi, get_weather_detail, get_weather_at] antud keele jaoks (üks kord protsessi kohta)."""
+    return build_tools(get_locale(code))
@@ -0,0 +1,253 @@
+"""worker_load.py
+Workeri koormus LiveKiti dispatcherile: tööprotsesside sündmustsükli
+hilinemine, aktiivsete kõnede arv, CPU ja mälu.
+
+LiveKiti vaikimisi koormus on ainult CPU. Blokeeriv tööriistakutse või raske
+müra summutus venitab aga kõne sündmustsüklit (heli katkeb, vastus hilineb)
+juba enne, kui CPU keskmine on kõrge, ja dispatcher saadab workerile edasi
+uusi kõnesid.
+
+LagMonitor  - jookseb iga kõne (tööprotsessi) sündmustsüklis, mõõdab 100 ms
+              taktiga une hilinemist ja kirjutab viimase ~2 s suurima
+              hilinemise faili WORKER_LOAD_DIR/<pid>.lag. Kinni jäänud tsükkel
+              faili ei uuenda, seega loetakse ka faili vanus hilinemiseks.
+WorkerLoad  - WorkerOptions.load_fnc: iga osa jagatakse oma piiriga ja
+              skaleeritakse nii, et piir = LOAD_THRESHOLD; worker teatab
+              suurima osa. Dispatcher lõpetab uute kõnede saatmise, kui
+              ükskõik milline osa jõuab oma piirini.
+
+Keskkond:
+  WORKER_LOAD          - 0 jätab LiveKiti vaikimisi koormuse (vaikimisi sees)
+  WORKER_MAX_LAG_MS    - tööprotsesside tsükli hilinemise piir ms (vaikimisi 150)
+  WORKER_MAX_SESSIONS  - aktiivsete kõnede piir (vaikimisi 20)
+  WORKER_MAX_CPU       - CPU kasutuse piir 0..1 (vaikimisi 0.8)
+  WORKER_MAX_MEMORY    - mälu kasutuse piir 0..1 (vaikimisi 0.9)
+  WORKER_LOAD_DIR      - hilinemisfailide kataloog (vaikimisi WEATHER_CACHE_DIR/load-<workeri pid>)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import collections
+import logging
+import os
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Deque, Dict, Optional
+
+import prometheus_client
+import psutil
+from livekit.agents.utils.hw import get_cpu_monitor
+
+from telemetry import DEPLOYMENT
+from weather_cache import cache_dir
+
+logger = logging.getLogger("worker-load")
+
+# Teatatud koormus, mille juures dispatcher uusi kõnesid ei saada (prod-is peab olema < 1)
+LOAD_THRESHOLD = 0.75
+LAG_INTERVAL = 0.1
+LAG_WINDOW = 20        # proovi (~2 s)
+PUBLISH_EVERY = 0.5
+STALE_AFTER = 1.0      # nii vana fail tähendab kinni jäänud tsüklit
+CPU_SAMPLES = 2        # 0,5 s proovid, keskmine ~1 s
+
+_STATE = struct.Struct("<dd")  # hilinemine s, kirjutamise aeg
+
+WORKER_LOAD = prometheus_client.Gauge(
+    "voice_agent_worker_load",
+    "Workeri teatatud koormus ja selle osad (1.0 = osa piiril)",
+    ["deployment", "component"],
+    multiprocess_mode="livemax",
+)
+
+
+def enabled() -> bool:
+    return os.getenv("WORKER_LOAD", "1") != "0"
+
+
+def load_dir() -> Path:
+    return Path(os.getenv("WORKER_LOAD_DIR") or cache_dir() / f"load-{os.getpid()}")
+
+
+@dataclass(frozen=True)
+class LoadLimits:
+    max_lag_ms: float = 150.0
+    max_sessions: int = 20
+    max_cpu: float = 0.8
+    max_memory: float = 0.9
+
+    @classmethod
+    def from_env(cls) -> "LoadLimits":
+        return cls(
+            max_lag_ms=float(os.getenv("WORKER_MAX_LAG_MS", cls.max_lag_ms)),
+            max_sessions=int(os.getenv("WORKER_MAX_SESSIONS", cls.max_sessions)),
+            max_cpu=float(os.getenv("WORKER_MAX_CPU", cls.max_cpu)),
+            max_memory=float(os.getenv("WORKER_MAX_MEMORY", cls.max_memory)),
+        )
+
+
+class LagMonitor:
+    """Tööprotsessi sündmustsükli hilinemine faili, mida workeri load_fnc loeb."""
+
+    def __init__(self, directory: Optional[Path] = None) -> None:
+        self.directory = Path(directory) if directory is not None else load_dir()
+        self.path = self.directory / f"{os.getpid()}.lag"
+        self._window: Deque[float] = collections.deque(maxlen=LAG_WINDOW)
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    def start(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        last_publish = 0.0
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(LAG_INTERVAL)
+            self._window.append(max(time.perf_counter() - start - LAG_INTERVAL, 0.0))
+            now = time.time()
+            if now - last_publish >= PUBLISH_EVERY:
+                self._publish(max(self._window), now)
+                last_publish = now
+
+    def _publish(self, lag: float, now: float) -> None:
+        # 16 baiti; os.replace on atomaarne, lugeja ei näe poolikut faili
+        tmp = self.path.with_suffix(".tmp")
+        try:
+            tmp.write_bytes(_STATE.pack(lag, now))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.debug("hilinemise kirjutamine ebaõnnestus: %s", e)
+
+    async def aclose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def job_lag(directory: Path, now: Optional[float] = None) -> float:
+    """Suurim tööprotsesside tsükli hilinemine sekundites; lõppenud protsesside failid kustutatakse."""
+    now = time.time() if now is None else now
+    worst = 0.0
+    for path in directory.glob("*.lag"):
+        try:
+            lag, written = _STATE.unpack(path.read_bytes())
+            pid = int(path.stem)
+        except (OSError, ValueError, struct.error):
+            continue
+        if not _alive(pid):
+            path.unlink(missing_ok=True)
+            continue
+        # Kinni jäänud tsükkel ei kirjuta: faili vanus ise on hilinemine
+        worst = max(worst, lag, now - written - STALE_AFTER)
+    return worst
+
+
+def _usable_cpus() -> Optional[int]:
+    try:
+        return len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        return None
+
+
+class _CpuSampler:
+    """CPU kasutus (cgroup-teadlik, LiveKiti CPU monitor) taustalõimes libiseva keskmisena."""
+
+    def __init__(self) -> None:
+        self._monitor = get_cpu_monitor()
+        # LiveKiti monitor jagab cgroup kvoodiga; kui protsess on seotud vähemate CPU-dega
+        # (cpuset/taskset), on tegelik mahutavus väiksem ja kasutus muidu alahinnatud
+        quota = self._monitor.cpu_count()
+        usable = _usable_cpus()
+        self._scale = quota / usable if usable and usable < quota else 1.0
+        self._samples: Deque[float] = collections.deque(maxlen=CPU_SAMPLES)
+        self._lock = threading.Lock()
+        threading.Thread(target=self._run, daemon=True, name="worker-load-cpu").start()
+
+    def _run(self) -> None:
+        while True:
+            value = min(self._monitor.cpu_percent(interval=0.5) * self._scale, 1.0)
+            with self._lock:
+                self._samples.append(value)
+
+    def average(self) -> float:
+        with self._lock:
+            return sum(self._samples) / len(self._samples) if self._samples else 0.0
+
+
+class WorkerLoad:
+    """WorkerOptions.load_fnc: kutsutakse workeri protsessis (executor lõimes) ~0,5 s järel."""
+
+    def __init__(self, limits: Optional[LoadLimits] = None, directory: Optional[Path] = None,
+                 threshold: float = LOAD_THRESHOLD) -> None:
+        self.limits = limits or LoadLimits.from_env()
+        self.directory = Path(directory) if directory is not None else load_dir()
+        self.threshold = threshold
+        self.full = False
+        self.last: Dict[str, float] = {}
+        self._cpu: Optional[_CpuSampler] = None
+
+    def components(self, active_sessions: int) -> Dict[str, float]:
+        """Iga osa oma piiri suhtes (1.0 = piiril)."""
+        if self._cpu is None:
+            self._cpu = _CpuSampler()
+        return {
+            "lag": job_lag(self.directory) * 1000 / self.limits.max_lag_ms,
+            "sessions": active_sessions / self.limits.max_sessions,
+            "cpu": self._cpu.average() / self.limits.max_cpu,
+            "memory": psutil.virtual_memory().percent / 100 / self.limits.max_memory,
+        }
+
+    def __call__(self, worker: Any) -> float:
+        parts = self.components(len(worker.active_jobs))
+        load = min(max(parts.values()) * self.threshold, 1.0)
+        for name, value in parts.items():
+            WORKER_LOAD.labels(DEPLOYMENT, name).set(value)
+        WORKER_LOAD.labels(DEPLOYMENT, "load").set(load)
+        self.last = parts
+
+        full = load >= self.threshold
+        if full != self.full:
+            self.full = full
+            summary = ", ".join(f"{k}={v:.2f}" for k, v in parts.items())
+            if full:
+                logger.warning("worker täis, uusi kõnesid ei võeta (%s)", summary)
+            else:
+                logger.info("worker võtab taas kõnesid vastu (%s)", summary)
+        return load
+
+
+def worker_load_options() -> Dict[str, Any]:
+    """WorkerOptions lisavõtmed (load_fnc, load_threshold); WORKER_LOAD=0 korral tühi."""
+    if not enabled():
+        return {}
+    # Tööprotsessid pärivad keskkonna: sama kataloog kõigile selle workeri kõnedele
+    os.environ.setdefault("WORKER_LOAD_DIR", str(load_dir()))
+    return {"load_fnc": WorkerLoad(), "load_threshold": LOAD_THRESHOLD}
+
+
+def start_lag_monitor() -> Optional[LagMonitor]:
+    """Käivitab tööprotsessis hilinemise mõõtmise (kutsu entrypointist); WORKER_LOAD=0 korral None."""
+    if not enabled():
+        return None
+    monitor = LagMonitor()
+    monitor.start()
+    return monitor